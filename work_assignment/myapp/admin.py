@@ -1,8 +1,204 @@
-from django.contrib import admin
-from .models import Position, Worker, Task, Assignment
-
-# Basic registration ─ one line each
-admin.site.register(Position)
-admin.site.register(Worker)
-admin.site.register(Task)
-admin.site.register(Assignment)
\ No newline at end of file
+"""
+myapp/admin.py
+
+Admin pages that stay usable with millions of Task / Assignment rows.
+
+* Every changelist loads its foreign keys in the same query
+  (list_select_related) – no per-row lookups for `Task.__str__` and friends.
+* Default ordering is (-date, -id), so a page is read from the newest
+  month partition through the (date, id) indexes.
+* A year → month filter (MonthFilter) replaces date_hierarchy, whose
+  choices cost a SELECT DISTINCT date_trunc(…) over the whole list on
+  every unfiltered page. Its choices come from MIN / MAX(date) instead.
+* Filters only use indexed columns; FK fields use autocomplete widgets
+  instead of <select> boxes with every task in them.
+* Row counts come from the planner's estimate once they are large
+  (EstimatedCountPaginator), and the unfiltered "N total" count is off.
+* Bulk actions are single set-based statements (myapp/batch.py) instead
+  of Django's delete_selected, which loads and lists every row first.
+  Task actions that remove assignments also need delete_assignment – the
+  check delete_selected's cascade summary would otherwise have made.
+"""
+
+import json
+from datetime import date
+from functools import cached_property
+
+from django.contrib import admin, messages
+from django.contrib.admin.options import IncorrectLookupParameters
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Max, Min
+from django.urls import reverse
+from django.utils.html import format_html
+
+from .batch import delete_assignments, delete_tasks, unassign_tasks
+from .models import Assignment, Position, Task, Worker
+from .partitions import add_months, month_start
+
+
+# ── Counting ─────────────────────────────────────────────────────────────
+
+
+def estimated_count(queryset):
+    """
+    The planner's row estimate for *queryset* (Postgres), or None when the
+    backend can't tell. Costs one EXPLAIN, whatever the table size.
+    """
+    if connections[queryset.db].vendor != "postgresql":
+        return None
+    plan = json.loads(queryset.order_by().explain(format="json"))
+    return int(plan[0]["Plan"]["Plan Rows"])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Exact count for small results, planner estimate for big ones."""
+
+    EXACT_BELOW = 10_000
+
+    @cached_property
+    def count(self):
+        estimate = estimated_count(self.object_list)
+        if estimate is None or estimate < self.EXACT_BELOW:
+            return super().count
+        return estimate
+
+
+# ── Date filter ──────────────────────────────────────────────────────────
+
+
+class MonthFilter(admin.SimpleListFilter):
+    """
+    ?month=2025 or ?month=2025-05 – a date range, so the list only reads
+    those month partitions. Lists every year from the first to the last
+    date, and the months of the chosen year.
+    """
+
+    title = "date"
+    parameter_name = "month"
+
+    def span(self, model_admin):
+        # two index probes (MIN / MAX), not a scan of every date
+        span = model_admin.model._default_manager.aggregate(first=Min("date"), last=Max("date"))
+        return span["first"], span["last"]
+
+    def lookups(self, request, model_admin):
+        first, last = self.span(model_admin)
+        if first is None:
+            return []
+        choices = []
+        chosen = (self.value() or "")[:4]
+        for year in range(last.year, first.year - 1, -1):
+            choices.append((str(year), str(year)))
+            if str(year) == chosen:
+                for month in range(12, 0, -1):
+                    start = date(year, month, 1)
+                    if month_start(first) <= start <= last:
+                        choices.append((f"{start:%Y-%m}", f"– {start:%B}"))
+        return choices
+
+    def queryset(self, request, queryset):
+        value = self.value()
+        if not value:
+            return queryset
+        try:
+            if len(value) == 4:
+                start = date(int(value), 1, 1)
+                end = date(start.year + 1, 1, 1)
+            else:
+                start = date.fromisoformat(f"{value}-01")
+                end = add_months(start, 1)
+        except ValueError:
+            raise IncorrectLookupParameters(f"month must be YYYY or YYYY-MM, not {value!r}")
+        return queryset.filter(date__gte=start, date__lt=end)
+
+
+class LargeTableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False      # skip the second, unfiltered COUNT(*)
+    ordering = ("-date", "-id")
+
+    def get_actions(self, request):
+        # replaced by the set-based actions below
+        actions = super().get_actions(request)
+        actions.pop("delete_selected", None)
+        return actions
+
+
+# ── Small lookup tables ──────────────────────────────────────────────────
+
+
+@admin.register(Position)
+class PositionAdmin(admin.ModelAdmin):
+    list_display = ("name", "id")
+    search_fields = ("name",)           # needed by the autocomplete widgets
+
+
+@admin.register(Worker)
+class WorkerAdmin(admin.ModelAdmin):
+    list_display = ("name", "position", "assignments_link")
+    list_select_related = ("position",)
+    list_filter = ("position",)
+    search_fields = ("name",)
+    autocomplete_fields = ("position",)
+
+    @admin.display(description="Assignments")
+    def assignments_link(self, worker):
+        # filters on worker_id (and the live generation) – served by
+        # assignment_worker_gen_idx
+        url = reverse("admin:myapp_assignment_changelist")
+        return format_html('<a href="{}?worker__id__exact={}">view</a>', url, worker.pk)
+
+
+# ── Big, partitioned tables ──────────────────────────────────────────────
+
+
+@admin.register(Task)
+class TaskAdmin(LargeTableAdmin):
+    list_display = ("id", "date", "position", "duration")
+    list_filter = (MonthFilter, "position")      # task_position_date_idx
+    search_fields = ("=id",)             # exact id only – no LIKE over millions of rows
+    autocomplete_fields = ("position",)
+    actions = ("unassign", "delete_set_based")
+
+    def get_queryset(self, request):
+        # not just list_select_related: autocomplete and the delete page
+        # render Task.__str__ too
+        return super().get_queryset(request).select_related("position")
+
+    def can_delete_assignments(self, request):
+        return request.user.has_perm("myapp.delete_assignment")
+
+    def has_unassign_permission(self, request):
+        return self.has_change_permission(request) and self.can_delete_assignments(request)
+
+    def has_delete_with_assignments_permission(self, request):
+        return self.has_delete_permission(request) and self.can_delete_assignments(request)
+
+    @admin.action(permissions=["unassign"], description="Unassign selected tasks")
+    def unassign(self, request, queryset):
+        n = unassign_tasks(queryset)
+        self.message_user(request, f"Removed {n} assignment(s).", messages.SUCCESS)
+
+    @admin.action(permissions=["delete_with_assignments"],
+                  description="Delete selected tasks and their assignments")
+    def delete_set_based(self, request, queryset):
+        n = delete_tasks(queryset)
+        self.message_user(request, f"Deleted {n} task(s).", messages.SUCCESS)
+
+
+@admin.register(Assignment)
+class AssignmentAdmin(LargeTableAdmin):
+    list_display = ("id", "date", "task", "worker")
+    list_select_related = ("task__position", "worker")
+    list_filter = (MonthFilter, "task__position")
+    search_fields = ("=task__id",)       # task_id index; workers: see WorkerAdmin link
+    autocomplete_fields = ("task", "worker")
+    readonly_fields = ("date",)          # copied from the task by myapp/signals.py
+    exclude = ("generation",)            # always the live one here (myapp/generations.py)
+    actions = ("delete_set_based",)
+
+    @admin.action(permissions=["delete"], description="Delete selected assignments")
+    def delete_set_based(self, request, queryset):
+        n = delete_assignments(queryset)
+        self.message_user(request, f"Deleted {n} assignment(s).", messages.SUCCESS)
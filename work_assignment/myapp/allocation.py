@@ -0,0 +1,150 @@
+"""
+myapp/allocation.py
+
+The auto-allocator behind `python manage.py auto_assign_tasks`, split into
+pieces that can be reused and cached.
+
+A *shard* is one (date, position) bucket: the tasks of that position on
+that date and the workers who can take them. Workers belong to a single
+position, so shards never compete for the same hours and can be solved
+independently – and, when nothing in them changed since the last run,
+not solved at all (myapp/shard_cache.py).
+
+    load_shards()   → every shard, streamed in (date, position) order
+    make_plan()     → solve (or look up) each shard
+    write_plan()    → publish the plan as the new assignment set
+                      (staged, then switched to – myapp/generations.py)
+
+Tasks without a position are never auto-assigned.
+"""
+
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import groupby, islice
+from typing import Iterable, Iterator, List, Optional, Tuple
+
+from . import generations
+from .models import MAX_HOURS_PER_DAY, Task, Worker
+
+# Bump whenever fill_up() changes behaviour – cached solutions of older
+# versions then simply stop matching.
+SOLVER_VERSION = "fill-up/1"
+
+LOOKUP_CHUNK = 1000        # shards per cache round-trip
+
+
+@dataclass
+class Shard:
+    date: date
+    position_id: int
+    tasks: List[Tuple[int, int]]     # (task id, duration), longest first
+    workers: List[int]               # worker ids, in fill order
+
+
+@dataclass
+class Plan:
+    assignments: List[Tuple[int, int, date]] = field(default_factory=list)   # (task, worker, date)
+    placed: int = 0
+    unplaced: int = 0
+    cache_hits: int = 0
+    cache_misses: int = 0
+    # global mode only (myapp/global_allocation.py)
+    overflow: int = 0                          # tasks placed on the no-position pool
+    heuristic_unplaced: Optional[int] = None   # what the shard heuristic leaves unplaced
+    over_budget_days: int = 0                  # dates left to the heuristic by the time budget
+    # set by write_plan(): assignments made by hand while the run worked
+    late_carried: int = 0
+    late_dropped: int = 0
+
+
+def load_shards(start: Optional[date] = None, end: Optional[date] = None) -> Iterator[Shard]:
+    """
+    Two queries, however many shards: all workers, then all tasks streamed.
+    *start* / *end* (inclusive) limit the dates.
+    """
+    workers = {}
+    for pk, position_id in (
+        Worker.objects.filter(position__isnull=False)
+        .order_by("id")
+        .values_list("id", "position_id")
+    ):
+        workers.setdefault(position_id, []).append(pk)
+
+    tasks = Task.objects.filter(position__isnull=False)
+    if start:
+        tasks = tasks.filter(date__gte=start)
+    if end:
+        tasks = tasks.filter(date__lte=end)
+    rows = (
+        tasks.order_by("date", "position_id", "-duration", "id")
+        .values_list("date", "position_id", "id", "duration")
+        .iterator(chunk_size=10000)
+    )
+    for (day, position_id), group in groupby(rows, key=lambda r: (r[0], r[1])):
+        yield Shard(
+            date=day,
+            position_id=position_id,
+            tasks=[(pk, duration) for _, _, pk, duration in group],
+            workers=workers.get(position_id, []),
+        )
+
+
+def fill_up(shard: Shard, capacity: int = MAX_HOURS_PER_DAY) -> List[Tuple[int, int]]:
+    """
+    “Fill-up-one-worker-before-using-next”: longest task first, onto the
+    first worker with room. Returns [(task id, worker id), …]; tasks left
+    out are unplaced.
+    """
+    hours = dict.fromkeys(shard.workers, 0)
+    placed = []
+    for task_id, duration in shard.tasks:
+        for w in shard.workers:
+            if hours[w] + duration <= capacity:
+                hours[w] += duration
+                placed.append((task_id, w))
+                break
+    return placed
+
+
+def make_plan(shards: Iterable[Shard], cache=None, capacity: int = MAX_HOURS_PER_DAY) -> Plan:
+    """
+    Solve every shard. With a ShardCache, shards whose inputs are unchanged
+    reuse the stored solution and only the rest are solved (and stored).
+    """
+    plan = Plan()
+    shards = iter(shards)
+    while chunk := list(islice(shards, LOOKUP_CHUNK)):
+        if cache is not None:
+            keys = [cache.fingerprint(s, capacity, SOLVER_VERSION) for s in chunk]
+            known = cache.get_many(keys)
+        else:
+            keys, known = [None] * len(chunk), {}
+
+        for shard, key in zip(chunk, keys):
+            solution = known.get(key)
+            if solution is None:
+                solution = fill_up(shard, capacity)
+                if cache is not None:
+                    cache.put(key, solution)
+            plan.assignments += [(t, w, shard.date) for t, w in solution]
+            plan.placed += len(solution)
+            plan.unplaced += len(shard.tasks) - len(solution)
+
+    if cache is not None:
+        cache.flush()
+        plan.cache_hits, plan.cache_misses = cache.hits, cache.misses
+    return plan
+
+
+def write_plan(plan: Plan, seen_upto: Optional[int] = None) -> int:
+    """
+    Replace every assignment with *plan*: bulk INSERTs into a staging
+    generation, then one atomic switch. *seen_upto* is generations.high_water()
+    from before the plan's data was read – assignments added after it are
+    kept (see generations.publish()). Returns the generation id; the
+    replaced rows stay until generations.prune().
+    """
+    generation = generations.stage(plan.assignments, seen_upto)
+    switch = generations.publish(generation)
+    plan.late_carried, plan.late_dropped = switch.carried, switch.dropped
+    return generation
@@ -0,0 +1,188 @@
+"""
+myapp/api.py
+
+Every DRF endpoint of the app. myapp/urls.py loads this module lazily, on
+the first request that needs it, so management commands and fresh workers
+don't pay for importing rest_framework.
+
+Summary table
+    /api/new_table/                  → the table JSON of /api/table/ via DRF
+
+Drill-down – "what is behind this cell of the summary table?"
+
+    /api/workers/<id>/assignments/   → a worker's assignments
+    /api/positions/<id>/tasks/       → a position's tasks (+ who does them)
+
+Both take optional ?start=YYYY-MM-DD&end=YYYY-MM-DD and are paged with
+KeysetPagination (?cursor=…&limit=…), oldest first. Every page is one
+index range scan on (owner, date, id) joined to its related rows, so a
+worker with years of history pages as fast at the end as at the start.
+
+Batch writes
+    POST /api/assignments/batch/    → create / delete many assignments at
+                                      once, all or nothing (myapp/batch.py)
+
+What-if scenarios
+    POST /api/scenarios/compare/    → KPIs of the current plan, a re-run
+                                      and every scenario, side by side
+                                      (myapp/scenarios.py; writes nothing)
+"""
+
+from datetime import date
+
+from django.db.models import Prefetch
+from django.shortcuts import get_object_or_404
+from rest_framework import status
+from rest_framework.exceptions import ValidationError
+from rest_framework.generics import ListAPIView
+from rest_framework.permissions import BasePermission
+from rest_framework.response import Response
+from rest_framework.views import APIView
+
+from .batch import BatchError, apply_batch
+from .models import Assignment, Position, Task, Worker
+from .pagination import KeysetPagination
+from .scenarios import Scenario, compare, load_base
+from .serializers import (
+    AssignmentBatchSerializer,
+    AssignmentSerializer,
+    ScenarioCompareSerializer,
+    TaskSerializer,
+)
+from .views import in_span, table_data, table_params
+
+
+class DrillDownAPI(ListAPIView):
+    """Shared plumbing: no auth (like /api/new_table/), keyset pages, date span."""
+    authentication_classes = []
+    permission_classes = []
+    pagination_class = KeysetPagination
+
+    def date_span(self):
+        span = []
+        for key in ("start", "end"):
+            raw = self.request.query_params.get(key)
+            try:
+                span.append(date.fromisoformat(raw) if raw else None)
+            except ValueError:
+                raise ValidationError({key: "Must be a YYYY-MM-DD date."})
+        return span
+
+
+class WorkerAssignmentsAPI(DrillDownAPI):
+    serializer_class = AssignmentSerializer
+
+    def get_queryset(self):
+        worker = get_object_or_404(Worker, pk=self.kwargs["pk"])
+        start, end = self.date_span()
+        qs = in_span(Assignment.objects.filter(worker=worker), "date", start, end)
+        # same bounds on the task side let Postgres prune Task partitions too
+        qs = in_span(qs, "task__date", start, end)
+        return qs.select_related("task__position", "worker")
+
+
+class PositionTasksAPI(DrillDownAPI):
+    serializer_class = TaskSerializer
+
+    def get_queryset(self):
+        position = get_object_or_404(Position, pk=self.kwargs["pk"])
+        start, end = self.date_span()
+        return (
+            in_span(Task.objects.filter(position=position), "date", start, end)
+            .select_related("position")
+            # one extra query per *page* (not per task) for the workers
+            .prefetch_related(
+                Prefetch("assignments", queryset=Assignment.objects.select_related("worker"))
+            )
+        )
+
+
+# ── Summary table ────────────────────────────────────────────────────────
+
+
+class TableAPI(APIView):
+    authentication_classes = []
+    permission_classes = []
+
+    def get(self, request):
+        try:
+            params = table_params(request)
+        except ValueError as exc:
+            return Response({"error": str(exc)}, status=400)
+        cols, data = table_data(**params)
+        return Response(data)
+
+
+# ── Batch writes ─────────────────────────────────────────────────────────
+
+
+class CanEditAssignments(BasePermission):
+    """Writes need the same model permissions as the admin would ask for."""
+
+    def has_permission(self, request, view):
+        return request.user.has_perms(["myapp.add_assignment", "myapp.delete_assignment"])
+
+
+class AssignmentBatchAPI(APIView):
+    """
+    POST {"create": [{"task": 1, "worker": 2}, …], "delete": [17, …]}
+
+    201 → {"created": [new ids…], "deleted": n}
+    400 → {"errors": [{"op": "create", "index": 3, "message": "…"}, …]}
+          (nothing was written; malformed bodies get DRF's usual field errors)
+    """
+    permission_classes = [CanEditAssignments]
+
+    def post(self, request):
+        body = AssignmentBatchSerializer(data=request.data)
+        body.is_valid(raise_exception=True)
+
+        try:
+            result = apply_batch(
+                [(c["task"], c["worker"]) for c in body.validated_data["create"]],
+                body.validated_data["delete"],
+            )
+        except BatchError as exc:
+            return Response({"errors": exc.errors}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(
+            {"created": result.created, "deleted": result.deleted},
+            status=status.HTTP_201_CREATED,
+        )
+
+
+# ── What-if scenarios ────────────────────────────────────────────────────
+
+
+class CanRunScenarios(BasePermission):
+    """Comparisons are expensive – only for users granted myapp.run_scenarios."""
+
+    def has_permission(self, request, view):
+        return request.user.has_perm("myapp.run_scenarios")
+
+
+class ScenarioCompareAPI(APIView):
+    """
+    POST {"start": "2025-04-01", "end": "2025-04-30",
+          "scenarios": [{"name": "2 more nurses", "hire": {"3": 2}},
+                        {"name": "cap 7h", "capacity": 7}, …]}
+
+    200 → {"scenarios": [{"name": "current", "placed": …, "unplaced": …,
+                          "utilisation": …, "fairness": …},
+                         {"name": "baseline", …}, {"name": "2 more nurses", …}, …]}
+
+    Each scenario is a full allocation run over start–end (at most
+    MAX_SPAN_DAYS), solved one after the other in this process – no
+    forking a web worker. At most MAX_SCENARIOS per request.
+    """
+    permission_classes = [CanRunScenarios]
+
+    def post(self, request):
+        body = ScenarioCompareSerializer(data=request.data)
+        body.is_valid(raise_exception=True)
+        data = body.validated_data
+        results = compare(
+            [Scenario.from_dict(s) for s in data["scenarios"]],
+            load_base(data["start"], data["end"]),
+            processes=1,
+        )
+        return Response({"scenarios": [kpis.as_dict() for kpis in results]})
@@ -0,0 +1,221 @@
+"""
+myapp/batch.py
+
+Apply thousands of assignment creates / deletes in one go, all or nothing.
+
+Validation is set-based – the cost is a handful of queries no matter how
+big the batch is:
+
+    1 query   the assignments being deleted     (exists? whose? when?)
+    1 query   lock + fetch the workers involved (serialises concurrent batches)
+    1 query   the tasks being assigned          (exists? date? duration?)
+    1 query   task/worker pairs already assigned
+    1 query   current hours for every affected (worker, date)   ← the cap
+
+Then, if nothing failed: one DELETE and a bulk INSERT. Any failing item
+rolls the whole batch back and every problem is reported with its index.
+
+The set-based deletes at the bottom are shared with the admin actions:
+QuerySet.delete() would load every row into the collector (Assignment has
+delete signals), which is hopeless for "select all 2 million".
+"""
+
+from collections import Counter, defaultdict
+from dataclasses import dataclass, field
+from typing import Dict, List, Sequence, Tuple
+
+from django.db import connections, transaction
+from django.db.models import Sum
+
+from . import generations, rollups
+from .models import MAX_HOURS_PER_DAY, Assignment, Task, Worker
+
+
+@dataclass
+class BatchResult:
+    created: List[int] = field(default_factory=list)   # new Assignment ids, in input order
+    deleted: int = 0
+
+
+class BatchError(Exception):
+    """Raised with every per-item problem; nothing has been written."""
+
+    def __init__(self, errors: List[Dict[str, object]]):
+        super().__init__(f"{len(errors)} invalid item(s)")
+        self.errors = errors
+
+
+def apply_batch(creates: Sequence[Tuple[int, int]], deletes: Sequence[int]) -> BatchResult:
+    """
+    *creates* is [(task_id, worker_id), …], *deletes* is [assignment_id, …].
+
+    Returns what was written, or raises BatchError listing every item that
+    is invalid or would push a worker past MAX_HOURS_PER_DAY.
+    """
+    errors = []
+
+    def fail(op, index, message):
+        errors.append({"op": op, "index": index, "message": message})
+
+    with transaction.atomic(), rollups.deferred():
+        # first: a publish() can't switch sets under the checks below
+        generation = generations.join_live()
+        doomed = {
+            a["id"]: a
+            for a in Assignment.objects.filter(id__in=set(deletes))
+            .values("id", "worker_id", "date", "task__duration")
+        }
+        worker_ids = {w for _, w in creates} | {a["worker_id"] for a in doomed.values()}
+
+        # lock the workers first so two batches can't both squeeze into the
+        # same worker's last free hours; id order avoids deadlocks
+        existing_workers = set(
+            Worker.objects.select_for_update()
+            .filter(id__in=worker_ids)
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+        tasks = {
+            t["id"]: t
+            for t in Task.objects.filter(id__in={t for t, _ in creates})
+            .values("id", "date", "duration")
+        }
+        already = set(
+            Assignment.objects.filter(
+                task_id__in=tasks.keys(), worker_id__in=existing_workers,
+            )
+            .exclude(id__in=doomed.keys())
+            .values_list("task_id", "worker_id")
+        )
+
+        # 1. item-level checks ------------------------------------------------
+        delta = defaultdict(int)          # (worker, date) → hours added by the batch
+        pair_items = defaultdict(list)    # (worker, date) → create indexes
+        seen = Counter(creates)
+        for i, (task_id, worker_id) in enumerate(creates):
+            task = tasks.get(task_id)
+            if task is None:
+                fail("create", i, f"Task {task_id} does not exist.")
+            elif worker_id not in existing_workers:
+                fail("create", i, f"Worker {worker_id} does not exist.")
+            elif (task_id, worker_id) in already or seen[(task_id, worker_id)] > 1:
+                fail("create", i, f"Task {task_id} is already assigned to worker {worker_id}.")
+            else:
+                key = (worker_id, task["date"])
+                delta[key] += task["duration"]
+                pair_items[key].append(i)
+
+        listed = Counter(deletes)
+        for i, pk in enumerate(deletes):
+            a = doomed.get(pk)
+            if a is None:
+                fail("delete", i, f"Assignment {pk} does not exist.")
+            elif listed[pk] > 1:
+                fail("delete", i, f"Assignment {pk} is listed more than once.")
+            else:
+                delta[(a["worker_id"], a["date"])] -= a["task__duration"]
+
+        # 2. the daily cap, for every touched (worker, date) at once ----------
+        if pair_items:
+            days = {d for _, d in pair_items}
+            current = {
+                (r["worker_id"], r["date"]): r["hours"]
+                for r in Assignment.objects.filter(
+                    worker_id__in={w for w, _ in pair_items},
+                    date__in=days,
+                    task__date__in=days,         # prunes Task partitions too
+                )
+                .values("worker_id", "date")
+                .annotate(hours=Sum("task__duration"))
+            }
+            for key, indexes in pair_items.items():
+                total = current.get(key, 0) + delta[key]
+                if total > MAX_HOURS_PER_DAY:
+                    worker_id, day = key
+                    for i in indexes:
+                        fail("create", i, (
+                            f"Worker {worker_id} would have {total} h on {day} "
+                            f"(max {MAX_HOURS_PER_DAY})."
+                        ))
+
+        if errors:
+            raise BatchError(sorted(errors, key=lambda e: (e["op"], e["index"])))
+
+        # 3. write --------------------------------------------------------------
+        result = BatchResult()
+        if doomed:
+            result.deleted = delete_rows(Assignment.objects.filter(id__in=doomed.keys()))
+        new = Assignment.objects.bulk_create(
+            [
+                # bulk_create skips signals: set the partition key and
+                # generation ourselves
+                Assignment(task_id=t, worker_id=w, date=tasks[t]["date"], generation=generation)
+                for t, w in creates
+            ],
+            batch_size=1000,
+        )
+        result.created = [a.pk for a in new]
+
+        rollups.mark_cells(*worker_cells(delta))
+    return result
+
+
+def worker_cells(pairs):
+    """Rollup cells behind (worker, date) *pairs*: the worker's and Unassigned."""
+    cells = set()
+    for worker_id, day in pairs:
+        cells |= {(day, rollups.WORKER, worker_id), (day, rollups.UNASSIGNED, None)}
+    return cells
+
+
+# ── Set-based deletes ────────────────────────────────────────────────────
+
+
+def delete_rows(queryset) -> int:
+    """
+    DELETE … WHERE id IN (<queryset>) in one statement: no collector, no
+    signals, no cascades. Callers refresh rollups themselves.
+    """
+    model = queryset.model
+    qn = connections[queryset.db].ops.quote_name
+    sql, params = queryset.order_by().values("pk").query.sql_with_params()
+    with connections[queryset.db].cursor() as cursor:
+        cursor.execute(
+            f"DELETE FROM {qn(model._meta.db_table)} WHERE {qn(model._meta.pk.column)} IN ({sql})",
+            params,
+        )
+        return cursor.rowcount
+
+
+@transaction.atomic
+def delete_assignments(queryset) -> int:
+    pairs = queryset.order_by().values_list("worker_id", "date").distinct()
+    cells = worker_cells(pairs)
+    deleted = delete_rows(queryset)
+    rollups.mark_cells(*cells)
+    return deleted
+
+
+def unassign_tasks(tasks) -> int:
+    """Remove every assignment of *tasks* (a Task queryset)."""
+    return delete_assignments(Assignment.objects.filter(task__in=tasks.order_by().values("pk")))
+
+
+@transaction.atomic
+def delete_tasks(tasks) -> int:
+    """
+    Delete *tasks* (a Task queryset) and their assignments. Assignments go
+    first and explicitly – the task FK is only enforced on Postgres – so
+    *tasks* must not filter on assignments itself.
+    """
+    task_ids = tasks.order_by().values("pk")
+    cells = worker_cells(
+        Assignment.objects.filter(task__in=task_ids).values_list("worker_id", "date").distinct()
+    )
+    for position_id, day in tasks.order_by().values_list("position_id", "date").distinct():
+        cells |= {(day, rollups.POSITION, position_id), (day, rollups.UNASSIGNED, None)}
+    # staged / retired rows too – the composite FK knows no generations
+    delete_rows(Assignment.all_generations.filter(task__in=task_ids))
+    deleted = delete_rows(tasks)
+    rollups.mark_cells(*cells)
+    return deleted
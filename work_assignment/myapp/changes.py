@@ -0,0 +1,108 @@
+"""
+myapp/changes.py
+
+Change feed behind the live summary table (/api/table/changes/).
+
+Write side
+──────────
+rollups.refresh_days() already knows every cell it rewrites, so it hands
+the before / after values to `publish()`. Only cells whose value really
+moved are kept, and they are appended to CellChange *after* the surrounding
+transaction commits – a rolled-back write never reaches a browser, and an
+`auto_assign_tasks` run shows up as one burst when it finishes.
+
+Clients resume from the highest id they have seen, so ids must become
+visible in order. Sequences don't promise that: a big insert that started
+first could commit after a small one with higher ids, and a reader moving
+past those would never see the big one. On Postgres, `record()` therefore
+holds an advisory lock from its first insert to its commit – appends run
+one at a time, and every committed id is below every id still to come.
+
+Read side
+─────────
+`read(cursor)` returns what happened after a cursor (a CellChange id),
+coalesced so a cell that changed five times in the window is sent once
+with its latest value. Rows younger than WINDOW are held back, so bursts
+go out together.
+"""
+
+from datetime import timedelta
+from functools import partial
+from typing import Dict, List, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Max
+from django.db.models.functions import Now
+
+from .models import CellChange
+
+# (granularity, period, kind, ref_id)
+CellKey = Tuple[str, object, str, Optional[int]]
+
+WINDOW = timedelta(seconds=1)        # batching / settle window
+RETENTION = timedelta(hours=1)       # how far back a reconnecting client can resume
+MAX_BATCH = 5000                     # cells per read – the rest comes next time
+APPEND_LOCK = (0x63686E67, 0)        # "chng" – pg_advisory_xact_lock(int, int)
+
+
+def cell_order(key: CellKey):
+    """Sort key for cells – ref_id may be None (no position / unassigned)."""
+    granularity, period, kind, ref_id = key
+    return granularity, period, kind, ref_id is not None, ref_id or 0
+
+
+def publish(before: Dict[CellKey, int], after: Dict[CellKey, int]) -> None:
+    """Queue the cells that differ between *before* and *after* for the feed."""
+    # sorted, so the rows (and cursors) of a write come out the same every time
+    changed = [
+        (key, after.get(key, 0))
+        for key in sorted(before.keys() | after.keys(), key=cell_order)
+        if before.get(key, 0) != after.get(key, 0)
+    ]
+    if changed:
+        transaction.on_commit(partial(record, changed))
+
+
+@transaction.atomic
+def record(changed: List[Tuple[CellKey, int]]) -> None:
+    if connection.vendor == "postgresql":
+        # ids in commit order – see above (SQLite: one writer at a time anyway)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", APPEND_LOCK)
+    CellChange.objects.bulk_create(
+        [
+            CellChange(granularity=g, period=p, kind=k, ref_id=r, hours=hours)
+            for (g, p, k, r), hours in changed
+        ],
+        batch_size=1000,
+    )
+    CellChange.objects.filter(created_at__lt=Now() - RETENTION).delete()
+
+
+def latest_cursor() -> int:
+    """Cursor that means "from now on" for a client starting fresh."""
+    return CellChange.objects.aggregate(last=Max("id"))["last"] or 0
+
+
+def read(cursor: int, granularity: str):
+    """
+    Settled changes after *cursor* for one granularity.
+
+    Returns (new cursor, [(kind, ref_id, period, hours), …]) with one entry
+    per cell, oldest change first.
+    """
+    rows = (
+        CellChange.objects.filter(
+            id__gt=cursor,
+            granularity=granularity,
+            created_at__lte=Now() - WINDOW,
+        )
+        .order_by("id")
+        .values_list("id", "kind", "ref_id", "period", "hours")[:MAX_BATCH]
+    )
+
+    cells = {}
+    for pk, kind, ref_id, period, hours in rows:
+        cells[(kind, ref_id, period)] = hours      # later rows win
+        cursor = pk
+    return cursor, [(*key, hours) for key, hours in cells.items()]
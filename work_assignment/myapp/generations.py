@@ -0,0 +1,221 @@
+"""
+myapp/generations.py
+
+Blue/green assignment sets for allocation runs.
+
+Every Assignment row carries a generation (an AssignmentGeneration id). The
+app only ever sees the *live* one – Assignment.objects filters on it – so
+a run can build a complete new set next to the old one and switch over in
+one go:
+
+    high_water()     before the run reads its data: the highest Assignment
+                     id so far.
+    stage(rows)      one transaction: a STAGING generation + bulk INSERTs.
+                     Nobody reads it yet, so table reads carry on untouched.
+    publish(gen)     one short transaction: carry over what was added to
+                     the live set since high_water(), then flip the pointer
+                     (old ACTIVE → RETIRED, gen → ACTIVE). Readers see the
+                     old set or the new one, never a mix, and never wait
+                     for a DELETE. The rollup cells of the workers and
+                     dates whose assignments changed catch up right after,
+                     a month per transaction.
+    prune()          afterwards, in one transaction per month: raw DELETEs
+                     of every row no longer live (no ORM collector, no
+                     signals), then the retired generation rows.
+
+Writes during a run
+───────────────────
+Single saves and the batch API keep writing to the live set while a run
+is under way. Those rows are not lost at the switch: publish() copies them
+into the new set, except where they would push a worker past
+MAX_HOURS_PER_DAY there, and reports both counts.
+
+On Postgres, writers hold a shared advisory lock from reading the live id
+(join_live()) until they commit, and publish() and high_water() take it
+exclusively. A write therefore lands wholly before the switch, and is
+carried over, or wholly after it, in the new set. SQLite has one writer
+at a time anyway.
+
+Generation 0 is what rows get by default; it is live until the first
+publish. A staged generation that was never published (the run died) is
+retired by prune() once it is older than STALE_STAGING.
+"""
+
+from collections import defaultdict
+from datetime import date, timedelta
+from itertools import groupby
+from typing import Iterable, NamedTuple, Optional, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Count, Max, Min, Sum
+from django.utils import timezone
+
+from . import batch, rollups
+from .models import MAX_HOURS_PER_DAY, Assignment, AssignmentGeneration
+from .partitions import add_months, month_start, months_between
+
+STAGING, ACTIVE, RETIRED = (
+    AssignmentGeneration.STAGING, AssignmentGeneration.ACTIVE, AssignmentGeneration.RETIRED,
+)
+
+STALE_STAGING = timedelta(hours=6)     # far longer than any allocation run
+
+WRITE_LOCK = (0x67656E73, 0)           # "gens" – pg_advisory_xact_lock(int, int)
+
+
+class Switch(NamedTuple):
+    carried: int         # rows written during the run, copied into the new set
+    dropped: int         # … and those that would have broken the daily cap there
+
+
+def lock_writes(exclusive: bool) -> None:
+    """Take the writers' lock until the end of the transaction (Postgres only)."""
+    if connection.vendor != "postgresql":
+        return
+    function = "pg_advisory_xact_lock" if exclusive else "pg_advisory_xact_lock_shared"
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT {function}(%s, %s)", WRITE_LOCK)
+
+
+def live_id() -> int:
+    """Id of the live generation (0 before the first publish)."""
+    return (
+        AssignmentGeneration.objects.filter(state=ACTIVE)
+        .order_by("-id")
+        .values_list("id", flat=True)
+        .first()
+    ) or 0
+
+
+def join_live() -> int:
+    """
+    live_id() for a writer: publish() waits until the caller's transaction
+    has committed, so the row can't land in a set that is being retired.
+    """
+    assert connection.in_atomic_block, "join_live() needs a transaction"
+    lock_writes(exclusive=False)
+    return live_id()
+
+
+@transaction.atomic
+def high_water() -> int:
+    """Highest Assignment id, once every write in flight has committed."""
+    lock_writes(exclusive=True)
+    return Assignment.all_generations.aggregate(top=Max("id"))["top"] or 0
+
+
+def stage(rows: Iterable[Tuple[int, int, date]], seen_upto: Optional[int] = None) -> int:
+    """
+    Write [(task, worker, date), …] as a new, unpublished generation and
+    return its id. *seen_upto* is high_water() from before the rows were
+    worked out (default: now).
+    """
+    if seen_upto is None:
+        seen_upto = high_water()         # own transaction – writers wait only briefly
+    with transaction.atomic():
+        generation = AssignmentGeneration.objects.create(state=STAGING, seen_upto=seen_upto)
+        Assignment.all_generations.bulk_create(
+            (Assignment(task_id=t, worker_id=w, date=d, generation=generation.pk) for t, w, d in rows),
+            batch_size=5000,
+        )
+    return generation.pk
+
+
+def publish(generation: int) -> Switch:
+    """Make staged *generation* the live assignment set."""
+    with transaction.atomic():
+        lock_writes(exclusive=True)
+        # Lock every generation row (there are only a few): concurrent
+        # publishes queue up here instead of both going ACTIVE.
+        states = dict(
+            AssignmentGeneration.objects.select_for_update()
+            .order_by("id")
+            .values_list("id", "state")
+        )
+        if states.get(generation) != STAGING:
+            raise ValueError(f"Generation {generation} is {states.get(generation, 'gone')}, not staging")
+
+        old = live_id()
+        switch = carry_over(old, AssignmentGeneration.objects.get(pk=generation))
+        AssignmentGeneration.objects.filter(state=ACTIVE).update(state=RETIRED)
+        AssignmentGeneration.objects.filter(pk=generation).update(
+            state=ACTIVE, published_at=timezone.now(),
+        )
+
+    # outside the switch, so it doesn't hold locks for the whole history
+    refresh_rollups(old, generation)
+    return switch
+
+
+def carry_over(old: int, new: AssignmentGeneration) -> Switch:
+    """Copy rows added to the *old* set since *new* was worked out into *new*."""
+    late = list(
+        Assignment.all_generations.filter(generation=old, id__gt=new.seen_upto)
+        .order_by("id")
+        .values_list("task_id", "worker_id", "date", "task__duration")
+    )
+    if not late:
+        return Switch(0, 0)
+
+    target = Assignment.all_generations.filter(generation=new.pk)
+    present = set(
+        target.filter(task_id__in={t for t, *_ in late}).values_list("task_id", "worker_id")
+    )
+    days = {d for *_, d, _ in late}
+    hours = defaultdict(int, {
+        (r["worker_id"], r["date"]): r["hours"]
+        for r in target.filter(worker_id__in={w for _, w, *_ in late}, date__in=days, task__date__in=days)
+        .values("worker_id", "date")
+        .annotate(hours=Sum("task__duration"))
+    })
+
+    kept, dropped = [], 0
+    for task, worker, day, duration in late:
+        if (task, worker) in present:
+            continue                                 # the run made the same call
+        if hours[worker, day] + duration > MAX_HOURS_PER_DAY:
+            dropped += 1
+            continue
+        hours[worker, day] += duration
+        present.add((task, worker))
+        kept.append(Assignment(task_id=task, worker_id=worker, date=day, generation=new.pk))
+    Assignment.all_generations.bulk_create(kept, batch_size=1000)
+    return Switch(len(kept), dropped)
+
+
+def refresh_rollups(old: int, new: int) -> None:
+    """Refresh the cells of (worker, date)s whose (task, worker) pairs differ between two sets."""
+    changed = sorted(
+        Assignment.all_generations.filter(generation__in=(old, new))
+        .values("date", "task_id", "worker_id")
+        .annotate(sets=Count("id"))
+        .filter(sets=1)                              # in one set only
+        .values_list("date", "worker_id")
+        .distinct()
+    )
+    for _, pairs in groupby(changed, key=lambda pair: month_start(pair[0])):
+        # one transaction each
+        rollups.refresh_cells(batch.worker_cells((worker, day) for day, worker in pairs))
+
+
+def prune(stale_after: timedelta = STALE_STAGING) -> int:
+    """Delete every assignment that is neither live nor still being staged. Returns #rows."""
+    with transaction.atomic():
+        list(AssignmentGeneration.objects.select_for_update().order_by("id").values_list("id"))
+        AssignmentGeneration.objects.filter(
+            state=STAGING, created_at__lt=timezone.now() - stale_after,
+        ).update(state=RETIRED)
+        keep = {live_id(), *AssignmentGeneration.objects.filter(state=STAGING).values_list("id", flat=True)}
+
+    dead = Assignment.all_generations.exclude(generation__in=keep)
+    span = dead.aggregate(first=Min("date"), last=Max("date"))
+    removed = 0
+    if span["first"] is not None:
+        # a month at a time: each DELETE stays inside one partition and
+        # each transaction stays short
+        for month in months_between(span["first"], span["last"]):
+            with transaction.atomic():
+                removed += batch.delete_rows(dead.filter(date__gte=month, date__lt=add_months(month, 1)))
+
+    AssignmentGeneration.objects.filter(state=RETIRED).exclude(pk__in=keep).delete()
+    return removed
@@ -0,0 +1,386 @@
+"""
+myapp/global_allocation.py
+
+Global allocation mode – `python manage.py auto_assign_tasks --global`.
+
+The default allocator (myapp/allocation.py) solves each (date, position)
+shard on its own: workers without a position – the "(No Position)" pool of
+the table – are never used, and tasks without a position are never
+placed. This mode solves one whole date at a time and lets both take part:
+
+    own workers  – a task's own position, first choice      (cost 0)
+    the pool     – workers without a position, overflow     (cost per hour,
+                   and the only home for position-less tasks  --overflow-cost)
+    unplaced     – UNPLACED_COST per task
+
+Step 1 – min-cost flow. Tasks of one position and duration are
+interchangeable, so a date becomes a small network however many tasks it
+has:
+
+    source ─► (position, duration) ─┬─► own(position) ─► sink   cap = #workers × 8 h
+              supply = n × duration ├─► pool ──────────► sink   cap = #pool × 8 h
+                                    └─► unplaced ──────► sink   UNPLACED_COST / duration per h
+
+Leaving an hour of a short task unplaced costs more than an hour of a long
+one, so scarce hours go to the tasks that place the most tasks per hour.
+The flow is measured in hours, and tasks can't be split across workers.
+It therefore says *how many* tasks of each class go where, not *which*
+worker takes them.
+
+Step 2 – packing. The chosen tasks are packed into their workers best-fit
+decreasing, and the daily cap holds per worker. What doesn't fit moves on:
+own → pool → unplaced. A last pass, shortest first, tries the leftovers in
+any gap still open.
+
+A date where this places fewer tasks than the shard heuristic would keeps
+the heuristic's result, topped up from the pool. Dates still unsolved
+when the --time-budget runs out also fall back to the heuristic, without
+the pool. The budget is checked inside a date too – between flow rounds
+and every CHECK_EVERY packing steps – so one huge date can't overrun it
+by more than a moment (plus the heuristic it falls back to). The plan
+reports both counts, and auto_assign_tasks prints how far the unplaced
+count dropped.
+"""
+
+import heapq
+import time
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import date
+from itertools import count, groupby
+from typing import Dict, Hashable, List, Optional, Sequence, Tuple
+
+from .allocation import Plan, Shard, fill_up
+from .models import MAX_HOURS_PER_DAY, Task, Worker
+
+OVERFLOW_COST = 10             # per hour a position's task spends on a pool worker
+UNPLACED_COST = 1_000_000      # per task left unplaced – keep well above the overflow cost
+TIME_BUDGET = 60.0             # seconds, for the whole run
+CHECK_EVERY = 1024             # packing steps between looks at the clock
+
+
+class OutOfTime(Exception):
+    """The time budget ran out in the middle of a date."""
+
+
+def check(deadline: Optional[float]) -> None:
+    if deadline is not None and time.monotonic() >= deadline:
+        raise OutOfTime
+
+
+# ── Min-cost flow ────────────────────────────────────────────────────────
+
+
+class FlowNetwork:
+    """
+    Primal-dual min-cost flow: Dijkstra (with node potentials – all costs
+    start non-negative) finds the next cheapest cost level, then blocking
+    flows (Dinic) saturate every path of that cost at once. The number of
+    rounds grows with the number of distinct costs, not with the number
+    of tasks or hours.
+    """
+
+    def __init__(self):
+        self.edges = []                    # [to, capacity, cost, reverse edge index]
+        self.out = defaultdict(list)       # node → edge indexes
+        self.rounds = 0                    # work done, for tests and profiling:
+        self.augmentations = 0             # neither grows with the number of tasks
+
+    def add_edge(self, u: Hashable, v: Hashable, capacity: int, cost: int) -> int:
+        self.out[u].append(len(self.edges))
+        self.edges.append([v, capacity, cost, len(self.edges) + 1])
+        self.out[v].append(len(self.edges))
+        self.edges.append([u, 0, -cost, len(self.edges) - 1])
+        return len(self.edges) - 2
+
+    def flow(self, edge: int) -> int:
+        """Flow sent along *edge* (an add_edge() result)."""
+        return self.edges[self.edges[edge][3]][1]
+
+    def solve(self, source: Hashable, sink: Hashable, deadline: Optional[float] = None) -> int:
+        """
+        Push the maximum flow at minimum cost. Returns the total cost;
+        raises OutOfTime once time.monotonic() passes *deadline*.
+        """
+        total = 0
+        potential = defaultdict(int)
+        while True:
+            check(deadline)
+            self.rounds += 1
+            # 1. shortest reduced-cost distances → new potentials
+            dist = {source: 0}
+            heap, tie = [(0, 0, source)], count(1)
+            while heap:
+                d, _, u = heapq.heappop(heap)
+                if d > dist[u]:
+                    continue
+                for i in self.out[u]:
+                    v, capacity, cost, _ = self.edges[i]
+                    nd = d + cost + potential[u] - potential[v]
+                    if capacity and nd < dist.get(v, nd + 1):
+                        dist[v] = nd
+                        heapq.heappush(heap, (nd, next(tie), v))
+            if sink not in dist:
+                return total
+            for node in self.out:
+                # capped at the sink's distance: keeps every reduced cost
+                # non-negative, nodes beyond the sink included
+                potential[node] += min(dist.get(node, dist[sink]), dist[sink])
+
+            # 2. saturate every shortest path (reduced cost 0)
+            pushed = self._blocking_flows(source, sink, potential, deadline)
+            total += pushed * (potential[sink] - potential[source])
+
+    def _admissible(self, u, i, potential):
+        v, capacity, cost, _ = self.edges[i]
+        return capacity and cost + potential[u] - potential[v] == 0
+
+    def _blocking_flows(self, source, sink, potential, deadline) -> int:
+        pushed = 0
+        while True:
+            check(deadline)
+            level = {source: 0}
+            queue = [source]
+            for u in queue:
+                for i in self.out[u]:
+                    v = self.edges[i][0]
+                    if v not in level and self._admissible(u, i, potential):
+                        level[v] = level[u] + 1
+                        queue.append(v)
+            if sink not in level:
+                return pushed
+
+            arc = {u: 0 for u in level}
+            while True:
+                # one augmenting path along increasing levels, iteratively
+                path, u = [], source
+                while u != sink:
+                    edges = self.out[u]
+                    while arc[u] < len(edges):
+                        i = edges[arc[u]]
+                        v = self.edges[i][0]
+                        if level.get(v) == level[u] + 1 and self._admissible(u, i, potential):
+                            break
+                        arc[u] += 1
+                    else:
+                        if not path:
+                            break
+                        # dead end: retreat and skip the edge that led here
+                        i = path.pop()
+                        u = self.edges[self.edges[i][3]][0]
+                        arc[u] += 1
+                        continue
+                    path.append(i)
+                    u = v
+                if u != sink:
+                    break
+                push = min(self.edges[i][1] for i in path)
+                for i in path:
+                    self.edges[i][1] -= push
+                    self.edges[self.edges[i][3]][1] += push
+                pushed += push
+                self.augmentations += 1
+
+
+def unplaced_hour_cost(duration: int) -> int:
+    """Cost of leaving one hour of a *duration*-hour task unplaced."""
+    return -(-UNPLACED_COST // duration)
+
+
+def may_overflow(pos: Optional[int], duration: int, overflow_cost: int) -> bool:
+    """Is a pool worker better than no worker at all? (Same rule as the flow.)"""
+    return pos is None or overflow_cost < unplaced_hour_cost(duration)
+
+
+# ── Packing ──────────────────────────────────────────────────────────────
+
+
+class Bins:
+    """A group of workers' remaining hours on one date, bucketed for best fit."""
+
+    def __init__(self, workers: Sequence[int], capacity: int):
+        self.capacity = capacity
+        self.by_room = [[] for _ in range(capacity + 1)]
+        self.by_room[capacity] = list(reversed(workers))      # pop() = first worker
+
+    def place(self, duration: int) -> Optional[int]:
+        """The worker with the least room that still fits *duration*, or None."""
+        for room in range(duration, self.capacity + 1):
+            if self.by_room[room]:
+                worker = self.by_room[room].pop()
+                self.by_room[room - duration].append(worker)
+                return worker
+        return None
+
+
+@dataclass
+class DayResult:
+    pairs: List[Tuple[int, int]]        # (task, worker)
+    tasks: int
+    overflow: int                       # positioned tasks placed on pool workers
+    heuristic_placed: int
+    flow_rounds: int = 0                # FlowNetwork work counters
+    augmentations: int = 0
+
+
+def heuristic(day: date, tasks, workers, capacity) -> List[Tuple[int, int]]:
+    """What allocation.fill_up() makes of *day* – position by position, no pool."""
+    pairs = []
+    by_position = sorted(
+        ((pos, duration, pk) for pk, pos, duration in tasks if pos is not None),
+        key=lambda t: (t[0], -t[1], t[2]),
+    )
+    for pos, group in groupby(by_position, key=lambda t: t[0]):
+        shard = Shard(day, pos, [(pk, d) for _, d, pk in group], workers.get(pos, []))
+        pairs += fill_up(shard, capacity)
+    return pairs
+
+
+def solve_day(day: date, tasks: Sequence[Tuple[int, Optional[int], int]],
+              workers: Dict[Optional[int], List[int]], capacity: int = MAX_HOURS_PER_DAY,
+              overflow_cost: int = OVERFLOW_COST, deadline: Optional[float] = None) -> DayResult:
+    """
+    *tasks* is [(id, position or None, duration), …] for one date, *workers*
+    {position or None: [worker ids]} with None = the pool. Raises OutOfTime
+    once time.monotonic() passes *deadline*.
+    """
+    classes = defaultdict(list)
+    for pk, pos, duration in sorted(tasks):
+        classes[pos, duration].append(pk)
+    pool_workers = workers.get(None, [])
+    total_hours = sum(duration * len(ids) for (_, duration), ids in classes.items())
+
+    # 1. how many of each class go where
+    net = FlowNetwork()
+    own_edges, pool_edges = {}, {}
+    for pos in {pos for pos, _ in classes}:
+        if pos is not None and workers.get(pos):
+            net.add_edge(("own", pos), "sink", len(workers[pos]) * capacity, 0)
+    net.add_edge("pool", "sink", len(pool_workers) * capacity, 0)
+    for (pos, duration), ids in classes.items():
+        if not 0 < duration <= capacity:
+            continue                     # left to the last pass below
+        node = ("class", pos, duration)
+        net.add_edge("source", node, duration * len(ids), 0)
+        if pos is not None and workers.get(pos):
+            own_edges[pos, duration] = net.add_edge(node, ("own", pos), total_hours, 0)
+        if pool_workers:
+            cost = 0 if pos is None else overflow_cost
+            pool_edges[pos, duration] = net.add_edge(node, "pool", total_hours, cost)
+        net.add_edge(node, "sink", total_hours, unplaced_hour_cost(duration))
+    net.solve("source", "sink", deadline)
+
+    # 2. which worker takes which task
+    own_bins = {pos: Bins(ws, capacity) for pos, ws in workers.items() if pos is not None}
+    pool_bins = Bins(pool_workers, capacity)
+    to_own, to_pool, leftover = [], [], []
+    for (pos, duration), ids in classes.items():
+        n_own = net.flow(own_edges[pos, duration]) // duration if (pos, duration) in own_edges else 0
+        n_pool = net.flow(pool_edges[pos, duration]) // duration if (pos, duration) in pool_edges else 0
+        to_own += [(pk, pos, duration) for pk in ids[:n_own]]
+        to_pool += [(pk, pos, duration) for pk in ids[n_own:n_own + n_pool]]
+        leftover += [(pk, pos, duration) for pk in ids[n_own + n_pool:]]
+
+    pairs, overflow = [], 0
+    longest_first = lambda t: (-t[2], t[0])      # noqa: E731
+    for n, (pk, pos, duration) in enumerate(sorted(to_own, key=longest_first)):
+        if n % CHECK_EVERY == 0:
+            check(deadline)
+        worker = own_bins[pos].place(duration)
+        if worker is not None:
+            pairs.append((pk, worker))
+        elif may_overflow(pos, duration, overflow_cost):
+            to_pool.append((pk, pos, duration))
+        else:
+            leftover.append((pk, pos, duration))
+    for n, (pk, pos, duration) in enumerate(sorted(to_pool, key=longest_first)):
+        if n % CHECK_EVERY == 0:
+            check(deadline)
+        worker = pool_bins.place(duration)
+        if worker is None:
+            leftover.append((pk, pos, duration))
+        else:
+            pairs.append((pk, worker))
+            overflow += pos is not None
+    # any gap still open, shortest first
+    for n, (pk, pos, duration) in enumerate(sorted(leftover, key=lambda t: (t[2], t[0]))):
+        if n % CHECK_EVERY == 0:
+            check(deadline)
+        worker = own_bins[pos].place(duration) if pos in own_bins else None
+        if worker is None and may_overflow(pos, duration, overflow_cost):
+            worker = pool_bins.place(duration)
+            overflow += worker is not None and pos is not None
+        if worker is not None:
+            pairs.append((pk, worker))
+
+    # never worse than the shard heuristic
+    baseline = heuristic(day, tasks, workers, capacity)
+    if len(pairs) >= len(baseline):
+        result = DayResult(pairs, len(tasks), overflow, len(baseline))
+    else:
+        result = top_up(tasks, workers, capacity, overflow_cost, baseline)
+    result.flow_rounds, result.augmentations = net.rounds, net.augmentations
+    return result
+
+
+def top_up(tasks, workers, capacity, overflow_cost, baseline) -> DayResult:
+    """The heuristic's *baseline*, plus whatever else fits on the pool."""
+    hours = defaultdict(int)
+    duration = {pk: d for pk, _, d in tasks}
+    for task, worker in baseline:
+        hours[worker] += duration[task]
+    placed = {task for task, _ in baseline}
+    pool = workers.get(None, [])
+    pairs, overflow = list(baseline), 0
+    for pk, pos, d in sorted(tasks, key=lambda t: (t[2], t[0])):
+        if pk in placed or not may_overflow(pos, d, overflow_cost):
+            continue
+        for worker in pool:
+            if hours[worker] + d <= capacity:
+                hours[worker] += d
+                pairs.append((pk, worker))
+                overflow += pos is not None
+                break
+    return DayResult(pairs, len(tasks), overflow, len(baseline))
+
+
+# ── Whole run ────────────────────────────────────────────────────────────
+
+
+def load_days():
+    """({position or None: [worker ids]}, iterator of (date, [(id, position, duration)]))."""
+    workers = {}
+    for pk, pos in Worker.objects.order_by("id").values_list("id", "position_id"):
+        workers.setdefault(pos, []).append(pk)
+    rows = (
+        Task.objects.order_by("date", "id")
+        .values_list("date", "id", "position_id", "duration")
+        .iterator(chunk_size=10000)
+    )
+    days = (
+        (day, [(pk, pos, duration) for _, pk, pos, duration in group])
+        for day, group in groupby(rows, key=lambda r: r[0])
+    )
+    return workers, days
+
+
+def make_global_plan(capacity: int = MAX_HOURS_PER_DAY, overflow_cost: int = OVERFLOW_COST,
+                     time_budget: float = TIME_BUDGET) -> Plan:
+    """Solve every date globally (see above); dates the time budget doesn't cover use the heuristic."""
+    deadline = time.monotonic() + time_budget
+    plan = Plan(heuristic_unplaced=0)
+    workers, days = load_days()
+    for day, tasks in days:
+        try:
+            check(deadline)
+            result = solve_day(day, tasks, workers, capacity, overflow_cost, deadline)
+        except OutOfTime:
+            pairs = heuristic(day, tasks, workers, capacity)
+            result = DayResult(pairs, len(tasks), 0, len(pairs))
+            plan.over_budget_days += 1
+        plan.assignments += [(t, w, day) for t, w in result.pairs]
+        plan.placed += len(result.pairs)
+        plan.unplaced += result.tasks - len(result.pairs)
+        plan.overflow += result.overflow
+        plan.heuristic_unplaced += result.tasks - result.heuristic_placed
+    return plan
@@ -0,0 +1,17 @@
+"""
+myapp/management/base.py
+
+Base class for the cron-style commands (auto_assign_tasks, rebuild_rollups,
+manage_partitions, export_snapshot, what_if).
+
+They never serve HTTP, so they run only the model system checks. The URL
+and template checks would import every view module – and DRF's template
+tags with them – just to start a batch job.
+"""
+
+from django.core.checks import Tags
+from django.core.management.base import BaseCommand
+
+
+class CronCommand(BaseCommand):
+    requires_system_checks = [Tags.models]     # no HTTP – skip the URLconf checks
@@ -3,73 +3,104 @@ Simple auto‑allocator.
 
 Run:
     python manage.py auto_assign_tasks
+    python manage.py auto_assign_tasks --no-cache     # solve every shard again
+    python manage.py auto_assign_tasks --keep-old     # leave the old set for the next run
+    python manage.py auto_assign_tasks --global       # whole days, incl. the no-position pool
 
 What it does:
-1. Wipes all existing Assignment rows (we were told to ignore them).
+1. Replaces all existing Assignment rows (we were told to ignore them).
 2. For every date + position it pushes tasks onto workers of the same
-   position, keeping each worker ≤ 8 hours for that date.
+   position, keeping each worker ≤ 8 hours for that date.
 3. Prints a couple of quick KPIs at the end.
 
+The new assignments are written as a separate, invisible set and then
+switched to in one short transaction (myapp/generations.py): /api/table/
+keeps serving the old assignments while the run works and is never
+blocked by it. Assignments made by hand during the run are carried over
+into the new set where they still fit the 8 h cap. The rollup cells
+(myapp/rollups.py) of the workers and dates that changed are refreshed
+right after the switch, a month per transaction, and the replaced rows
+are deleted afterwards, a month at a time.
+
+Each date + position bucket ("shard") is fingerprinted from its tasks,
+workers and the 8 h cap. Shards unchanged since an earlier run reuse the
+stored solution instead of being solved again (myapp/shard_cache.py); the
+hit / miss counts are part of the KPIs.
+
 Heuristic:
 * “Fill‑up‑one‑worker‑before‑using‑next” – easy to reason about and matches
   a real‑world shift approach.
-* Not optimal but guarantees the 8 h cap and avoids tiny fragments.
-"""
+* Not optimal but guarantees the 8 h cap and avoids tiny fragments.
 
-from collections import defaultdict
+The pieces live in myapp/allocation.py.
 
-from django.core.management.base import BaseCommand
-from django.db import transaction
-from django.db.models import Sum
+--global solves each date as a whole instead (myapp/global_allocation.py):
+a min-cost flow puts tasks on their own position's workers first and
+spills into the no-position pool at --overflow-cost per hour. Tasks
+without a position get placed there too. The 8 h cap still holds, and
+dates still unsolved after --time-budget seconds use the heuristic above.
+The KPIs then include how many fewer tasks are left unplaced than with
+the heuristic. The shard cache is not used in this mode.
+"""
 
-from myapp.models import Assignment, Position, Task, Worker
+from django.db.models import Sum
 
+from myapp import generations
+from myapp.allocation import load_shards, make_plan, write_plan
+from myapp.global_allocation import OVERFLOW_COST, TIME_BUDGET, make_global_plan
+from myapp.management.base import CronCommand
+from myapp.models import MAX_HOURS_PER_DAY, Assignment
+from myapp.shard_cache import ShardCache
 
-MAX_HOURS_PER_DAY = 8
 
+class Command(CronCommand):
+    help = "Auto‑assign tasks so each worker tops out at 8 h per day."
 
-class Command(BaseCommand):
-    help = "Auto‑assign tasks so each worker tops out at 8 h per day."
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--no-cache", action="store_true",
+            help="Solve every shard, ignoring (and not updating) the shard cache.",
+        )
+        parser.add_argument(
+            "--keep-old", action="store_true",
+            help="Don't delete the replaced assignments now; the next run prunes them.",
+        )
+        parser.add_argument(
+            "--global", action="store_true", dest="global_mode",
+            help="Solve whole dates with a min-cost flow, using the no-position pool as overflow.",
+        )
+        parser.add_argument(
+            "--overflow-cost", type=int, default=OVERFLOW_COST,
+            help=f"--global: cost per hour of a task on a pool worker (default {OVERFLOW_COST}).",
+        )
+        parser.add_argument(
+            "--time-budget", type=float, default=TIME_BUDGET,
+            help=f"--global: seconds before the remaining dates use the heuristic (default {TIME_BUDGET:g}).",
+        )
 
-    @transaction.atomic
     def handle(self, *args, **options):
-        # 1. clear existing assignments
-        Assignment.objects.all().delete()
-
-        unplaced_total = 0
-        placed_total = 0
-
-        # 2. loop per date so we respect daily capacity
-        dates = (
-            Task.objects.values_list("date", flat=True)
-            .distinct()
-            .order_by("date")
+        # no surrounding transaction: staging, the switch and the clean-up
+        # each commit on their own, so none of them holds locks for the run
+        self.allocate(
+            use_cache=not options["no_cache"],
+            prune=not options["keep_old"],
+            global_mode=options["global_mode"],
+            overflow_cost=options["overflow_cost"],
+            time_budget=options["time_budget"],
         )
 
-        for dt in dates:
-            # keep a per‑worker counter for the day
-            daily_hours = defaultdict(int)  # worker_id -> hours
-
-            for pos in Position.objects.all():
-                # workers of this position, sorted so we fill one completely
-                workers = list(pos.workers.order_by("id"))
-
-                tasks = (
-                    Task.objects.filter(date=dt, position=pos)
-                    .order_by("-duration")  # sort by longest duration first
-                )
-
-                for task in tasks:
-                    # find first worker with enough remaining capacity
-                    for w in workers:
-                        if daily_hours[w.id] + task.duration <= MAX_HOURS_PER_DAY:
-                            Assignment.objects.create(task=task, worker=w)
-                            daily_hours[w.id] += task.duration
-                            placed_total += 1
-                            break
-                    else:
-                        # no worker had room – leave it unassigned
-                        unplaced_total += 1
+    def allocate(self, use_cache=True, prune=True, global_mode=False,
+                 overflow_cost=OVERFLOW_COST, time_budget=TIME_BUDGET):
+        # 1 + 2. solve (or look up) every date / position shard – or every
+        # whole date – then publish the result as the new assignment set
+        seen_upto = generations.high_water()      # before any data is read
+        if global_mode:
+            cache = None
+            plan = make_global_plan(overflow_cost=overflow_cost, time_budget=time_budget)
+        else:
+            cache = ShardCache() if use_cache else None
+            plan = make_plan(load_shards(), cache=cache)
+        generation = write_plan(plan, seen_upto)
 
         # 3. KPI printout
         util_qs = (
@@ -84,6 +115,32 @@ class Command(BaseCommand):
         )
 
         self.stdout.write(self.style.SUCCESS("Auto‑allocation done"))
-        self.stdout.write(f"Placed tasks:     {placed_total}")
-        self.stdout.write(f"Unplaced tasks:   {unplaced_total}")
+        self.stdout.write(f"Placed tasks:     {plan.placed}")
+        self.stdout.write(f"Unplaced tasks:   {plan.unplaced}")
         self.stdout.write(f"Avg daily utilisation: {avg_util:0.2%}")
+        if plan.heuristic_unplaced is not None:
+            drop = plan.heuristic_unplaced - plan.unplaced
+            share = drop / plan.heuristic_unplaced if plan.heuristic_unplaced else 0
+            self.stdout.write(
+                f"vs heuristic:     {plan.heuristic_unplaced} unplaced → {plan.unplaced} "
+                f"({drop} fewer, {share:0.1%})"
+            )
+            self.stdout.write(f"Pool overflow:    {plan.overflow} tasks")
+            if plan.over_budget_days:
+                self.stdout.write(self.style.WARNING(
+                    f"Time budget ran out: {plan.over_budget_days} date(s) used the heuristic"
+                ))
+        if cache is not None:
+            shards = plan.cache_hits + plan.cache_misses
+            rate = plan.cache_hits / shards if shards else 0
+            self.stdout.write(
+                f"Shard cache:      {plan.cache_hits} hits / {plan.cache_misses} misses "
+                f"({rate:0.1%} reused)"
+            )
+        if plan.late_carried or plan.late_dropped:
+            self.stdout.write(
+                f"Made during run:  {plan.late_carried} kept, {plan.late_dropped} dropped (over the cap)"
+            )
+        self.stdout.write(f"Assignment set:   generation {generation}")
+        if prune:
+            self.stdout.write(f"Old rows pruned:  {generations.prune()}")
@@ -0,0 +1,95 @@
+"""
+Month-partition housekeeping for Task / Assignment (Postgres only).
+
+Run (e.g. nightly from cron):
+    python manage.py manage_partitions                  # next 3 months
+    python manage.py manage_partitions --ahead 6
+    python manage.py manage_partitions --retain 24      # archive older months
+    python manage.py manage_partitions --retain 24 --drop
+
+What it does:
+1. Makes sure every month from now to `--ahead` months out has a partition
+   in both tables, so new rows never pile up in the DEFAULT partition.
+2. With `--retain N`, detaches every month older than N months and moves it
+   to the `myapp_archive` schema (or drops it with `--drop`). Archived rows
+   are out of every query plan but can still be read or re-attached by hand.
+
+Layout and helpers live in myapp/partitions.py.
+"""
+
+from datetime import date
+
+from django.core.management.base import CommandError
+from django.db import connection, transaction
+
+from myapp.management.base import CronCommand
+from myapp.partitions import (
+    ARCHIVE_SCHEMA,
+    MONTHS_AHEAD,
+    PARTITIONED_TABLES,
+    add_months,
+    archive_month,
+    create_month_partition,
+    is_partitioned,
+    month_partitions,
+    month_start,
+    months_between,
+    partition_name,
+)
+
+
+class Command(CronCommand):
+    help = "Create upcoming month partitions and archive old ones."
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--ahead", type=int, default=MONTHS_AHEAD,
+            help=f"Months after the current one to pre-create (default {MONTHS_AHEAD}).",
+        )
+        parser.add_argument(
+            "--retain", type=int, default=None,
+            help="Archive months older than this many months (default: keep all).",
+        )
+        parser.add_argument(
+            "--drop", action="store_true",
+            help="Drop old months instead of moving them to the archive schema.",
+        )
+
+    @transaction.atomic
+    def handle(self, *args, **options):
+        if connection.vendor != "postgresql":
+            raise CommandError("Table partitioning needs PostgreSQL.")
+
+        this_month = month_start(date.today())
+
+        with connection.cursor() as cursor:
+            if not all(is_partitioned(cursor, t) for t in PARTITIONED_TABLES):
+                raise CommandError("Tables are not partitioned – run `migrate` first.")
+
+            # 1. upcoming months
+            for month in months_between(this_month, add_months(this_month, options["ahead"])):
+                for table in PARTITIONED_TABLES:
+                    name = partition_name(table, month)
+                    if month in month_partitions(cursor, table):
+                        continue
+                    if create_month_partition(cursor, table, month):
+                        self.stdout.write(f"Created   {name}")
+                    else:
+                        self.stdout.write(self.style.WARNING(
+                            f"Skipped   {name} – rows for {month:%b %Y} are "
+                            f"already in {table}_default"
+                        ))
+
+            # 2. old months
+            if options["retain"] is not None:
+                cutoff = add_months(this_month, -options["retain"])
+                old = sorted(
+                    m for m in month_partitions(cursor, PARTITIONED_TABLES[0])
+                    if m < cutoff
+                )
+                where = "dropped" if options["drop"] else f"→ {ARCHIVE_SCHEMA}"
+                for month in old:
+                    for name in archive_month(cursor, month, drop=options["drop"]):
+                        self.stdout.write(f"Archived  {name} ({where})")
+
+        self.stdout.write(self.style.SUCCESS("Partitions up to date"))
@@ -0,0 +1,23 @@
+"""
+Recompute the day / week / month hour rollups from scratch.
+
+Run:
+    python manage.py rebuild_rollups
+
+When to use it:
+* once after migrating to 0005 (the rollup table starts empty);
+* after writes that bypassed the ORM signals (raw SQL, bulk imports).
+
+Normal edits keep the rollups fresh on their own – see myapp/rollups.py.
+"""
+
+from myapp import rollups
+from myapp.management.base import CronCommand
+
+
+class Command(CronCommand):
+    help = "Rebuild the pre-computed day / week / month hour totals."
+
+    def handle(self, *args, **options):
+        days = rollups.rebuild_all()
+        self.stdout.write(self.style.SUCCESS(f"Rollups rebuilt for {days} day(s)"))
@@ -0,0 +1,136 @@
+"""
+Measure how fast a fresh process gets going, against a budget.
+
+Run:
+    python manage.py startup_benchmark
+    python manage.py startup_benchmark --check              # fail when over budget
+    python manage.py startup_benchmark --record bench.jsonl # append the numbers
+
+What it measures (each in a brand-new interpreter, median of --repeat runs):
+1. command    – `manage.py check --tag models`: settings, app registry,
+                admin autodiscovery and the model checks – what our cron
+                commands (auto_assign_tasks, rebuild_rollups, …) pay
+                before doing any work.
+2. check      – `manage.py check`: the above plus the URLconf, template
+                tag libraries (DRF's among them) and every other check –
+                what commands without `requires_system_checks` pay.
+3. first hit  – boot the WSGI application and serve one GET (--url), i.e.
+                how long an autoscaled worker takes to answer its first
+                request.
+4. imports    – an `-X importtime` run of `manage.py check`, summed per
+                top-level package, biggest first. Modules Django loads
+                with importlib.import_module (apps, the URLconf) don't
+                show up themselves, only what they import.
+
+The budget is in BUDGET_MS. Wall times include the interpreter itself and
+depend on the machine – compare runs on the same box, and keep --record
+files per machine.
+"""
+
+import json
+import statistics
+import subprocess
+import sys
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+BUDGET_MS = {
+    "command": 350,
+    "check": 400,
+    "first hit": 500,
+}
+
+# served by a freshly booted WSGI worker; the URL comes from argv
+FIRST_HIT = """
+import os, sys
+from wsgiref.util import setup_testing_defaults
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "work_assignment.settings")
+from django.core.wsgi import get_wsgi_application
+app = get_wsgi_application()
+environ = {"PATH_INFO": sys.argv[1], "HTTP_HOST": "localhost"}
+setup_testing_defaults(environ)
+status = []
+b"".join(app(environ, lambda s, h, exc_info=None: status.append(s)))
+sys.exit(0 if status[0][:1] in "23" else status[0])
+"""
+
+
+class Command(BaseCommand):
+    help = "Time process start-up (command, checks, first request) against a budget."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--repeat", type=int, default=5,
+                            help="Runs per measurement; the median is reported (default 5).")
+        parser.add_argument("--url", default="/api/table/",
+                            help="Path requested by the first-hit probe (default /api/table/).")
+        parser.add_argument("--top", type=int, default=10,
+                            help="Packages shown in the import breakdown (default 10).")
+        parser.add_argument("--check", action="store_true",
+                            help="Exit with an error when a measurement is over budget.")
+        parser.add_argument("--record", metavar="PATH",
+                            help="Append the results as one JSON line to PATH.")
+
+    def handle(self, *args, **options):
+        manage = str(Path(settings.BASE_DIR) / "manage.py")
+        probes = {
+            "command": [sys.executable, manage, "check", "--tag", "models"],
+            "check": [sys.executable, manage, "check"],
+            "first hit": [sys.executable, "-c", FIRST_HIT, options["url"]],
+        }
+        results = {name: self.median_ms(cmd, options["repeat"]) for name, cmd in probes.items()}
+
+        self.stdout.write(f"{'':<12}{'median':>10}{'budget':>10}")
+        over = []
+        for name, ms in results.items():
+            budget = BUDGET_MS[name]
+            flag = "" if ms <= budget else "  ✗ over"
+            if flag:
+                over.append(name)
+            self.stdout.write(f"{name:<12}{ms:>8.0f}ms{budget:>8}ms{flag}")
+
+        packages = import_breakdown([sys.executable, "-X", "importtime", manage, "check"])
+        self.stdout.write("\nImport time by package (manage.py check):")
+        for package, us in packages[:options["top"]]:
+            self.stdout.write(f"  {package:<30}{us / 1000:>8.1f}ms")
+
+        if options["record"]:
+            with open(options["record"], "a") as f:
+                f.write(json.dumps({
+                    "at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+                    "median_ms": {k: round(v, 1) for k, v in results.items()},
+                    "imports_ms": {p: round(us / 1000, 1) for p, us in packages[:options["top"]]},
+                }) + "\n")
+
+        if over and options["check"]:
+            raise CommandError(f"Over start-up budget: {', '.join(over)}")
+        if not over:
+            self.stdout.write(self.style.SUCCESS("\nWithin budget"))
+
+    @staticmethod
+    def median_ms(cmd, repeat):
+        runs = []
+        for _ in range(max(repeat, 1)):
+            start = time.perf_counter()
+            done = subprocess.run(cmd, capture_output=True, text=True, cwd=settings.BASE_DIR)
+            runs.append((time.perf_counter() - start) * 1000)
+            if done.returncode:
+                raise CommandError(f"{' '.join(cmd[:3])}… failed:\n{done.stderr[-2000:]}")
+        return statistics.median(runs)
+
+
+def import_breakdown(cmd):
+    """[(top-level package, µs), …] from an -X importtime run, biggest first."""
+    stderr = subprocess.run(cmd, capture_output=True, text=True, cwd=settings.BASE_DIR).stderr
+    totals = defaultdict(int)
+    for line in stderr.splitlines():
+        # "import time:  self [us] | cumulative | imported package"
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, _, module = line[len("import time:"):].split("|")
+        totals[module.strip().split(".")[0]] += int(self_us)
+    return sorted(totals.items(), key=lambda item: -item[1])
@@ -0,0 +1,80 @@
+"""
+Compare what-if allocation scenarios against the current plan.
+
+Run:
+    python manage.py what_if scenarios.json
+    python manage.py what_if scenarios.json --processes 4 --json
+    python manage.py what_if scenarios.json --start 2025-04-01 --end 2025-06-30
+
+scenarios.json – the same body POST /api/scenarios/compare/ takes:
+
+    {"scenarios": [
+        {"name": "2 more nurses", "hire": {"3": 2}},
+        {"name": "cap 7h", "capacity": 7},
+        {"name": "no Bob", "remove_workers": [12]},
+        {"name": "extra shift", "add_tasks": [{"date": "2025-05-02", "position": 3, "duration": 6}],
+         "remove_tasks": [1041]}
+    ]}
+
+What it does:
+1. Loads tasks (all dates, or --start to --end) and workers once
+   (myapp/scenarios.py).
+2. Solves a plain re-run ("baseline") and every scenario in parallel – a
+   forked process pool, which the API doesn't use – in memory, with the
+   auto_assign_tasks heuristic.
+3. Prints the KPIs side by side, next to those of the live assignments
+   ("current"). Nothing is written.
+"""
+
+import json
+import sys
+from datetime import date
+
+from django.core.management.base import CommandError
+
+from myapp.management.base import CronCommand
+from myapp.scenarios import Scenario, compare, load_base
+
+
+class Command(CronCommand):
+    help = "Compare what-if allocation scenarios side by side, without writing anything."
+
+    def add_arguments(self, parser):
+        parser.add_argument("path", help="Scenario file (JSON), or - for stdin.")
+        parser.add_argument("--processes", type=int,
+                            help="Scenarios solved at once (default: one per CPU).")
+        parser.add_argument("--json", action="store_true",
+                            help="Print the results as JSON instead of a table.")
+        parser.add_argument("--start", type=date.fromisoformat,
+                            help="First date to include (YYYY-MM-DD; default: all).")
+        parser.add_argument("--end", type=date.fromisoformat,
+                            help="Last date to include (YYYY-MM-DD; default: all).")
+
+    def handle(self, *args, **options):
+        try:
+            if options["path"] == "-":
+                data = json.load(sys.stdin)
+            else:
+                with open(options["path"]) as f:
+                    data = json.load(f)
+            specs = data["scenarios"] if isinstance(data, dict) else data
+            scenarios = [Scenario.from_dict(spec) for spec in specs]
+        except (OSError, ValueError, KeyError, TypeError) as exc:
+            raise CommandError(f"Can't read scenarios: {exc}")
+
+        base = load_base(options["start"], options["end"])
+        results = compare(scenarios, base, processes=options["processes"])
+
+        if options["json"]:
+            self.stdout.write(json.dumps([r.as_dict() for r in results], indent=2))
+            return
+
+        width = max(12, *(len(r.name) + 2 for r in results))
+        self.stdout.write(f"{'':<14}" + "".join(f"{r.name:>{width}}" for r in results))
+        for label, cell in (
+            ("Placed", lambda r: f"{r.placed}"),
+            ("Unplaced", lambda r: f"{r.unplaced}"),
+            ("Utilisation", lambda r: f"{r.utilisation:0.2%}"),
+            ("Fairness", lambda r: f"{r.fairness:0.3f}"),
+        ):
+            self.stdout.write(f"{label:<14}" + "".join(f"{cell(r):>{width}}" for r in results))
@@ -0,0 +1,202 @@
+"""
+Month-partition Task and Assignment (Postgres only).
+
+1. Assignment gets a `date` column (copy of task.date) and is back-filled.
+2. On Postgres both tables are rebuilt as `PARTITION BY RANGE (date)` with
+   one partition per month of existing data (plus MONTHS_AHEAD future
+   months) and a DEFAULT partition. Rows are copied across, ids keep their
+   sequence, and Assignment → Task becomes a composite FK on (id, date).
+
+Other backends stop after step 1 – the schema is then plain tables.
+"""
+
+from datetime import date
+
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+from myapp.partitions import (
+    MONTHS_AHEAD,
+    add_months,
+    month_start,
+    months_between,
+    partition_name,
+)
+
+
+def backfill_assignment_date(apps, schema_editor):
+    Assignment = apps.get_model("myapp", "Assignment")
+    Task = apps.get_model("myapp", "Task")
+    Assignment.objects.update(
+        date=Subquery(Task.objects.filter(pk=OuterRef("task_id")).values("date")[:1])
+    )
+
+
+# ── Postgres: plain tables → partitioned tables ─────────────────────────
+
+PARTITIONED_DDL = """
+CREATE TABLE myapp_task_new (
+    id          bigint  NOT NULL,
+    date        date    NOT NULL,
+    duration    integer NOT NULL,
+    position_id bigint  NULL,
+    PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+CREATE TABLE myapp_task_default PARTITION OF myapp_task_new DEFAULT;
+
+CREATE TABLE myapp_assignment_new (
+    id        bigint NOT NULL,
+    task_id   bigint NOT NULL,
+    worker_id bigint NOT NULL,
+    date      date   NOT NULL,
+    PRIMARY KEY (id, date)
+) PARTITION BY RANGE (date);
+CREATE TABLE myapp_assignment_default PARTITION OF myapp_assignment_new DEFAULT;
+"""
+
+PARTITIONED_SWAP = """
+INSERT INTO myapp_task_new (id, date, duration, position_id)
+    SELECT id, date, duration, position_id FROM myapp_task;
+INSERT INTO myapp_assignment_new (id, task_id, worker_id, date)
+    SELECT id, task_id, worker_id, date FROM myapp_assignment;
+
+DROP TABLE myapp_assignment;
+DROP TABLE myapp_task;
+
+ALTER TABLE myapp_task_new RENAME TO myapp_task;
+ALTER TABLE myapp_task RENAME CONSTRAINT myapp_task_new_pkey TO myapp_task_pkey;
+ALTER TABLE myapp_assignment_new RENAME TO myapp_assignment;
+ALTER TABLE myapp_assignment RENAME CONSTRAINT myapp_assignment_new_pkey TO myapp_assignment_pkey;
+
+-- identity columns can't live on partitioned tables before PG 17,
+-- so ids come from an owned sequence instead
+CREATE SEQUENCE myapp_task_id_seq OWNED BY myapp_task.id;
+SELECT setval('myapp_task_id_seq', COALESCE((SELECT MAX(id) FROM myapp_task), 0) + 1, false);
+ALTER TABLE myapp_task ALTER COLUMN id SET DEFAULT nextval('myapp_task_id_seq');
+
+CREATE SEQUENCE myapp_assignment_id_seq OWNED BY myapp_assignment.id;
+SELECT setval('myapp_assignment_id_seq', COALESCE((SELECT MAX(id) FROM myapp_assignment), 0) + 1, false);
+ALTER TABLE myapp_assignment ALTER COLUMN id SET DEFAULT nextval('myapp_assignment_id_seq');
+
+CREATE INDEX myapp_task_position_id_idx ON myapp_task (position_id);
+CREATE INDEX myapp_assignment_task_id_idx ON myapp_assignment (task_id);
+CREATE INDEX myapp_assignment_worker_id_idx ON myapp_assignment (worker_id);
+
+ALTER TABLE myapp_task ADD CONSTRAINT myapp_task_position_id_fk
+    FOREIGN KEY (position_id) REFERENCES myapp_position (id)
+    DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE myapp_assignment ADD CONSTRAINT myapp_assignment_worker_id_fk
+    FOREIGN KEY (worker_id) REFERENCES myapp_worker (id)
+    DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE myapp_assignment ADD CONSTRAINT myapp_assignment_task_fk
+    FOREIGN KEY (task_id, date) REFERENCES myapp_task (id, date)
+    ON UPDATE CASCADE ON DELETE CASCADE
+    DEFERRABLE INITIALLY DEFERRED;
+"""
+
+# Reverse: back to plain tables with identity ids (archived months are left
+# alone in their schema).
+PLAIN_SQL = """
+CREATE TABLE myapp_task_plain (
+    id          bigint  NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+    date        date    NOT NULL,
+    duration    integer NOT NULL,
+    position_id bigint  NULL
+);
+CREATE TABLE myapp_assignment_plain (
+    id        bigint NOT NULL PRIMARY KEY GENERATED BY DEFAULT AS IDENTITY,
+    task_id   bigint NOT NULL,
+    worker_id bigint NOT NULL,
+    date      date   NOT NULL
+);
+INSERT INTO myapp_task_plain (id, date, duration, position_id)
+    SELECT id, date, duration, position_id FROM myapp_task;
+INSERT INTO myapp_assignment_plain (id, task_id, worker_id, date)
+    SELECT id, task_id, worker_id, date FROM myapp_assignment;
+
+DROP TABLE myapp_assignment;
+DROP TABLE myapp_task;
+
+ALTER TABLE myapp_task_plain RENAME TO myapp_task;
+ALTER TABLE myapp_task RENAME CONSTRAINT myapp_task_plain_pkey TO myapp_task_pkey;
+ALTER TABLE myapp_assignment_plain RENAME TO myapp_assignment;
+ALTER TABLE myapp_assignment RENAME CONSTRAINT myapp_assignment_plain_pkey TO myapp_assignment_pkey;
+
+SELECT setval(pg_get_serial_sequence('myapp_task', 'id'), COALESCE((SELECT MAX(id) FROM myapp_task), 0) + 1, false);
+SELECT setval(pg_get_serial_sequence('myapp_assignment', 'id'), COALESCE((SELECT MAX(id) FROM myapp_assignment), 0) + 1, false);
+
+CREATE INDEX myapp_task_position_id_idx ON myapp_task (position_id);
+CREATE INDEX myapp_assignment_task_id_idx ON myapp_assignment (task_id);
+CREATE INDEX myapp_assignment_worker_id_idx ON myapp_assignment (worker_id);
+
+ALTER TABLE myapp_task ADD CONSTRAINT myapp_task_position_id_fk
+    FOREIGN KEY (position_id) REFERENCES myapp_position (id)
+    DEFERRABLE INITIALLY DEFERRED;
+ALTER TABLE myapp_assignment ADD CONSTRAINT myapp_assignment_worker_id_fk
+    FOREIGN KEY (worker_id) REFERENCES myapp_worker (id)
+    DEFERRABLE INITIALLY DEFERRED;
+"""
+
+
+def partition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(PARTITIONED_DDL)
+
+        # one partition per month that already has data, plus a few ahead
+        cursor.execute("SELECT MIN(date), MAX(date) FROM myapp_task")
+        first, last = cursor.fetchone()
+        this_month = month_start(date.today())
+        first = min(first or this_month, this_month)
+        last = max(last or this_month, add_months(this_month, MONTHS_AHEAD))
+        for month in months_between(first, last):
+            for table in ("myapp_task", "myapp_assignment"):
+                # partitions are attached to the *_new parents at this point
+                cursor.execute(
+                    f'CREATE TABLE "{partition_name(table, month)}" '
+                    f'PARTITION OF "{table}_new" '
+                    f"FOR VALUES FROM ('{month.isoformat()}') "
+                    f"TO ('{add_months(month, 1).isoformat()}')"
+                )
+
+        cursor.execute(PARTITIONED_SWAP)
+
+
+def unpartition_tables(apps, schema_editor):
+    if schema_editor.connection.vendor != "postgresql":
+        return
+
+    with schema_editor.connection.cursor() as cursor:
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(PLAIN_SQL)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0003_alter_task_position'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='assignment',
+            name='date',
+            field=models.DateField(null=True),
+        ),
+        migrations.RunPython(backfill_assignment_date, migrations.RunPython.noop),
+        migrations.AlterField(
+            model_name='assignment',
+            name='date',
+            field=models.DateField(),
+        ),
+        migrations.AlterField(
+            model_name='assignment',
+            name='task',
+            field=models.ForeignKey(db_constraint=False, on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='myapp.task'),
+        ),
+        migrations.RunPython(partition_tables, unpartition_tables),
+    ]
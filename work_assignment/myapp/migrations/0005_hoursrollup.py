@@ -0,0 +1,27 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0004_partition_task_assignment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='HoursRollup',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period', models.DateField()),
+                ('kind', models.CharField(choices=[('position', 'Position'), ('worker', 'Worker'), ('unassigned', 'Unassigned')], max_length=10)),
+                ('ref_id', models.BigIntegerField(null=True)),
+                ('hours', models.IntegerField()),
+            ],
+            options={
+                'indexes': [models.Index(fields=['granularity', 'period'], name='rollup_granularity_period_idx')],
+            },
+        ),
+    ]
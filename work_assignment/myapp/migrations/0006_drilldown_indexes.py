@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:52
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0005_hoursrollup'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['worker', 'date', 'id'], name='assignment_worker_date_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='task',
+            index=models.Index(fields=['position', 'date', 'id'], name='task_position_date_idx'),
+        ),
+    ]
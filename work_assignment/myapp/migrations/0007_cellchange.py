@@ -0,0 +1,26 @@
+# Generated by Django 5.2.18 on 2026-10-19 15:54
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0006_drilldown_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CellChange',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('granularity', models.CharField(choices=[('day', 'Day'), ('week', 'Week'), ('month', 'Month')], max_length=5)),
+                ('period', models.DateField()),
+                ('kind', models.CharField(choices=[('position', 'Position'), ('worker', 'Worker'), ('unassigned', 'Unassigned')], max_length=10)),
+                ('ref_id', models.BigIntegerField(null=True)),
+                ('hours', models.IntegerField()),
+                ('created_at', models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:03
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0008_admin_date_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ShardSolution',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('fingerprint', models.CharField(max_length=64, unique=True)),
+                ('assignments', models.JSONField()),
+                ('used_at', models.DateTimeField(db_default=django.db.models.functions.datetime.Now(), db_index=True)),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:15
+
+import django.db.models.functions.datetime
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0009_shardsolution'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='AssignmentGeneration',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('state', models.CharField(choices=[('staging', 'Staging'), ('active', 'Active'), ('retired', 'Retired')], default='staging', max_length=7)),
+                ('created_at', models.DateTimeField(db_default=django.db.models.functions.datetime.Now())),
+                ('published_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AddField(
+            model_name='assignment',
+            name='generation',
+            field=models.PositiveBigIntegerField(db_default=0),
+        ),
+    ]
@@ -0,0 +1,40 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:32
+
+from django.db import migrations, models
+from django.db.models import Count, Min
+
+
+def drop_duplicate_cells(apps, schema_editor):
+    # Concurrent refreshes could leave a cell twice; keep the oldest row.
+    # Week / month totals built on top of duplicates are off – run
+    # `manage.py rebuild_rollups` after migrating if any were removed.
+    HoursRollup = apps.get_model("myapp", "HoursRollup")
+    duplicated = (
+        HoursRollup.objects.values("granularity", "period", "kind", "ref_id")
+        .annotate(n=Count("id"), keep=Min("id"))
+        .filter(n__gt=1)
+    )
+    for cell in duplicated:
+        HoursRollup.objects.filter(
+            granularity=cell["granularity"], period=cell["period"], kind=cell["kind"],
+            ref_id=cell["ref_id"],
+        ).exclude(pk=cell["keep"]).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0010_assignment_generations'),
+    ]
+
+    operations = [
+        migrations.RunPython(drop_duplicate_cells, migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='hoursrollup',
+            constraint=models.UniqueConstraint(fields=('granularity', 'period', 'kind', 'ref_id'), name='rollup_cell_unique'),
+        ),
+        migrations.AddConstraint(
+            model_name='hoursrollup',
+            constraint=models.UniqueConstraint(condition=models.Q(('ref_id__isnull', True)), fields=('granularity', 'period', 'kind'), name='rollup_cell_null_ref_unique'),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0011_rollup_cell_unique'),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name='assignment',
+            name='assignment_worker_date_idx',
+        ),
+        migrations.RemoveIndex(
+            model_name='assignment',
+            name='assignment_date_idx',
+        ),
+        migrations.AddField(
+            model_name='assignmentgeneration',
+            name='seen_upto',
+            field=models.PositiveBigIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['worker', 'generation', 'date', 'id'], name='assignment_worker_gen_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='assignment',
+            index=models.Index(fields=['generation', 'date', 'id'], name='assignment_gen_date_idx'),
+        ),
+    ]
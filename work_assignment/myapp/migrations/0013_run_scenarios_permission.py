@@ -0,0 +1,17 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:41
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0012_generation_indexes'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='assignmentgeneration',
+            options={'permissions': [('run_scenarios', 'Can run what-if allocation scenarios')]},
+        ),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 5.2.18 on 2026-10-19 16:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0013_run_scenarios_permission'),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name='hoursrollup',
+            name='rollup_cell_unique',
+        ),
+        migrations.AddConstraint(
+            model_name='hoursrollup',
+            constraint=models.UniqueConstraint(fields=('granularity', 'kind', 'ref_id', 'period'), name='rollup_cell_unique'),
+        ),
+    ]
@@ -0,0 +1,45 @@
+# Generated by Django 5.2.18 on 2026-10-19 17:02
+
+from django.db import migrations
+
+
+def move_permission(apps, source, target):
+    # re-point the existing permission row, so users and groups that were
+    # granted myapp.run_scenarios keep it (post_migrate would otherwise
+    # create a second, ungranted one on the new model)
+    ContentType = apps.get_model("contenttypes", "ContentType")
+    Permission = apps.get_model("auth", "Permission")
+    old = ContentType.objects.filter(app_label="myapp", model=source).first()
+    if old is None:
+        return                          # fresh database – nothing granted yet
+    new, _ = ContentType.objects.get_or_create(app_label="myapp", model=target)
+    Permission.objects.filter(content_type=old, codename="run_scenarios").update(content_type=new)
+
+
+def forwards(apps, schema_editor):
+    move_permission(apps, "assignmentgeneration", "assignment")
+
+
+def backwards(apps, schema_editor):
+    move_permission(apps, "assignment", "assignmentgeneration")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('myapp', '0014_rollup_cell_by_ref'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+        ('contenttypes', '0002_remove_content_type_name'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='assignment',
+            options={'permissions': [('run_scenarios', 'Can run what-if allocation scenarios')]},
+        ),
+        migrations.AlterModelOptions(
+            name='assignmentgeneration',
+            options={},
+        ),
+        migrations.RunPython(forwards, backwards),
+    ]
@@ -1,7 +1,32 @@
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Subquery
+from django.db.models.functions import Coalesce, Now
+
+# Deletes cascade row by row, and each row's delete signal refreshes its
+# rollup cells (myapp/signals.py). Running the whole delete in one
+# rollups.deferred() refreshes them once, every month lock taken in order –
+# a cascade across months can't deadlock with another one (myapp/rollups.py).
+class RollupsDeferredQuerySet(models.QuerySet):
+    def delete(self):
+        from . import rollups           # rollups imports this module
+        with transaction.atomic(using=self.db), rollups.deferred():
+            return super().delete()
+
+
+class RollupsDeferredDelete(models.Model):
+    objects = RollupsDeferredQuerySet.as_manager()
+
+    class Meta:
+        abstract = True
+
+    def delete(self, *args, **kwargs):
+        from . import rollups
+        with transaction.atomic(using=kwargs.get("using")), rollups.deferred():
+            return super().delete(*args, **kwargs)
+
 
 # Basic role or job type, e.g. "Engineer", "Manager", etc.
-class Position(models.Model):
+class Position(RollupsDeferredDelete):
     name = models.CharField(max_length=100)
 
     def __str__(self):
@@ -9,7 +34,7 @@ class Position(models.Model):
      
 
 # A person who can be assigned to tasks. They optionally belong to a Position.
-class Worker(models.Model):
+class Worker(RollupsDeferredDelete):
     name = models.CharField(max_length=100)
 
     # If a worker has a role, it's linked here (e.g. Alice is a 'Manager')
@@ -26,7 +51,7 @@ class Worker(models.Model):
 
 
 # Something that needs to be done on a certain date, for a position (e.g. "Shift for Nurse on Jan 5")
-class Task(models.Model):
+class Task(RollupsDeferredDelete):
     # Position required for this task (e.g. this task is only for an Engineer)
     position = models.ForeignKey(
         Position,
@@ -38,14 +63,186 @@ class Task(models.Model):
     date     = models.DateField()           # When the task is scheduled
     duration = models.IntegerField()        # How long it goes for (in hours or minutes – up to project)
 
+    class Meta:
+        indexes = [
+            # drill-down: a position's tasks in (date, id) order
+            models.Index(fields=["position", "date", "id"], name="task_position_date_idx"),
+            # admin: newest-first pages and the month filter
+            models.Index(fields=["date", "id"], name="task_date_idx"),
+        ]
+
     def __str__(self):
-        return f"{self.position.name} @ {self.date}"
+        return f"{self.position.name if self.position else 'No position'} @ {self.date}"
+
+
+# Nobody works more than this many hours on one date. Enforced by
+# auto_assign_tasks and by the batch assignment API (myapp/batch.py).
+MAX_HOURS_PER_DAY = 8
+
+
+# One complete set of assignments written by an allocation run (see
+# myapp/generations.py). Runs fill a STAGING generation, then a single
+# update makes it the ACTIVE one; the replaced set is RETIRED and pruned.
+class AssignmentGeneration(models.Model):
+    STAGING, ACTIVE, RETIRED = "staging", "active", "retired"
+    STATE_CHOICES = [(STAGING, "Staging"), (ACTIVE, "Active"), (RETIRED, "Retired")]
+
+    state        = models.CharField(max_length=7, choices=STATE_CHOICES, default=STAGING)
+    created_at   = models.DateTimeField(db_default=Now())
+    published_at = models.DateTimeField(null=True, blank=True)
+
+    # Highest Assignment id when the run read its data. Rows added to the
+    # live set after that are carried over on publish.
+    seen_upto    = models.PositiveBigIntegerField(default=0)
+
+    def __str__(self):
+        return f"generation {self.pk} ({self.state})"
+
+
+def live_generation():
+    """
+    The active generation as a subquery, so every statement reads the
+    pointer at the same instant as the rows. 0 – the generation rows get
+    by default – until the first allocation run is published.
+    """
+    active = (
+        AssignmentGeneration.objects.filter(state=AssignmentGeneration.ACTIVE)
+        .order_by("-id")
+        .values("id")[:1]
+    )
+    return Coalesce(Subquery(active), 0)
+
+
+# Only assignments of the live generation exist as far as the app is
+# concerned: views, rollups, the APIs, the admin and related managers
+# (worker.assignments) all see just those. Assignment.all_generations sees
+# staged and retired rows as well; cascades use it too (_base_manager).
+class LiveAssignmentManager(models.Manager.from_queryset(RollupsDeferredQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().filter(generation=live_generation())
 
 
 # An assignment = a task being given to a specific worker
-class Assignment(models.Model):
-    task   = models.ForeignKey(Task, related_name='assignments', on_delete=models.CASCADE)
+class Assignment(RollupsDeferredDelete):
+    # No DB-level constraint on task_id alone: on Postgres both tables are
+    # partitioned by month, so the real FK is (task_id, date) → task(id, date)
+    # and is created by migration 0004 (see myapp/partitions.py).
+    task   = models.ForeignKey(
+        Task,
+        related_name='assignments',
+        on_delete=models.CASCADE,
+        db_constraint=False,
+    )
     worker = models.ForeignKey(Worker, related_name='assignments', on_delete=models.CASCADE)
 
+    # Copy of task.date – the partition key. Filled in by myapp/signals.py,
+    # so callers never have to set it by hand.
+    date   = models.DateField()
+
+    # Which assignment set the row belongs to (AssignmentGeneration id).
+    # Single saves join the live set via myapp/signals.py; bulk writers
+    # set it themselves.
+    generation = models.PositiveBigIntegerField(db_default=0)
+
+    objects = LiveAssignmentManager()
+    all_generations = RollupsDeferredQuerySet.as_manager()
+
+    class Meta:
+        # every read filters on the live generation – it leads (after the
+        # worker) so staged and retired rows are skipped, not scanned
+        indexes = [
+            # drill-down: a worker's assignments in (date, id) order
+            models.Index(fields=["worker", "generation", "date", "id"],
+                         name="assignment_worker_gen_idx"),
+            # admin: newest-first pages and the month filter
+            models.Index(fields=["generation", "date", "id"], name="assignment_gen_date_idx"),
+        ]
+        permissions = [
+            # POST /api/scenarios/compare/ – re-plans these assignments in
+            # memory (myapp/scenarios.py); each scenario is a full allocation run
+            ("run_scenarios", "Can run what-if allocation scenarios"),
+        ]
+
     def __str__(self):
         return f"{self.task} → {self.worker}"
+
+    def save(self, *args, **kwargs):
+        # joining the live set (myapp/signals.py) locks out publish() until
+        # the row is in – so the save has to be one transaction
+        with transaction.atomic(using=kwargs.get("using"), savepoint=False):
+            super().save(*args, **kwargs)
+
+
+# Pre-computed hour totals behind the summary table (see myapp/rollups.py).
+# One row = one cell: "<kind> <ref_id> worked <hours> in <period>".
+class HoursRollup(models.Model):
+    DAY, WEEK, MONTH = "day", "week", "month"
+    GRANULARITY_CHOICES = [(DAY, "Day"), (WEEK, "Week"), (MONTH, "Month")]
+
+    POSITION, WORKER, UNASSIGNED = "position", "worker", "unassigned"
+    KIND_CHOICES = [
+        (POSITION, "Position"),      # tasks of a position (ref_id NULL = no position)
+        (WORKER, "Worker"),          # tasks assigned to a worker
+        (UNASSIGNED, "Unassigned"),  # tasks with no assignment (ref_id NULL)
+    ]
+
+    granularity = models.CharField(max_length=5, choices=GRANULARITY_CHOICES)
+    period      = models.DateField()     # first day of the day / week (Mon) / month
+    kind        = models.CharField(max_length=10, choices=KIND_CHOICES)
+
+    # Position or Worker id – a plain integer, not an FK, so rollups never
+    # take part in cascades; stale rows are rewritten on the next refresh
+    ref_id      = models.BigIntegerField(null=True)
+    hours       = models.IntegerField()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["granularity", "period"], name="rollup_granularity_period_idx"),
+        ]
+        # one row per cell – NULL ref_ids don't count as distinct, hence
+        # the second, partial constraint (portable, unlike nulls_distinct).
+        # Period last: a refresh reads one position's / worker's day cells
+        # of a week or month (myapp/rollups.py) through it.
+        constraints = [
+            models.UniqueConstraint(
+                fields=["granularity", "kind", "ref_id", "period"],
+                name="rollup_cell_unique",
+            ),
+            models.UniqueConstraint(
+                fields=["granularity", "period", "kind"],
+                condition=models.Q(ref_id__isnull=True),
+                name="rollup_cell_null_ref_unique",
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} {self.ref_id} – {self.granularity} {self.period}: {self.hours}"
+
+
+# Append-only log of summary-table cells whose value changed, written after
+# each commit by myapp/changes.py. The id is the cursor clients resume from.
+class CellChange(models.Model):
+    granularity = models.CharField(max_length=5, choices=HoursRollup.GRANULARITY_CHOICES)
+    period      = models.DateField()
+    kind        = models.CharField(max_length=10, choices=HoursRollup.KIND_CHOICES)
+    ref_id      = models.BigIntegerField(null=True)
+    hours       = models.IntegerField()      # new value – 0 when the cell emptied out
+
+    # DB clock, so every app server agrees on what "a second ago" means
+    created_at  = models.DateTimeField(db_default=Now(), db_index=True)
+
+    def __str__(self):
+        return f"#{self.pk} {self.kind} {self.ref_id} {self.granularity} {self.period} → {self.hours}"
+
+
+# Persistent result cache of the auto-allocator (see myapp/shard_cache.py):
+# the solution of one (date, position) shard, keyed by a hash of its inputs.
+class ShardSolution(models.Model):
+    fingerprint = models.CharField(max_length=64, unique=True)
+    assignments = models.JSONField()          # [[task_id, worker_id], …]
+
+    # last run that used (or stored) it – the LRU eviction order
+    used_at     = models.DateTimeField(db_default=Now(), db_index=True)
+
+    def __str__(self):
+        return f"{self.fingerprint[:12]}… ({len(self.assignments)} assignments)"
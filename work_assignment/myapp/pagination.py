@@ -0,0 +1,82 @@
+"""
+myapp/pagination.py
+
+Keyset (a.k.a. cursor / seek) pagination on (date, id).
+
+Instead of `OFFSET n` – which makes Postgres walk and throw away n rows, so
+page 1000 is 1000× slower than page 1 – every page starts *after* the last
+row of the previous one:
+
+    WHERE date >= :d AND (date > :d OR id > :id)
+    ORDER BY date, id
+    LIMIT :size + 1
+
+With an index on (<owner>, date, id) that is a single index range scan, so
+latency is flat at any depth. The cursor is an opaque base64 of "date:id".
+The trailing +1 row only tells us whether a next page exists.
+"""
+
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import date
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
+
+
+class KeysetPagination(BasePagination):
+    page_size = 100
+    max_page_size = 1000
+    cursor_query_param = "cursor"
+    page_size_query_param = "limit"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        size = self.get_page_size(request)
+
+        after = self.decode_cursor(request)
+        if after:
+            d, pk = after
+            # the plain `date >= d` gives the planner the index range start
+            queryset = queryset.filter(date__gte=d).filter(Q(date__gt=d) | Q(id__gt=pk))
+
+        page = list(queryset.order_by("date", "id")[: size + 1])
+        self.next_cursor = self.encode_cursor(page[size - 1]) if len(page) > size else None
+        return page[:size]
+
+    def get_paginated_response(self, data):
+        return Response({"next": self.get_next_link(), "results": data})
+
+    # ── helpers ──────────────────────────────────────────────────────────
+
+    def get_page_size(self, request):
+        try:
+            size = int(request.query_params.get(self.page_size_query_param, self.page_size))
+        except ValueError:
+            size = self.page_size
+        return max(1, min(size, self.max_page_size))
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        url = self.request.build_absolute_uri()
+        return replace_query_param(url, self.cursor_query_param, self.next_cursor)
+
+    @staticmethod
+    def encode_cursor(row) -> str:
+        raw = f"{row.date.isoformat()}:{row.id}".encode()
+        return urlsafe_b64encode(raw).decode().rstrip("=")
+
+    def decode_cursor(self, request):
+        """(date, id) from ?cursor=, None on the first page, 404 if garbage."""
+        token = request.query_params.get(self.cursor_query_param)
+        if not token:
+            return None
+        try:
+            raw = urlsafe_b64decode(token + "=" * (-len(token) % 4)).decode()
+            d, pk = raw.split(":")
+            return date.fromisoformat(d), int(pk)
+        except (ValueError, UnicodeDecodeError):
+            raise NotFound("Invalid cursor")
@@ -0,0 +1,162 @@
+"""
+myapp/partitions.py
+
+Month-based Postgres partitioning for Task and Assignment.
+
+Layout (created by migration 0004):
+    myapp_task                   PARTITION BY RANGE (date), PK (id, date)
+      ├── myapp_task_p2025_01    FOR VALUES FROM ('2025-01-01') TO ('2025-02-01')
+      ├── ...
+      └── myapp_task_default     DEFAULT – catches dates with no month yet
+    myapp_assignment             same, keyed on Assignment.date (= task date)
+
+Assignment rows always live in the same month as their task, so a whole
+month can be archived by detaching one partition from each table.
+
+The helpers below take a raw DB cursor and are shared by the migration and
+the `manage_partitions` command.
+"""
+
+from datetime import date
+from typing import Dict, List
+
+# Parent first: Assignment references Task, so Task partitions are created
+# first and detached last.
+PARTITIONED_TABLES = ("myapp_task", "myapp_assignment")
+
+# Where detached (archived) month partitions are moved to.
+ARCHIVE_SCHEMA = "myapp_archive"
+
+# How many months ahead of "today" get a partition by default.
+MONTHS_AHEAD = 3
+
+
+# ── Month arithmetic ─────────────────────────────────────────────────────
+
+
+def month_start(d: date) -> date:
+    """2025‑01‑17 → 2025‑01‑01."""
+    return d.replace(day=1)
+
+
+def add_months(d: date, n: int) -> date:
+    """Shift a month start by *n* months (n may be negative)."""
+    months = d.year * 12 + (d.month - 1) + n
+    return date(months // 12, months % 12 + 1, 1)
+
+
+def months_between(first: date, last: date) -> List[date]:
+    """Every month start from *first* up to and including *last*."""
+    out, m = [], month_start(first)
+    while m <= last:
+        out.append(m)
+        m = add_months(m, 1)
+    return out
+
+
+def partition_name(table: str, month: date) -> str:
+    """('myapp_task', 2025‑01‑01) → 'myapp_task_p2025_01'."""
+    return f"{table}_p{month:%Y_%m}"
+
+
+# ── Catalog lookups ──────────────────────────────────────────────────────
+
+
+def is_partitioned(cursor, table: str) -> bool:
+    """True if *table* is a partitioned parent (relkind 'p')."""
+    cursor.execute(
+        "SELECT relkind = 'p' FROM pg_class "
+        "WHERE oid = to_regclass(%s)",
+        [table],
+    )
+    row = cursor.fetchone()
+    return bool(row and row[0])
+
+
+def month_partitions(cursor, table: str) -> Dict[date, str]:
+    """Return {month start: partition name} for the attached month partitions."""
+    cursor.execute(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "WHERE i.inhparent = to_regclass(%s)",
+        [table],
+    )
+    prefix = f"{table}_p"
+    out = {}
+    for (name,) in cursor.fetchall():
+        if name.startswith(prefix):
+            year, month = name[len(prefix):].split("_")
+            out[date(int(year), int(month), 1)] = name
+    return out
+
+
+# ── DDL ──────────────────────────────────────────────────────────────────
+
+
+def create_month_partition(cursor, table: str, month: date) -> bool:
+    """
+    Create the partition of *table* for *month* if it is missing.
+
+    Returns False (and creates nothing) when the month already exists, or
+    when rows for that month already sit in the DEFAULT partition – Postgres
+    would refuse the new partition, and moving those rows is a job for a
+    human, not a cron command.
+    """
+    lo, hi = month_start(month), add_months(month_start(month), 1)
+    if lo in month_partitions(cursor, table):
+        return False
+
+    cursor.execute(
+        f'SELECT EXISTS (SELECT 1 FROM "{table}_default" '
+        f"WHERE date >= %s AND date < %s)",
+        [lo, hi],
+    )
+    if cursor.fetchone()[0]:
+        return False
+
+    cursor.execute(
+        f'CREATE TABLE "{partition_name(table, lo)}" PARTITION OF "{table}" '
+        f"FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"
+    )
+    return True
+
+
+def archive_month(cursor, month: date, drop: bool = False) -> List[str]:
+    """
+    Detach *month* from every partitioned table and move it to
+    ARCHIVE_SCHEMA (or DROP it when *drop* is True).
+
+    Children go first: the Assignment partition is detached and its foreign
+    keys removed before the Task partition it points at is detached.
+    Returns the names of the partitions that were archived.
+    """
+    # detaching is ALTER TABLE, which refuses to run while deferred FK
+    # checks from earlier writes in this transaction are still pending
+    cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+    if not drop:
+        cursor.execute(f'CREATE SCHEMA IF NOT EXISTS "{ARCHIVE_SCHEMA}"')
+
+    archived = []
+    for table in reversed(PARTITIONED_TABLES):
+        name = month_partitions(cursor, table).get(month_start(month))
+        if name is None:
+            continue
+
+        cursor.execute(f'ALTER TABLE "{table}" DETACH PARTITION "{name}"')
+
+        # a detached partition keeps copies of the parent's FKs; drop them so
+        # archived rows never block deletes of live workers / tasks
+        cursor.execute(
+            "SELECT conname FROM pg_constraint "
+            "WHERE conrelid = to_regclass(%s) AND contype = 'f'",
+            [name],
+        )
+        for (con,) in cursor.fetchall():
+            cursor.execute(f'ALTER TABLE "{name}" DROP CONSTRAINT "{con}"')
+
+        if drop:
+            cursor.execute(f'DROP TABLE "{name}"')
+        else:
+            cursor.execute(f'ALTER TABLE "{name}" SET SCHEMA "{ARCHIVE_SCHEMA}"')
+        archived.append(name)
+    return archived
@@ -0,0 +1,324 @@
+"""
+myapp/rollups.py
+
+Pre-computed day / week / month hour totals for the summary table.
+
+Hierarchy
+─────────
+    raw Task / Assignment rows ──► day cells ──► week cells (Mon start)
+                                            └──► month cells
+
+Only day cells are computed from raw rows; weeks and months are sums of
+day cells. A change to one date therefore rewrites one day, one week and
+one month – never the whole history.
+
+Keeping them fresh
+──────────────────
+myapp/signals.py calls `mark_cells(…)` on every Task / Assignment write,
+with just the cells the row counts towards: its date's cell for the
+task's position, for the worker, and "Unassigned". Only those – and the
+week / month cells above them – are recomputed, so a single save costs a
+dozen small queries however many workers share the date. Outside a batch
+they are refreshed straight away, in the same transaction as the write.
+
+Bulk writers wrap their work in `deferred()` so all touched cells are
+refreshed once at the end:
+
+    with rollups.deferred():
+        ...thousands of saves / deletes...
+
+`bulk_create` / `.update()` skip signals – call `mark_cells`, or
+`mark_dirty(date)` for every cell of a date, yourself.
+`python manage.py rebuild_rollups` recomputes everything from scratch.
+
+Concurrent refreshes
+────────────────────
+Two transactions refreshing cells of the same week or month would both
+delete and re-insert them. On Postgres, each refresh therefore takes a
+transaction-level advisory lock per month it writes cells in, and the
+second one waits for the first to commit. A unique constraint on the cell
+backs this up.
+
+The locks are sorted within one refresh, not across several: a
+transaction that refreshes twice – in January, then in February – could
+deadlock with one going the other way. So anything that writes many rows
+in one transaction goes through `deferred()`, which locks every month
+once, in order: the batch API and admin actions, and every ORM delete of
+Position / Worker / Task / Assignment (models.py), whose cascades fire a
+signal per row.
+
+Every refresh also reports the cells whose value moved to myapp/changes.py,
+which feeds the live table.
+"""
+
+import threading
+from collections import defaultdict
+from contextlib import contextmanager
+from datetime import date, timedelta
+from functools import reduce
+from operator import or_
+from typing import Iterable, List, Optional, Set, Tuple
+
+from django.db import connection, transaction
+from django.db.models import Exists, OuterRef, Q, Sum
+from django.db.models.functions import TruncMonth, TruncWeek
+
+from . import changes
+from .models import Assignment, HoursRollup, Task
+from .partitions import add_months, month_start
+
+DAY, WEEK, MONTH = HoursRollup.DAY, HoursRollup.WEEK, HoursRollup.MONTH
+GRANULARITIES = (DAY, WEEK, MONTH)
+
+POSITION, WORKER, UNASSIGNED = (
+    HoursRollup.POSITION, HoursRollup.WORKER, HoursRollup.UNASSIGNED,
+)
+KINDS = (POSITION, WORKER, UNASSIGNED)
+
+# one day cell: (date, kind, Position / Worker id or None)
+Cell = Tuple[date, str, Optional[int]]
+
+
+# ── Periods ──────────────────────────────────────────────────────────────
+
+
+def period_start(d: date, granularity: str) -> date:
+    """First day of the day / week (Monday) / month that contains *d*."""
+    if granularity == WEEK:
+        return d - timedelta(days=d.weekday())
+    if granularity == MONTH:
+        return month_start(d)
+    return d
+
+
+def period_end(start: date, granularity: str) -> date:
+    """First day *after* the period beginning at *start*."""
+    if granularity == WEEK:
+        return start + timedelta(days=7)
+    if granularity == MONTH:
+        return add_months(start, 1)
+    return start + timedelta(days=1)
+
+
+# ── Refresh ──────────────────────────────────────────────────────────────
+
+# What a refresh recomputes: [(kind, dates, ref_ids – None for all of them)],
+# and the week / month cells above. Entries of the same kind never share a
+# date, so every day cell is computed once.
+Scope = List[Tuple[str, Set[date], Optional[Set[Optional[int]]]]]
+
+
+def days_scope(days: Iterable[date]) -> Scope:
+    """Every cell of *days*."""
+    days = set(days)
+    return [(kind, days, None) for kind in KINDS]
+
+
+def cells_scope(cells: Iterable[Cell]) -> Scope:
+    """The (date, kind, ref_id) day cells in *cells* – per kind, every date × ref_id."""
+    grouped = defaultdict(lambda: (set(), set()))
+    for day, kind, ref_id in cells:
+        grouped[kind][0].add(day)
+        grouped[kind][1].add(ref_id)
+    return [(kind, days, refs) for kind, (days, refs) in grouped.items()]
+
+
+def in_refs(refs: Optional[Set[Optional[int]]], field: str = "ref_id") -> Q:
+    """*field* is one of *refs* (None: anything) – NULL needs its own test."""
+    if refs is None:
+        return Q()
+    q = Q(**{f"{field}__in": [r for r in refs if r is not None]})
+    if None in refs:
+        q |= Q(**{f"{field}__isnull": True})
+    return q
+
+
+def in_scope(granularity: str, scope: Scope) -> Q:
+    """The HoursRollup rows of *granularity* that a refresh of *scope* rewrites."""
+    q = Q()
+    for kind, days, refs in scope:
+        q |= Q(in_refs(refs), granularity=granularity, kind=kind,
+               period__in={period_start(d, granularity) for d in days})
+    return q
+
+
+def day_cells(scope: Scope):
+    """Yield unsaved day-level HoursRollup rows for *scope*, from raw data."""
+    for kind, days, refs in scope:
+        if kind == POSITION:
+            rows = (
+                Task.objects.filter(in_refs(refs, "position"), date__in=days)
+                .values("date", "position")
+                .annotate(total=Sum("duration"))
+                .values_list("date", "position", "total")
+            )
+        elif kind == WORKER:
+            rows = (
+                # bounds on both sides of the join – Task partitions are pruned too
+                Assignment.objects.filter(in_refs(refs, "worker"), date__in=days, task__date__in=days)
+                .values("date", "worker")
+                .annotate(total=Sum("task__duration"))
+                .values_list("date", "worker", "total")
+            )
+        else:
+            rows = (
+                (day, None, total) for day, total in
+                Task.objects.filter(date__in=days)
+                .exclude(Exists(Assignment.objects.filter(task_id=OuterRef("pk"), date=OuterRef("date"))))
+                .values("date")
+                .annotate(total=Sum("duration"))
+                .values_list("date", "total")
+            )
+        for day, ref_id, total in rows:
+            yield HoursRollup(granularity=DAY, period=day, kind=kind, ref_id=ref_id, hours=total)
+
+
+def parent_cells(granularity: str, scope: Scope):
+    """Yield week / month rows for *scope* by summing their (fresh) day rows."""
+    trunc = TruncWeek if granularity == WEEK else TruncMonth
+    days = set().union(*(days for _, days, _ in scope))
+    lo = period_start(min(days), granularity)
+    hi = period_end(period_start(max(days), granularity), granularity)
+    which = Q()
+    for kind, days, refs in scope:
+        which |= Q(in_refs(refs), kind=kind,
+                   parent__in={period_start(d, granularity) for d in days})
+    for r in (
+        HoursRollup.objects.filter(granularity=DAY, period__gte=lo, period__lt=hi)
+        .annotate(parent=trunc("period"))
+        .filter(which)
+        .values("parent", "kind", "ref_id")
+        .annotate(total=Sum("hours"))
+    ):
+        yield HoursRollup(granularity=granularity, period=r["parent"], kind=r["kind"],
+                          ref_id=r["ref_id"], hours=r["total"])
+
+
+LOCK_NAMESPACE = 0x726F6C6C        # "roll" – first key of pg_advisory_xact_lock(int, int)
+
+
+def lock_days(days: Iterable[date]) -> None:
+    """
+    Serialise refreshes that write cells in the same months (Postgres only).
+    Sorted, and taking a lock the transaction already holds is free – so a
+    caller that knows every date up front can lock them all first.
+    """
+    if connection.vendor != "postgresql":
+        return                      # SQLite: one writer at a time anyway
+    months = sorted({
+        start.year * 12 + start.month - 1
+        for d in days for start in (period_start(d, g) for g in GRANULARITIES)
+    })
+    with connection.cursor() as cursor:
+        for month in months:
+            cursor.execute("SELECT pg_advisory_xact_lock(%s, %s)", [LOCK_NAMESPACE, month])
+
+
+def cell_values(cells):
+    """{(granularity, period, kind, ref_id): hours} for HoursRollup rows."""
+    return {(c.granularity, c.period, c.kind, c.ref_id): c.hours for c in cells}
+
+
+@transaction.atomic
+def refresh(scope: Scope) -> None:
+    """Rewrite the day cells of *scope* and the week / month cells above them."""
+    scope = [(kind, days, refs) for kind, days, refs in scope if days]
+    if not scope:
+        return
+
+    lock_days(set().union(*(days for _, days, _ in scope)))
+    targets = {granularity: in_scope(granularity, scope) for granularity in GRANULARITIES}
+    before = cell_values(HoursRollup.objects.filter(reduce(or_, targets.values())).only(
+        "granularity", "period", "kind", "ref_id", "hours"))
+
+    # children first – parent_cells() sums the fresh day rows
+    after = {}
+    for granularity in GRANULARITIES:
+        cells = list(
+            day_cells(scope) if granularity == DAY
+            else parent_cells(granularity, scope)
+        )
+        HoursRollup.objects.filter(targets[granularity]).delete()
+        HoursRollup.objects.bulk_create(cells, batch_size=1000)
+        after.update(cell_values(cells))
+
+    changes.publish(before, after)
+
+
+def refresh_days(days: Iterable[date]) -> None:
+    """Rewrite every cell of *days* – for rebuilds and bulk writes."""
+    refresh(days_scope(days))
+
+
+def refresh_cells(cells: Iterable[Cell]) -> None:
+    """Rewrite the (date, kind, ref_id) day cells in *cells* and their parents."""
+    refresh(cells_scope(cells))
+
+
+@transaction.atomic
+def refresh_dirty(days: Set[date], cells: Set[Cell]) -> None:
+    """refresh_days(*days*) and refresh_cells(*cells*), every month locked once, in order."""
+    cells = {cell for cell in cells if cell[0] not in days}
+    lock_days(days | {day for day, _, _ in cells})
+    refresh(days_scope(days) + cells_scope(cells))
+
+
+@transaction.atomic
+def rebuild_all() -> int:
+    """Recompute every rollup from raw data. Returns #days."""
+    # days that still have tasks, plus days whose tasks have all gone
+    days = sorted(
+        set(Task.objects.values_list("date", flat=True).distinct())
+        | set(HoursRollup.objects.filter(granularity=DAY)
+              .values_list("period", flat=True).distinct())
+    )
+    # a year at a time keeps the IN lists and bulk inserts bounded; a week
+    # that straddles two chunks is simply recomputed by the second one
+    for i in range(0, len(days), 366):
+        refresh_days(days[i:i + 366])
+    return len(days)
+
+
+# ── Change tracking ──────────────────────────────────────────────────────
+
+_local = threading.local()
+
+
+@contextmanager
+def deferred():
+    """Collect mark_dirty() / mark_cells() calls and refresh them once, on clean exit."""
+    if getattr(_local, "days", None) is not None:
+        # already inside a batch – the outermost one does the refresh
+        yield
+        return
+
+    _local.days, _local.cells = set(), set()
+    try:
+        yield
+        days, cells = _local.days, _local.cells
+    finally:
+        _local.days = _local.cells = None
+    refresh_dirty(days, cells)
+
+
+def as_date(d) -> date:
+    # model fields may still hold the ISO string they were assigned
+    return d if isinstance(d, date) else date.fromisoformat(d)
+
+
+def mark_dirty(*days: date) -> None:
+    """Note that any data for *days* changed (refresh now, or at end of batch)."""
+    days = {as_date(d) for d in days if d is not None}
+    if getattr(_local, "days", None) is not None:
+        _local.days.update(days)
+    else:
+        refresh_days(days)
+
+
+def mark_cells(*cells: Cell) -> None:
+    """Note that the (date, kind, ref_id) day cells in *cells* changed."""
+    cells = {(as_date(d), kind, ref_id) for d, kind, ref_id in cells if d is not None}
+    if getattr(_local, "cells", None) is not None:
+        _local.cells.update(cells)
+    else:
+        refresh_cells(cells)
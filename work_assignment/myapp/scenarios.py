@@ -0,0 +1,267 @@
+"""
+myapp/scenarios.py
+
+What-if allocation: "hire two more nurses", "cap the day at 7 h", … run
+against today's data without touching it.
+
+    base = load_base(start, end)             # 3 queries, once
+    compare([Scenario("cap 7h", capacity=7),
+             Scenario("2 nurses", hire={3: 2})], base)
+        → [Kpis(current…), Kpis(baseline…), Kpis(cap 7h…), Kpis(2 nurses…)]
+
+The date span is optional for the what_if command. The API requires one
+of at most MAX_SPAN_DAYS, and solves in its own process (processes=1):
+forking a web server process is unsafe, and the fan-out is for the
+command.
+
+A Scenario is an overlay on the base shards (myapp/allocation.py) and is
+applied copy-on-write: shards it doesn't touch are handed to the solver
+as the very same objects, only the touched ones are rebuilt. Every
+scenario is solved with the same fill-up heuristic as auto_assign_tasks,
+and several scenarios are solved at once in a process pool. The pool is
+forked after the base data is loaded, so workers share it rather than
+each receiving a copy, and they never use the database.
+
+Nothing here writes anything: the current plan is read from Assignment,
+the rest lives in memory.
+
+KPIs, per scenario (tasks without a position are never placed and are
+left out, as in auto_assign_tasks):
+    placed / unplaced   tasks
+    utilisation         hours worked ÷ (worker-days with work × cap)
+    fairness            Jain's index over the hours of every worker with a
+                        position – 1.0 when everyone works the same hours,
+                        1/n when one worker does it all
+"""
+
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
+from datetime import date
+from itertools import count
+from typing import Dict, Iterator, List, Optional, Sequence, Set, Tuple
+
+from django.db.models import Sum
+
+from .allocation import Shard, fill_up, load_shards
+from .models import MAX_HOURS_PER_DAY, Assignment, Task, Worker
+
+MAX_SCENARIOS = 8          # per comparison – each one is a full allocation run
+MAX_SPAN_DAYS = 92         # per API comparison – about a quarter
+
+
+@dataclass
+class Base:
+    shards: List[Shard]
+    workers: Dict[int, List[int]]        # position id → worker ids, in fill order
+    start: Optional[date] = None         # the dates the shards cover (inclusive)
+    end: Optional[date] = None
+
+
+@dataclass
+class Scenario:
+    name: str
+    capacity: int = MAX_HOURS_PER_DAY
+    hire: Dict[int, int] = field(default_factory=dict)          # position id → new workers
+    remove_workers: Set[int] = field(default_factory=set)
+    add_tasks: List[Tuple[date, int, int]] = field(default_factory=list)   # (date, position, hours)
+    remove_tasks: Set[int] = field(default_factory=set)
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "Scenario":
+        """From the JSON shape taken by the what_if command and the API."""
+        try:
+            return cls(
+                name=str(data["name"]),
+                capacity=int(data.get("capacity", MAX_HOURS_PER_DAY)),
+                hire={int(pos): int(n) for pos, n in data.get("hire", {}).items()},
+                remove_workers={int(pk) for pk in data.get("remove_workers", [])},
+                add_tasks=[
+                    (
+                        t["date"] if isinstance(t["date"], date) else date.fromisoformat(t["date"]),
+                        int(t["position"]),
+                        int(t["duration"]),
+                    )
+                    for t in data.get("add_tasks", [])
+                ],
+                remove_tasks={int(pk) for pk in data.get("remove_tasks", [])},
+            )
+        except (KeyError, TypeError, ValueError, AttributeError) as exc:
+            raise ValueError(f"Invalid scenario {data.get('name', '?')!r}: {exc!r}") from None
+
+    def workers(self, base: Base) -> Dict[int, List[int]]:
+        """Worker lists after the overlay. New hires get ids -1, -2, … and fill last."""
+        new_id = count(-1, -1)
+        positions = {}
+        for pos in set(base.workers) | set(self.hire):
+            workers = base.workers.get(pos, [])
+            if self.hire.get(pos) or not self.remove_workers.isdisjoint(workers):
+                workers = [w for w in workers if w not in self.remove_workers]
+                workers += [next(new_id) for _ in range(self.hire.get(pos, 0))]
+            positions[pos] = workers
+        return positions
+
+    def shards(self, base: Base) -> Iterator[Shard]:
+        """The base shards with the overlay applied, copy-on-write."""
+        workers = self.workers(base)
+        added = {}
+        for pk, (day, pos, hours) in zip(count(-1, -1), self.add_tasks):
+            added.setdefault((day, pos), []).append((pk, hours))
+
+        for shard in base.shards:
+            shard_workers = workers.get(shard.position_id, shard.workers)
+            extra = added.pop((shard.date, shard.position_id), [])
+            tasks = shard.tasks
+            if extra or (self.remove_tasks and any(t in self.remove_tasks for t, _ in tasks)):
+                tasks = [t for t in tasks if t[0] not in self.remove_tasks] + extra
+                tasks.sort(key=lambda t: (-t[1], t[0]))       # longest first, like load_shards()
+            if tasks is shard.tasks and shard_workers is shard.workers:
+                yield shard                                   # untouched – shared, not copied
+            else:
+                yield Shard(shard.date, shard.position_id, tasks, shard_workers)
+
+        for (day, pos), tasks in sorted(added.items()):
+            tasks.sort(key=lambda t: (-t[1], t[0]))
+            yield Shard(day, pos, tasks, workers.get(pos, []))
+
+
+@dataclass
+class Kpis:
+    name: str
+    placed: int
+    unplaced: int
+    utilisation: float
+    fairness: float
+
+    def as_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "placed": self.placed,
+            "unplaced": self.unplaced,
+            "utilisation": round(self.utilisation, 4),
+            "fairness": round(self.fairness, 4),
+        }
+
+
+def jain(hours: Sequence[int]) -> float:
+    squares = sum(h * h for h in hours)
+    return sum(hours) ** 2 / (len(hours) * squares) if squares else 1.0
+
+
+# ── Loading ──────────────────────────────────────────────────────────────
+
+
+def load_base(start: Optional[date] = None, end: Optional[date] = None) -> Base:
+    shards = list(load_shards(start, end))
+    workers = {}
+    for pk, pos in (
+        Worker.objects.filter(position__isnull=False).order_by("id").values_list("id", "position_id")
+    ):
+        workers.setdefault(pos, []).append(pk)
+    # share the lists, so untouched shards are recognisably untouched
+    for shard in shards:
+        shard.workers = workers.get(shard.position_id, shard.workers)
+    return Base(shards, workers, start, end)
+
+
+def in_dates(qs, start: Optional[date], end: Optional[date], field: str = "date"):
+    if start:
+        qs = qs.filter(**{f"{field}__gte": start})
+    if end:
+        qs = qs.filter(**{f"{field}__lte": end})
+    return qs
+
+
+def current_kpis(name: str = "current", start: Optional[date] = None,
+                 end: Optional[date] = None) -> Kpis:
+    """The KPIs of the live assignments, as auto_assign_tasks counts them."""
+    tasks = in_dates(Task.objects.filter(position__isnull=False), start, end)
+    assignments = in_dates(Assignment.objects.all(), start, end)
+    total = tasks.count()
+    placed = tasks.filter(id__in=assignments.values("task_id")).count()
+
+    # the same bounds on task__date let Postgres prune Task partitions too
+    per_day = list(
+        in_dates(assignments, start, end, "task__date")
+        .values("worker", "date").annotate(hours=Sum("task__duration"))
+        .values_list("worker", "hours")
+    )
+    per_worker = dict.fromkeys(
+        Worker.objects.filter(position__isnull=False).values_list("id", flat=True), 0,
+    )
+    for worker, hours in per_day:
+        if worker in per_worker:
+            per_worker[worker] += hours
+    return Kpis(
+        name=name,
+        placed=placed,
+        unplaced=total - placed,
+        utilisation=(
+            sum(h for _, h in per_day) / (len(per_day) * MAX_HOURS_PER_DAY) if per_day else 0
+        ),
+        fairness=jain(list(per_worker.values())),
+    )
+
+
+# ── Solving ──────────────────────────────────────────────────────────────
+
+
+def evaluate(scenario: Scenario, base: Base) -> Kpis:
+    placed = unplaced = 0
+    day_hours = {}                                    # (worker, date) → hours
+    per_worker = {w: 0 for ws in scenario.workers(base).values() for w in ws}
+    for shard in scenario.shards(base):
+        duration = dict(shard.tasks)
+        solution = fill_up(shard, scenario.capacity)
+        placed += len(solution)
+        unplaced += len(shard.tasks) - len(solution)
+        for task, worker in solution:
+            day_hours[worker, shard.date] = day_hours.get((worker, shard.date), 0) + duration[task]
+            per_worker[worker] += duration[task]
+    return Kpis(
+        name=scenario.name,
+        placed=placed,
+        unplaced=unplaced,
+        utilisation=(
+            sum(day_hours.values()) / (len(day_hours) * scenario.capacity) if day_hours else 0
+        ),
+        fairness=jain(list(per_worker.values())),
+    )
+
+
+_base: Optional[Base] = None          # the pool workers' (inherited) base data
+
+
+def _set_base(base):
+    global _base
+    _base = base
+
+
+def _evaluate_in_worker(scenario):
+    return evaluate(scenario, _base)
+
+
+def compare(scenarios: Sequence[Scenario], base: Optional[Base] = None,
+            processes: Optional[int] = None) -> List[Kpis]:
+    """
+    KPIs of the live assignments ("current"), of a plain re-run on
+    unchanged data ("baseline") and of every scenario, in that order.
+    """
+    base = base if base is not None else load_base()
+    runs = [Scenario("baseline"), *scenarios]
+    processes = min(processes or os.cpu_count() or 1, len(runs))
+
+    if processes == 1 or "fork" not in multiprocessing.get_all_start_methods():
+        results = [evaluate(s, base) for s in runs]
+    else:
+        # fork: the children inherit `base` (and never touch the parent's
+        # DB connection) instead of having it pickled over to them
+        with ProcessPoolExecutor(
+            max_workers=processes,
+            mp_context=multiprocessing.get_context("fork"),
+            initializer=_set_base,
+            initargs=(base,),
+        ) as pool:
+            results = list(pool.map(_evaluate_in_worker, runs))
+    return [current_kpis(start=base.start, end=base.end), *results]
@@ -0,0 +1,122 @@
+"""
+myapp/serializers.py
+
+Shapes for the DRF endpoints in myapp/api.py.
+
+* Drill-down (read-only, flat): related names are read through `source=` so
+  they come from the select_related / prefetch done in the view, never from
+  a lazy per-row query.
+* Batch writes: only the *shape* of the request is checked here; whether
+  the ids exist and the daily cap holds is checked set-based in
+  myapp/batch.py.
+* What-if scenarios: the overlay a Scenario (myapp/scenarios.py) applies
+  to today's data; ids that don't exist simply change nothing.
+"""
+
+from rest_framework import serializers
+
+from .models import MAX_HOURS_PER_DAY, Assignment, Task
+from .scenarios import MAX_SCENARIOS, MAX_SPAN_DAYS
+
+
+class AssignmentSerializer(serializers.ModelSerializer):
+    task     = serializers.IntegerField(source="task_id")
+    duration = serializers.IntegerField(source="task.duration")
+    position = serializers.CharField(source="task.position.name", default=None)
+    worker   = serializers.CharField(source="worker.name")
+
+    class Meta:
+        model = Assignment
+        fields = ["id", "date", "task", "duration", "position", "worker"]
+
+
+class TaskSerializer(serializers.ModelSerializer):
+    position = serializers.CharField(source="position.name", default=None)
+    workers  = serializers.SerializerMethodField()
+
+    class Meta:
+        model = Task
+        fields = ["id", "date", "duration", "position", "workers"]
+
+    def get_workers(self, task):
+        # .all() is served from prefetch_related – no query per task
+        return [a.worker.name for a in task.assignments.all()]
+
+
+class AssignmentCreateSerializer(serializers.Serializer):
+    task   = serializers.IntegerField(min_value=1)
+    worker = serializers.IntegerField(min_value=1)
+
+
+class AssignmentBatchSerializer(serializers.Serializer):
+    MAX_ITEMS = 10000
+
+    create = AssignmentCreateSerializer(many=True, required=False, default=list)
+    delete = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list,
+    )
+
+    def validate(self, data):
+        size = len(data["create"]) + len(data["delete"])
+        if not size:
+            raise serializers.ValidationError("Nothing to do – send `create` and/or `delete`.")
+        if size > self.MAX_ITEMS:
+            raise serializers.ValidationError(f"At most {self.MAX_ITEMS} items per batch.")
+        return data
+
+
+class ScenarioTaskSerializer(serializers.Serializer):
+    date     = serializers.DateField()
+    position = serializers.IntegerField(min_value=1)
+    duration = serializers.IntegerField(min_value=1)
+
+
+class ScenarioSerializer(serializers.Serializer):
+    name     = serializers.CharField(max_length=100)
+    capacity = serializers.IntegerField(min_value=1, max_value=24, default=MAX_HOURS_PER_DAY)
+    hire     = serializers.DictField(
+        child=serializers.IntegerField(min_value=0, max_value=1000), required=False, default=dict,
+    )
+    remove_workers = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list,
+    )
+    add_tasks    = ScenarioTaskSerializer(many=True, required=False, default=list)
+    remove_tasks = serializers.ListField(
+        child=serializers.IntegerField(min_value=1), required=False, default=list,
+    )
+
+    def validate_hire(self, hire):
+        if not all(key.isdigit() for key in hire):
+            raise serializers.ValidationError("Keys must be position ids.")
+        return hire
+
+
+class ScenarioCompareSerializer(serializers.Serializer):
+    start     = serializers.DateField()
+    end       = serializers.DateField()
+    scenarios = ScenarioSerializer(many=True)
+
+    def validate(self, data):
+        days = (data["end"] - data["start"]).days + 1
+        if not 0 < days <= MAX_SPAN_DAYS:
+            raise serializers.ValidationError(
+                {"end": f"Must be on or after start, at most {MAX_SPAN_DAYS} days later."}
+            )
+        for scenario in data["scenarios"]:
+            if any(not data["start"] <= t["date"] <= data["end"] for t in scenario["add_tasks"]):
+                raise serializers.ValidationError(
+                    {"scenarios": f"{scenario['name']!r} adds tasks outside start–end."}
+                )
+        return data
+
+    def validate_scenarios(self, scenarios):
+        if not scenarios:
+            raise serializers.ValidationError("Send at least one scenario.")
+        if len(scenarios) > MAX_SCENARIOS:
+            raise serializers.ValidationError(f"At most {MAX_SCENARIOS} scenarios per comparison.")
+        names = [s["name"] for s in scenarios]
+        if len(set(names)) != len(names) or {"current", "baseline"} & set(names):
+            raise serializers.ValidationError(
+                "Names must be unique and not \"current\" or \"baseline\"."
+            )
+        return scenarios
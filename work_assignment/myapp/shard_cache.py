@@ -0,0 +1,75 @@
+"""
+myapp/shard_cache.py
+
+Persistent, content-addressed cache of allocator shard solutions.
+
+A shard's fingerprint is a SHA-256 over everything its solution depends on:
+the task ids and durations, the worker ids (in fill order), the daily
+capacity and the solver version. Same fingerprint ⇒ same solution, so a
+hit can be used as-is – there is nothing to invalidate. Change a task's
+duration, add a worker or move a task to another day and the affected
+shards simply hash differently.
+
+Entries live in the ShardSolution table, shared by every process. Each
+run stamps what it used; beyond MAX_ENTRIES the least recently used rows
+are evicted.
+"""
+
+import hashlib
+from typing import Dict, List, Sequence
+
+from django.db.models.functions import Now
+
+from .models import ShardSolution
+
+MAX_ENTRIES = 50_000       # ≈ a year of shards for ~140 positions; a few MB of JSON
+
+
+class ShardCache:
+    def __init__(self, max_entries: int = MAX_ENTRIES):
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._used = []          # fingerprints hit during this run
+        self._new = {}           # fingerprint → solution, written on flush()
+
+    @staticmethod
+    def fingerprint(shard, capacity: int, solver: str) -> str:
+        payload = "|".join([
+            solver,
+            str(capacity),
+            ",".join(map(str, shard.workers)),
+            ",".join(f"{t}:{d}" for t, d in shard.tasks),
+        ])
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[tuple]]:
+        found = {
+            key: [tuple(pair) for pair in solution]
+            for key, solution in ShardSolution.objects.filter(fingerprint__in=set(keys))
+            .values_list("fingerprint", "assignments")
+        }
+        for key in keys:
+            if key in found:
+                self.hits += 1
+                self._used.append(key)
+            else:
+                self.misses += 1
+        return found
+
+    def put(self, key: str, solution: List[tuple]) -> None:
+        self._new[key] = [list(pair) for pair in solution]
+
+    def flush(self) -> None:
+        """Store new solutions, refresh the LRU stamp of the hits, evict."""
+        ShardSolution.objects.bulk_create(
+            [ShardSolution(fingerprint=k, assignments=v) for k, v in self._new.items()],
+            batch_size=1000,
+            ignore_conflicts=True,         # a concurrent run stored it first
+        )
+        for i in range(0, len(self._used), 1000):
+            ShardSolution.objects.filter(fingerprint__in=self._used[i:i + 1000]).update(used_at=Now())
+        self._new, self._used = {}, []
+
+        stale = ShardSolution.objects.order_by("-used_at", "-id").values("id")[self.max_entries:]
+        ShardSolution.objects.filter(id__in=stale).delete()
@@ -0,0 +1,117 @@
+"""
+myapp/signals.py
+
+Bookkeeping that has to happen on every Task / Assignment write.
+
+1. Assignment.date (the partition key) always equals its task's date.
+   * pre_save on Assignment copies task.date – this also runs for
+     `loaddata` (raw saves), so fixtures don't need to carry the column.
+   * post_save on Task pushes a changed date down to its assignments. On
+     Postgres the composite FK does the same with ON UPDATE CASCADE; doing
+     it here as well keeps other backends honest.
+
+2. A new Assignment joins the live assignment set (Assignment.generation,
+   see myapp/generations.py) unless it was given a generation explicitly.
+   A publish() waits until the save has committed.
+
+3. The day / week / month rollups (myapp/rollups.py) are told which cells
+   changed: the row's position / worker and "Unassigned" on its date –
+   and, for updates, the old position, worker and date as well.
+
+Bulk writers (`bulk_create`, `.update()`) skip signals and must set the
+date and generation and call `rollups.mark_cells` themselves.
+"""
+
+from django.db.models.expressions import DatabaseDefault
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import generations, rollups
+from .models import Assignment, Task
+from .rollups import POSITION, UNASSIGNED, WORKER
+
+# what a save can change, read before it happens
+OLD_FIELDS = {Task: ("date", "position_id", "duration"), Assignment: ("date", "worker_id")}
+
+
+@receiver(pre_save, sender=Assignment)
+def copy_task_date(sender, instance, raw, **kwargs):
+    if raw:
+        # fixture rows: the Task instance isn't cached, read just the date
+        instance.date = (
+            Task.objects.filter(pk=instance.task_id)
+            .values_list("date", flat=True)
+            .get()
+        )
+    else:
+        instance.date = instance.task.date
+
+
+@receiver(pre_save, sender=Assignment)
+def join_live_generation(sender, instance, **kwargs):
+    if instance._state.adding and isinstance(instance.generation, DatabaseDefault):
+        instance.generation = generations.join_live()     # Assignment.save() is atomic
+
+
+@receiver(pre_save, sender=Task)
+@receiver(pre_save, sender=Assignment)
+def remember_old_values(sender, instance, **kwargs):
+    # an update can move hours *away* from a date, position or worker –
+    # those cells need a refresh too
+    instance._old = (
+        sender.objects.filter(pk=instance.pk).values(*OLD_FIELDS[sender]).first()
+        if instance.pk else None
+    )
+
+
+@receiver(post_save, sender=Task)
+def sync_assignment_dates(sender, instance, created, raw, **kwargs):
+    if created or raw:
+        return
+    # every generation – a staged row must follow its task too
+    (
+        Assignment.all_generations.filter(task=instance)
+        .exclude(date=instance.date)
+        .update(date=instance.date)
+    )
+
+
+def task_cells(day, position_id):
+    return [(day, POSITION, position_id), (day, UNASSIGNED, None)]
+
+
+def assignment_cells(day, worker_id):
+    return [(day, WORKER, worker_id), (day, UNASSIGNED, None)]
+
+
+@receiver(post_save, sender=Task)
+def refresh_task_rollups(sender, instance, created, **kwargs):
+    cells = task_cells(instance.date, instance.position_id)
+    old = getattr(instance, "_old", None)
+    if old:
+        cells += task_cells(old["date"], old["position_id"])
+        if (old["date"], old["duration"]) != (instance.date, instance.duration):
+            # the hours of every worker on the task moved too
+            for worker_id in Assignment.objects.filter(task=instance).values_list("worker_id", flat=True):
+                cells += [(old["date"], WORKER, worker_id), (instance.date, WORKER, worker_id)]
+    rollups.mark_cells(*cells)
+
+
+@receiver(post_save, sender=Assignment)
+def refresh_assignment_rollups(sender, instance, **kwargs):
+    cells = assignment_cells(instance.date, instance.worker_id)
+    old = getattr(instance, "_old", None)
+    if old:
+        cells += assignment_cells(old["date"], old["worker_id"])
+    rollups.mark_cells(*cells)
+
+
+@receiver(post_delete, sender=Task)
+def refresh_rollups_on_task_delete(sender, instance, **kwargs):
+    # its assignments were deleted first, each with its own signal
+    rollups.mark_cells(*task_cells(instance.date, instance.position_id))
+
+
+@receiver(post_delete, sender=Assignment)
+def refresh_rollups_on_assignment_delete(sender, instance, **kwargs):
+    rollups.mark_cells(*assignment_cells(instance.date, instance.worker_id))
@@ -0,0 +1,270 @@
+"""
+myapp/snapshots.py
+
+Point-in-time roster snapshots for offline analysis – heavy reports run
+against a directory of files instead of /api/table/ or Postgres.
+
+Layout
+──────
+    <snapshot>/
+        header.json            dictionaries + array descriptions (small)
+        worker_hours.npy       int32 [workers × dates]
+        position_hours.npy     int32 [positions + 1 × dates]  (last row = no position)
+        unassigned_hours.npy   int32 [dates]
+        tasks.npy              [(id i8, date i4, position i4, duration i4)]
+        assignments.npy        [(id i8, task i8, worker i4, date i4)]
+
+Every array is fixed-width and little-endian. `date`, `position` and
+`worker` inside the arrays are *indexes* into the header's `dates`,
+`positions` and `workers` lists (position -1 = no position); `id` / `task`
+are the real database ids. Dates are the distinct task dates, i.e. the
+day columns of the summary table.
+
+Reading
+───────
+    snap = Snapshot.open("roster-2025-06")       # ms, whatever the size
+    snap.worker_hours[:, -7:].sum(axis=1)        # plain NumPy, memory-mapped
+    cols, rows = snap.table("week", keys=True)   # same rows as /api/table/
+
+Arrays are opened with np.load(mmap_mode="r"): nothing is read until it
+is touched and pages are shared between processes. `table()` reuses
+views.build_rows() with the snapshot's own roster, so it never queries the
+database (Django still has to be set up, e.g. in `manage.py shell`).
+
+NumPy is optional for the rest of the app – only this module needs it.
+"""
+
+import json
+import os
+import shutil
+import tempfile
+from collections import namedtuple
+from datetime import date
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connection, transaction
+from django.utils import timezone
+
+from .models import Assignment, Position, Task, Worker
+from .rollups import DAY, POSITION, WORKER, period_start
+
+try:
+    import numpy as np
+except ImportError:          # optional – see require_numpy()
+    np = None
+
+FORMAT = "roster-snapshot"
+VERSION = 1
+
+TASK_DTYPE = [("id", "<i8"), ("date", "<i4"), ("position", "<i4"), ("duration", "<i4")]
+ASSIGNMENT_DTYPE = [("id", "<i8"), ("task", "<i8"), ("worker", "<i4"), ("date", "<i4")]
+
+# what build_rows() needs from a roster entry
+Member = namedtuple("Member", "id pk name")
+
+
+def require_numpy():
+    if np is None:
+        raise ImproperlyConfigured("Roster snapshots need NumPy: pip install numpy")
+
+
+# ── Writing ──────────────────────────────────────────────────────────────
+
+
+def export_snapshot(path, overwrite: bool = False) -> Dict[str, object]:
+    """
+    Write a snapshot of the current tasks / assignments to directory *path*
+    and return its header. The files appear all at once: they are written
+    to a sibling temp directory that is renamed into place.
+    """
+    require_numpy()
+    path = Path(path)
+    if path.exists() and not overwrite:
+        raise FileExistsError(f"{path} already exists")
+
+    own_transaction = not connection.in_atomic_block
+    with transaction.atomic():
+        if own_transaction and connection.vendor == "postgresql":
+            # every query below sees the same instant
+            with connection.cursor() as cursor:
+                cursor.execute("SET TRANSACTION ISOLATION LEVEL REPEATABLE READ READ ONLY")
+        arrays, header = _collect()
+
+    tmp = Path(tempfile.mkdtemp(prefix=f".{path.name}.", dir=path.parent))
+    try:
+        for name, array in arrays.items():
+            np.save(tmp / f"{name}.npy", array, allow_pickle=False)
+        (tmp / "header.json").write_text(json.dumps(header, indent=1))
+        if path.exists():
+            shutil.rmtree(path)
+        os.replace(tmp, path)
+    except BaseException:
+        shutil.rmtree(tmp, ignore_errors=True)
+        raise
+    return header
+
+
+def _collect():
+    positions = list(Position.objects.order_by("id").values_list("id", "name"))
+    workers = list(Worker.objects.order_by("id").values_list("id", "name", "position_id"))
+    dates = list(Task.objects.order_by("date").values_list("date", flat=True).distinct())
+
+    pos_index = {pk: i for i, (pk, _) in enumerate(positions)}
+    worker_index = {pk: i for i, (pk, _, _) in enumerate(workers)}
+    date_index = {d: i for i, d in enumerate(dates)}
+
+    tasks = np.fromiter(
+        (
+            (pk, date_index[d], pos_index.get(pos, -1), duration)
+            for pk, d, pos, duration in Task.objects.order_by("id")
+            .values_list("id", "date", "position_id", "duration").iterator(chunk_size=10000)
+        ),
+        dtype=TASK_DTYPE,
+    )
+    assignments = np.fromiter(
+        (
+            (pk, task_id, worker_index[worker_id], date_index[d])
+            for pk, task_id, worker_id, d in Assignment.objects.order_by("id")
+            .values_list("id", "task_id", "worker_id", "date").iterator(chunk_size=10000)
+        ),
+        dtype=ASSIGNMENT_DTYPE,
+    )
+
+    # the hour matrices, straight from the two arrays (tasks are sorted by id)
+    n_dates = len(dates)
+    position_hours = np.zeros((len(positions) + 1, n_dates), dtype="<i4")
+    np.add.at(position_hours, (tasks["position"], tasks["date"]), tasks["duration"])  # -1 → last row
+
+    task_row = np.searchsorted(tasks["id"], assignments["task"])
+    worker_hours = np.zeros((len(workers), n_dates), dtype="<i4")
+    np.add.at(worker_hours, (assignments["worker"], assignments["date"]), tasks["duration"][task_row])
+
+    unassigned = ~np.isin(tasks["id"], assignments["task"])
+    unassigned_hours = np.bincount(
+        tasks["date"][unassigned], weights=tasks["duration"][unassigned], minlength=n_dates,
+    ).astype("<i4")
+
+    arrays = {
+        "worker_hours": worker_hours,
+        "position_hours": position_hours,
+        "unassigned_hours": unassigned_hours,
+        "tasks": tasks,
+        "assignments": assignments,
+    }
+    header = {
+        "format": FORMAT,
+        "version": VERSION,
+        "taken_at": timezone.now().isoformat(timespec="seconds"),
+        "dates": [d.isoformat() for d in dates],
+        "positions": {"ids": [pk for pk, _ in positions], "names": [n for _, n in positions]},
+        "workers": {
+            "ids": [pk for pk, _, _ in workers],
+            "names": [n for _, n, _ in workers],
+            "position_ids": [pos for _, _, pos in workers],
+        },
+        "arrays": {
+            name: {"dtype": np.lib.format.dtype_to_descr(a.dtype), "shape": list(a.shape)}
+            for name, a in arrays.items()
+        },
+    }
+    return arrays, header
+
+
+# ── Reading ──────────────────────────────────────────────────────────────
+
+
+class Snapshot:
+    """A snapshot directory, memory-mapped. Open with Snapshot.open(path)."""
+
+    def __init__(self, path, header, arrays):
+        self.path = Path(path)
+        self.header = header
+        self.dates = [date.fromisoformat(d) for d in header["dates"]]
+        self.position_ids = header["positions"]["ids"]
+        self.worker_ids = header["workers"]["ids"]
+        for name, array in arrays.items():
+            setattr(self, name, array)
+
+    @classmethod
+    def open(cls, path) -> "Snapshot":
+        require_numpy()
+        path = Path(path)
+        header = json.loads((path / "header.json").read_text())
+        if header.get("format") != FORMAT or header.get("version") != VERSION:
+            raise ValueError(f"{path} is not a version {VERSION} roster snapshot")
+        arrays = {
+            name: np.load(path / f"{name}.npy", mmap_mode="r", allow_pickle=False)
+            for name in header["arrays"]
+        }
+        return cls(path, header, arrays)
+
+    def roster(self):
+        """The table's row groups, as views.db_roster() would have returned them then."""
+        workers = self.header["workers"]
+        positions = dict(zip(self.header["positions"]["ids"], self.header["positions"]["names"]))
+        groups = {}
+        for pk, name, pos in zip(workers["ids"], workers["names"], workers["position_ids"]):
+            groups.setdefault(pos, []).append(Member(pk, pk, name))
+        roster = [
+            (Member(pos, pos, positions[pos]), groups[pos])
+            for pos in sorted(p for p in groups if p is not None)
+        ]
+        if None in groups:
+            roster.append((None, groups[None]))
+        return roster
+
+    def columns(self, granularity: str = DAY, start: Optional[date] = None,
+                end: Optional[date] = None) -> Tuple[List[str], List[int], int]:
+        """
+        (labels, first date index of each column, index after the last).
+        Like the live table, week and month columns cover their whole
+        period even when *start* / *end* cut into it.
+        """
+        from .views import fmt
+
+        lo = period_start(start, granularity) if start else None
+        labels, starts, stop, last = [], [], 0, None
+        for i, d in enumerate(self.dates):
+            p = period_start(d, granularity)
+            if (lo and p < lo) or (end and p > end):
+                continue
+            if p != last:
+                labels.append(fmt(p, granularity))
+                starts.append(i)
+                last = p
+            stop = i + 1
+        return labels, starts, stop
+
+    def table(self, granularity: str = DAY, start: Optional[date] = None,
+              end: Optional[date] = None, keys: bool = False):
+        """(column labels, rows) – what views.table_data() returned at snapshot time."""
+        from .views import build_rows
+
+        cols, starts, stop = self.columns(granularity, start, end)
+        if not cols:
+            return cols, build_rows(cols, lambda kind, obj: {}, keys, self.roster())
+        offsets = [i - starts[0] for i in starts]
+
+        def summed(matrix):
+            # the selected dates are contiguous – one reduceat per matrix
+            return np.add.reduceat(matrix[..., starts[0]:stop], offsets, axis=-1)
+
+        per_worker = summed(self.worker_hours)
+        per_position = summed(self.position_hours)
+        unassigned = summed(self.unassigned_hours)
+        worker_row = {pk: i for i, pk in enumerate(self.worker_ids)}
+        position_row = {pk: i for i, pk in enumerate(self.position_ids)}
+
+        def cells(values):
+            return {label: int(v) for label, v in zip(cols, values) if v}
+
+        def totals(kind, obj):
+            if kind == WORKER:
+                return cells(per_worker[worker_row[obj.pk]])
+            if kind == POSITION:
+                return cells(per_position[-1 if obj is None else position_row[obj.pk]])
+            return cells(unassigned)
+
+        return cols, build_rows(cols, totals, keys, self.roster())
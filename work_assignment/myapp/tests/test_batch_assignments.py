@@ -0,0 +1,141 @@
+# test_batch_assignments.py
+# ----------------------------------------------------------
+# Tests the batch write endpoint (/api/assignments/batch/):
+# - creates + deletes land together, rollups follow
+# - the 8 h/day cap is checked against existing hours *and*
+#   the rest of the batch; deletes in the batch free hours
+# - any bad item rejects the whole batch, every bad item is
+#   reported with its index
+# - a batch costs the same number of queries for 1 or 25
+#   workers, whether it fits the cap or not
+# - only users allowed to add + delete assignments may post
+# ----------------------------------------------------------
+
+from datetime import date
+
+from django.contrib.auth.models import Permission, User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from myapp.models import Assignment, HoursRollup, Position, Task, Worker
+
+URL = "/api/assignments/batch/"
+DAY = date(2025, 4, 7)
+
+
+class BatchAssignmentTest(TestCase):
+    def setUp(self):
+        user = User.objects.create_user("planner")
+        user.user_permissions.set(Permission.objects.filter(
+            codename__in=["add_assignment", "delete_assignment"]))
+        self.client = APIClient()
+        self.client.force_authenticate(user)
+
+        pos = Position.objects.create(name="Cook")
+        self.ann = Worker.objects.create(name="Ann", position=pos)
+        self.bob = Worker.objects.create(name="Bob", position=pos)
+        # five 3 h tasks on the same day
+        self.tasks = [
+            Task.objects.create(position=pos, date=DAY, duration=3) for _ in range(5)
+        ]
+        self.existing = Assignment.objects.create(task=self.tasks[0], worker=self.ann)   # Ann: 3 h
+
+    def post(self, create=(), delete=()):
+        return self.client.post(URL, {
+            "create": [{"task": t.pk, "worker": w.pk} for t, w in create],
+            "delete": list(delete),
+        }, format="json")
+
+    def ann_hours(self):
+        return HoursRollup.objects.get(
+            granularity="day", period=DAY, kind="worker", ref_id=self.ann.pk).hours
+
+    def test_creates_and_deletes_apply_together(self):
+        resp = self.post(
+            create=[(self.tasks[1], self.ann), (self.tasks[2], self.bob)],
+            delete=[self.existing.pk],
+        )
+        self.assertEqual(resp.status_code, 201, resp.content)
+        self.assertEqual(resp.json()["deleted"], 1)
+        created = Assignment.objects.filter(pk__in=resp.json()["created"])
+        self.assertEqual(
+            sorted(created.values_list("task_id", "worker_id", "date")),
+            [(self.tasks[1].pk, self.ann.pk, DAY), (self.tasks[2].pk, self.bob.pk, DAY)],
+        )
+        self.assertFalse(Assignment.objects.filter(pk=self.existing.pk).exists())
+        self.assertEqual(self.ann_hours(), 3)
+
+    def test_cap_counts_existing_hours_and_the_batch(self):
+        # Ann has 3 h; two more 3 h tasks make 9 h > 8 h – both items blamed
+        resp = self.post(create=[(self.tasks[1], self.ann), (self.tasks[2], self.bob),
+                                 (self.tasks[3], self.ann)])
+        self.assertEqual(resp.status_code, 400)
+        errors = resp.json()["errors"]
+        self.assertEqual([(e["op"], e["index"]) for e in errors], [("create", 0), ("create", 2)])
+        self.assertIn("9 h", errors[0]["message"])
+        # all or nothing – Bob's valid item was not written either
+        self.assertEqual(Assignment.objects.count(), 1)
+
+    def test_deletes_in_the_batch_free_hours(self):
+        resp = self.post(create=[(self.tasks[1], self.ann), (self.tasks[2], self.ann)],
+                         delete=[self.existing.pk])
+        self.assertEqual(resp.status_code, 201, resp.content)
+        self.assertEqual(self.ann_hours(), 6)
+
+    def test_every_bad_item_is_reported(self):
+        ghost = Task(pk=999999)
+        resp = self.post(
+            create=[(ghost, self.ann), (self.tasks[0], self.ann),
+                    (self.tasks[1], self.bob), (self.tasks[1], self.bob)],
+            delete=[999999],
+        )
+        self.assertEqual(resp.status_code, 400)
+        self.assertEqual(
+            [(e["op"], e["index"]) for e in resp.json()["errors"]],
+            [("create", 0), ("create", 1), ("create", 2), ("create", 3), ("delete", 0)],
+        )
+        self.assertEqual(Assignment.objects.count(), 1)
+
+    def test_query_count_does_not_grow_with_batch(self):
+        def items(workers, per_worker):
+            # fresh workers, each given *per_worker* new 3 h tasks on DAY
+            pairs = []
+            for _ in range(workers):
+                worker = Worker.objects.create(name="Temp", position=self.ann.position)
+                pairs += [
+                    (Task.objects.create(position=self.ann.position, date=DAY, duration=3), worker)
+                    for _ in range(per_worker)
+                ]
+            return pairs
+
+        def run(pairs):
+            with CaptureQueriesContext(connection) as ctx:
+                resp = self.post(create=pairs)
+            # SUM(duration) per (worker, date) for the batch's workers
+            cap_checks = [q for q in ctx.captured_queries
+                          if "SUM(" in q["sql"] and '"worker_id" IN' in q["sql"]]
+            return resp.status_code, len(ctx), bool(cap_checks)
+
+        run(items(1, 1))   # warm the user's permission cache
+        for per_worker, status in ((2, 201), (3, 400)):     # 6 h fits, 9 h doesn't
+            one, many = run(items(1, per_worker)), run(items(25, per_worker))
+            self.assertEqual(one[0], status)
+            self.assertTrue(one[2])                          # the cap aggregate ran
+            self.assertEqual(one, many)
+
+    def test_malformed_body(self):
+        self.assertEqual(self.client.post(URL, {}, format="json").status_code, 400)
+        resp = self.client.post(URL, {"create": [{"task": "x"}]}, format="json")
+        self.assertEqual(resp.status_code, 400)
+
+    def test_needs_permission(self):
+        anonymous = APIClient()
+        self.assertIn(anonymous.post(URL, {"delete": [self.existing.pk]}, format="json").status_code,
+                      (401, 403))
+        viewer = APIClient()
+        viewer.force_authenticate(User.objects.create_user("viewer"))
+        self.assertEqual(viewer.post(URL, {"delete": [self.existing.pk]}, format="json").status_code,
+                         403)
+        self.assertTrue(Assignment.objects.filter(pk=self.existing.pk).exists())
@@ -0,0 +1,83 @@
+# test_drilldown.py
+# ----------------------------------------------------------
+# Tests the drill-down endpoints:
+#   /api/workers/<id>/assignments/
+#   /api/positions/<id>/tasks/
+# - keyset pages walk every row exactly once, in (date, id)
+#   order, even with many rows on the same date
+# - each page costs a fixed number of queries
+# - date filters, bad cursors and unknown ids
+# ----------------------------------------------------------
+
+from datetime import date, timedelta
+
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+
+from myapp import rollups
+from myapp.models import Assignment, Position, Task, Worker
+
+
+class DrillDownTest(TestCase):
+    def setUp(self):
+        self.client = Client()
+        self.pos = Position.objects.create(name="Nurse")
+        self.worker = Worker.objects.create(name="Ann", position=self.pos)
+
+        # 10 days × 3 tasks – plenty of (date, id) ties to page through
+        with rollups.deferred():
+            for day in range(10):
+                for _ in range(3):
+                    task = Task.objects.create(
+                        position=self.pos,
+                        date=date(2025, 3, 1) + timedelta(days=day),
+                        duration=2,
+                    )
+                    Assignment.objects.create(task=task, worker=self.worker)
+
+    def walk(self, url, **params):
+        """Follow `next` links to the end; return (all rows, #pages)."""
+        rows, pages = [], 0
+        resp = self.client.get(url, params).json()
+        while True:
+            rows += resp["results"]
+            pages += 1
+            if not resp["next"]:
+                return rows, pages
+            resp = self.client.get(resp["next"]).json()
+
+    def test_worker_pages_cover_everything_in_order(self):
+        rows, pages = self.walk(f"/api/workers/{self.worker.pk}/assignments/", limit=7)
+        self.assertEqual(pages, 5)                       # 30 rows / 7
+        self.assertEqual(len({r["id"] for r in rows}), 30)
+        keys = [(r["date"], r["id"]) for r in rows]
+        self.assertEqual(keys, sorted(keys))
+        self.assertEqual(rows[0]["position"], "Nurse")
+        self.assertEqual(rows[0]["worker"], "Ann")
+
+    def test_position_tasks_with_date_span(self):
+        rows, _ = self.walk(
+            f"/api/positions/{self.pos.pk}/tasks/",
+            start="2025-03-03", end="2025-03-04", limit=4,
+        )
+        self.assertEqual(len(rows), 6)
+        self.assertTrue(all(r["date"] in ("2025-03-03", "2025-03-04") for r in rows))
+        self.assertEqual(rows[0]["workers"], ["Ann"])
+
+    def test_query_count_is_flat(self):
+        url = f"/api/positions/{self.pos.pk}/tasks/"
+        first = self.client.get(url, {"limit": 5}).json()
+        with CaptureQueriesContext(connection) as page_one:
+            self.client.get(url, {"limit": 5})
+        with CaptureQueriesContext(connection) as deep_page:
+            self.client.get(first["next"])
+        # position lookup + page + prefetched workers, wherever we are
+        self.assertEqual(len(page_one), 3)
+        self.assertEqual(len(deep_page), 3)
+
+    def test_bad_input(self):
+        url = f"/api/workers/{self.worker.pk}/assignments/"
+        self.assertEqual(self.client.get(url, {"cursor": "nope"}).status_code, 404)
+        self.assertEqual(self.client.get(url, {"start": "March"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/workers/999999/assignments/").status_code, 404)
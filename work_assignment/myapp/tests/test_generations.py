@@ -0,0 +1,195 @@
+# test_generations.py
+# ----------------------------------------------------------
+# Tests the blue/green assignment sets behind auto_assign_tasks:
+# - a staged set is invisible to the table, the rollups and
+#   Assignment.objects until it is published
+# - publishing deletes nothing and switches rows and rollups
+#   together
+# - prune() removes the replaced rows set-based (no delete
+#   signals) and keeps sets that are still being staged
+# - single saves and the batch API write into the live set
+# - rows added by hand while a run worked are carried over
+#   into the new set, unless they break the cap there; a
+#   write racing publish() is waited for, not lost
+# - only dates whose assignments changed get their rollups
+#   refreshed
+# ----------------------------------------------------------
+
+import threading
+from datetime import date, timedelta
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models.signals import post_delete
+from django.test import TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+from django.utils import timezone
+
+from myapp import generations, rollups
+from myapp.batch import apply_batch
+from myapp.models import Assignment, AssignmentGeneration, Task, Worker
+from myapp.rollups import WEEK, rebuild_all
+from myapp.views import table_data
+
+
+class GenerationTest(TestCase):
+    fixtures = ["unassigned_tasks.json"]
+
+    def setUp(self):
+        self.before = table_data(WEEK)
+        self.old = set(Assignment.objects.values_list("task_id", "worker_id"))
+        # every task of position 1 to worker 10, nothing else
+        self.rows = [
+            (pk, 10, d)
+            for pk, d in Task.objects.filter(position_id=1).values_list("id", "date")
+        ]
+
+    def live(self):
+        return set(Assignment.objects.values_list("task_id", "worker_id"))
+
+    def test_staged_set_is_invisible(self):
+        generations.stage(self.rows)
+        self.assertEqual(self.live(), self.old)
+        self.assertEqual(table_data(WEEK), self.before)
+        self.assertEqual(Assignment.all_generations.count(), len(self.old) + len(self.rows))
+
+    def test_publish_switches_without_deleting(self):
+        generation = generations.stage(self.rows)
+        with CaptureQueriesContext(connection) as ctx:
+            generations.publish(generation)
+        deletes = [q["sql"] for q in ctx.captured_queries if q["sql"].startswith("DELETE")]
+        self.assertFalse([sql for sql in deletes if "myapp_assignment" in sql.split()[2]])
+
+        self.assertEqual(self.live(), {(t, w) for t, w, _ in self.rows})
+        self.assertEqual(generations.live_id(), generation)
+        # the rollups moved with the rows: a full rebuild changes nothing
+        live_week = table_data(WEEK)
+        self.assertNotEqual(live_week, self.before)
+        rebuild_all()
+        self.assertEqual(table_data(WEEK), live_week)
+
+        with self.assertRaises(ValueError):
+            generations.publish(generation)       # already active
+
+    def test_prune_is_set_based(self):
+        deleted = []
+        receiver = lambda **kw: deleted.append(kw["instance"])   # noqa: E731
+        post_delete.connect(receiver, sender=Assignment)
+        self.addCleanup(post_delete.disconnect, receiver, sender=Assignment)
+
+        generations.publish(generations.stage(self.rows))
+        self.assertEqual(generations.prune(), len(self.old))
+        self.assertEqual(deleted, [])
+        self.assertEqual(Assignment.all_generations.count(), len(self.rows))
+        self.assertEqual(
+            list(AssignmentGeneration.objects.values_list("state", flat=True)),
+            [AssignmentGeneration.ACTIVE],
+        )
+
+    def test_prune_keeps_running_stages_only(self):
+        running = generations.stage(self.rows)
+        dead = generations.stage(self.rows)
+        AssignmentGeneration.objects.filter(pk=dead).update(
+            created_at=timezone.now() - generations.STALE_STAGING - timedelta(minutes=1),
+        )
+        self.assertEqual(generations.prune(), len(self.rows))
+        self.assertFalse(AssignmentGeneration.objects.filter(pk=dead).exists())
+        self.assertEqual(Assignment.all_generations.filter(generation=running).count(), len(self.rows))
+        self.assertEqual(self.live(), self.old)
+
+    def test_new_rows_join_live_set(self):
+        generations.publish(generations.stage(self.rows))
+        single = Assignment.objects.create(task_id=205, worker_id=11)
+        batch = apply_batch([(206, 11)], [])
+        self.assertEqual(
+            set(Assignment.objects.filter(pk__in=[single.pk, *batch.created]).values_list("task_id", flat=True)),
+            {205, 206},
+        )
+
+
+    def test_rows_added_during_run_are_carried_over(self):
+        before_run = Assignment.objects.create(task_id=203, worker_id=11)
+        seen_upto = generations.high_water()
+        # while the run works: Bob takes 202 (fits), Alice 207 (7 h + 6 h in
+        # the new set – too much) and 208 (the run gives it to her as well)
+        apply_batch([(202, 11), (207, 10)], [])
+        Assignment.objects.create(task_id=208, worker_id=10)
+
+        switch = generations.publish(generations.stage(self.rows, seen_upto))
+        self.assertEqual(switch, generations.Switch(carried=1, dropped=1))
+        self.assertEqual(self.live(), {(t, w) for t, w, _ in self.rows} | {(202, 11)})
+        self.assertNotIn((before_run.task_id, before_run.worker_id), self.live())
+
+        live_week = table_data(WEEK)
+        rebuild_all()
+        self.assertEqual(table_data(WEEK), live_week)
+
+    def test_only_changed_dates_are_refreshed(self):
+        with mock.patch.object(rollups, "refresh_cells", wraps=rollups.refresh_cells) as refresh:
+            generations.publish(generations.stage(self.rows))
+            self.assertEqual(
+                [sorted({d.day for d, _, _ in call.args[0]}) for call in refresh.call_args_list],
+                [[11, 12, 13]],          # one month, one transaction
+            )
+            refresh.reset_mock()
+            generations.publish(generations.stage(self.rows))      # same set again
+            refresh.assert_not_called()
+
+
+@skipUnless(connection.vendor == "postgresql", "Postgres only")
+class PublishRaceTest(TransactionTestCase):
+    fixtures = ["unassigned_tasks.json"]
+
+    def test_write_in_flight_is_waited_for(self):
+        generation = generations.stage([(200, 10, date(2025, 1, 11))])
+        switched = []
+
+        def publisher():
+            try:
+                switched.append(generations.publish(generation))
+            finally:
+                connection.close()
+
+        with transaction.atomic():
+            Assignment.objects.create(task_id=202, worker_id=11)     # holds the writers' lock
+            thread = threading.Thread(target=publisher)
+            thread.start()
+            thread.join(0.5)
+            self.assertTrue(thread.is_alive())        # publish() waits for the commit
+        thread.join()
+
+        self.assertEqual(switched, [generations.Switch(carried=1, dropped=0)])
+        self.assertEqual(set(Assignment.objects.values_list("task_id", "worker_id")), {(200, 10), (202, 11)})
+
+
+class AllocatorGenerationTest(TestCase):
+    fixtures = ["kpi_fixture.json"]
+
+    def run_allocator(self, *args):
+        out = StringIO()
+        call_command("auto_assign_tasks", *args, stdout=out)
+        return out.getvalue()
+
+    def test_keep_old_then_prune_on_next_run(self):
+        self.run_allocator()
+        live = Assignment.objects.count()
+
+        out = self.run_allocator("--keep-old")
+        self.assertNotIn("Old rows pruned", out)
+        self.assertEqual(Assignment.objects.count(), live)
+        self.assertEqual(Assignment.all_generations.count(), 2 * live)
+
+        out = self.run_allocator()
+        self.assertIn(f"Old rows pruned:  {2 * live}", out)
+        self.assertEqual(Assignment.all_generations.count(), live)
+
+    def test_related_managers_see_live_set_only(self):
+        self.run_allocator()
+        self.run_allocator("--keep-old")
+        worker = Worker.objects.filter(assignments__isnull=False).first()
+        self.assertEqual(
+            worker.assignments.count(),
+            Assignment.all_generations.filter(worker=worker).count() // 2,
+        )
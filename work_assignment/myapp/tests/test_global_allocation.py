@@ -0,0 +1,155 @@
+# test_global_allocation.py
+# ----------------------------------------------------------
+# Tests the global allocation mode (myapp/global_allocation.py):
+# - the min-cost flow finds the cheapest flow on a small
+#   network
+# - a date uses own workers first, spills into the no-position
+#   pool, places position-less tasks there and keeps the cap
+# - a high --overflow-cost keeps tasks off the pool
+# - it never places fewer tasks than the shard heuristic, and
+#   the flow's work (rounds, augmentations) doesn't grow from a
+#   2k- to a 20k-task date
+# - a deadline that passes mid-date stops the solve
+# - auto_assign_tasks --global writes the plan and prints the
+#   drop in unplaced tasks; an empty time budget, or one that
+#   runs out inside a date, falls back to the heuristic
+# ----------------------------------------------------------
+
+import random
+from collections import Counter, defaultdict
+from datetime import date
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.test import SimpleTestCase, TestCase
+
+from myapp.global_allocation import FlowNetwork, OutOfTime, heuristic, solve_day
+from myapp.models import MAX_HOURS_PER_DAY, Assignment, Position, Task, Worker
+
+DAY = date(2025, 4, 7)
+
+
+def hours_per_worker(pairs, tasks):
+    duration = {pk: d for pk, _, d in tasks}
+    hours = defaultdict(int)
+    for task, worker in pairs:
+        hours[worker] += duration[task]
+    return hours
+
+
+class FlowNetworkTest(SimpleTestCase):
+    def test_cheapest_flow(self):
+        net = FlowNetwork()
+        net.add_edge("s", "a", 4, 1)
+        net.add_edge("s", "b", 2, 2)
+        net.add_edge("a", "b", 2, 1)
+        at = net.add_edge("a", "t", 2, 3)
+        bt = net.add_edge("b", "t", 3, 1)
+        # 3 units at cost 3 (into b), then 2 at cost 4 (s → a → t)
+        self.assertEqual(net.solve("s", "t"), 17)
+        self.assertEqual((net.flow(at), net.flow(bt)), (2, 3))
+
+
+class SolveDayTest(SimpleTestCase):
+    # position 1: workers 1, 2 – position 2: worker 3 – pool: workers 8, 9
+    workers = {1: [1, 2], 2: [3], None: [8, 9]}
+
+    def test_own_workers_first_then_pool(self):
+        tasks = [(pk, 1, 4) for pk in range(1, 7)] + [(7, None, 5), (8, 2, 8)]
+        result = solve_day(DAY, tasks, self.workers)
+        placed = dict(result.pairs)
+
+        self.assertEqual(len(placed), 8)
+        self.assertEqual(result.heuristic_placed, 5)
+        self.assertEqual(Counter(placed[pk] for pk in range(1, 7))[1], 2)
+        self.assertEqual(Counter(placed[pk] for pk in range(1, 7))[2], 2)
+        self.assertIn(placed[7], (8, 9))
+        self.assertEqual(placed[8], 3)
+        self.assertEqual(result.overflow, 2)
+        self.assertLessEqual(max(hours_per_worker(result.pairs, tasks).values()), MAX_HOURS_PER_DAY)
+
+    def test_overflow_cost_above_unplaced_keeps_pool_for_position_less(self):
+        tasks = [(pk, 1, 4) for pk in range(1, 7)] + [(7, None, 5)]
+        result = solve_day(DAY, tasks, self.workers, overflow_cost=10 ** 9)
+        self.assertEqual(result.overflow, 0)
+        self.assertEqual(sorted(pk for pk, w in result.pairs if w in (8, 9)), [7])
+
+    def test_never_worse_than_heuristic(self):
+        rng = random.Random(7)
+        for _ in range(40):
+            workers = {pos: list(range(pos * 10, pos * 10 + rng.randint(0, 3))) for pos in range(1, 5)}
+            workers[None] = list(range(100, 100 + rng.randint(0, 3)))
+            tasks = [
+                (pk, rng.choice([1, 2, 3, 4, None]), rng.randint(1, MAX_HOURS_PER_DAY))
+                for pk in range(rng.randint(1, 40))
+            ]
+            result = solve_day(DAY, tasks, workers)
+            self.assertGreaterEqual(len(result.pairs), len(heuristic(DAY, tasks, workers, MAX_HOURS_PER_DAY)))
+            self.assertEqual(len({pk for pk, _ in result.pairs}), len(result.pairs))
+            hours = hours_per_worker(result.pairs, tasks)
+            self.assertLessEqual(max(hours.values(), default=0), MAX_HOURS_PER_DAY)
+
+    def large_day(self, n, per_position):
+        rng = random.Random(1)
+        workers = {pos: list(range(pos * 1000, pos * 1000 + per_position)) for pos in range(1, 101)}
+        workers[None] = list(range(500_000, 500_000 + 10 * per_position))
+        tasks = [
+            (pk, rng.choice([*range(1, 101), None]), rng.randint(1, MAX_HOURS_PER_DAY))
+            for pk in range(n)
+        ]
+        return solve_day(DAY, tasks, workers)
+
+    def test_flow_work_does_not_grow_with_tasks(self):
+        # same load per worker, ten times the tasks: the network has one
+        # node per (position, duration), so the flow does the same work
+        small, large = self.large_day(2_000, 4), self.large_day(20_000, 40)
+        self.assertGreater(len(large.pairs), large.heuristic_placed)
+        self.assertLessEqual(large.flow_rounds, 2 * small.flow_rounds)
+        self.assertLessEqual(large.augmentations, 2 * small.augmentations)
+        # a few thousand (position, duration) classes at most
+        self.assertLess(large.augmentations, 5_000)
+
+    def test_deadline_stops_the_solve(self):
+        tasks = [(pk, 1, 4) for pk in range(1, 7)]
+        with self.assertRaises(OutOfTime):
+            solve_day(DAY, tasks, self.workers, deadline=0)
+
+
+class GlobalCommandTest(TestCase):
+    def setUp(self):
+        nurse = Position.objects.create(name="Nurse")
+        Worker.objects.create(name="Nora", position=nurse)
+        Worker.objects.create(name="Pat")              # the no-position pool
+        # four 4 h nursing tasks for one nurse, and one task without a position
+        for _ in range(4):
+            Task.objects.create(position=nurse, date=DAY, duration=4)
+        Task.objects.create(date=DAY, duration=3)
+
+    def run_allocator(self, *args):
+        out = StringIO()
+        call_command("auto_assign_tasks", "--global", *args, stdout=out)
+        return out.getvalue()
+
+    def test_pool_takes_the_overflow(self):
+        out = self.run_allocator()
+        self.assertIn("Unplaced tasks:   1", out)
+        self.assertIn("vs heuristic:     3 unplaced → 1 (2 fewer, 66.7%)", out)
+        self.assertIn("Pool overflow:    1 tasks", out)
+        self.assertEqual(Assignment.objects.count(), 4)
+        for worker in Worker.objects.all():
+            hours = sum(a.task.duration for a in Assignment.objects.filter(worker=worker))
+            self.assertLessEqual(hours, MAX_HOURS_PER_DAY)
+
+    def test_empty_time_budget_uses_heuristic(self):
+        out = self.run_allocator("--time-budget", "0")
+        self.assertIn("vs heuristic:     3 unplaced → 3 (0 fewer, 0.0%)", out)
+        self.assertIn("Time budget ran out: 1 date(s) used the heuristic", out)
+        self.assertEqual(Assignment.objects.count(), 2)
+
+    def test_budget_running_out_inside_a_date_uses_heuristic(self):
+        # still inside the budget when the date starts, out of it at the first flow round
+        with mock.patch("myapp.global_allocation.check", side_effect=[None, OutOfTime]):
+            out = self.run_allocator()
+        self.assertIn("Time budget ran out: 1 date(s) used the heuristic", out)
+        self.assertEqual(Assignment.objects.count(), 2)
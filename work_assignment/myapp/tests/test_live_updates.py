@@ -0,0 +1,144 @@
+# test_live_updates.py
+# ----------------------------------------------------------
+# Tests the live-table change feed (/api/table/changes/):
+# - committed writes publish only the cells that changed
+# - several changes to one cell are coalesced to the last
+# - long-poll JSON and SSE both deliver the deltas, keyed
+#   like the rows of /api/table/?keys=1
+# - a write's cells are logged in a fixed (sorted) order
+# - ?wait must be a finite number; negatives mean "don't wait"
+# - appends run one at a time, so ids become visible in order
+#   and a reader can't skip past a slow commit (Postgres)
+# ----------------------------------------------------------
+
+import threading
+from datetime import date, timedelta
+from unittest import mock, skipUnless
+
+from django.db import connection, transaction
+from django.test import Client, TestCase, TransactionTestCase
+
+from myapp import changes
+from myapp.models import Assignment, CellChange, Task, Worker
+
+# the feed holds rows back for WINDOW; tests don't want to sleep
+no_window = mock.patch.object(changes, "WINDOW", timedelta(0))
+
+
+@no_window
+class ChangeFeedTest(TestCase):
+    fixtures = ["unassigned_tasks.json"]
+
+    def setUp(self):
+        self.client = Client()
+        self.cursor = changes.latest_cursor()
+
+    def assign(self, task_pk, worker_pk=10):
+        with self.captureOnCommitCallbacks(execute=True):
+            Assignment.objects.create(task=Task.objects.get(pk=task_pk),
+                                      worker=Worker.objects.get(pk=worker_pk))
+
+    def poll(self, **params):
+        params = {"poll": 1, "wait": 0, "after": self.cursor, **params}
+        return self.client.get("/api/table/changes/", params).json()
+
+    def test_only_changed_cells_are_published(self):
+        self.assign(200)   # Alice takes a 3h Analyst task on 11 Jan
+        day = {
+            (c.kind, c.ref_id): c.hours
+            for c in CellChange.objects.filter(granularity="day", period=date(2025, 1, 11))
+        }
+        # Alice went up, Unassigned went down; the Analyst total did not move
+        self.assertEqual(day, {("worker", 10): 3, ("unassigned", None): 8})
+
+        logged = list(CellChange.objects.order_by("id").values_list(
+            "granularity", "period", "kind", "ref_id"))
+        self.assertEqual(logged, sorted(logged, key=changes.cell_order))
+
+    def test_long_poll_returns_coalesced_deltas(self):
+        self.assign(200)
+        self.assign(201)   # same cell again: 3h → 5h
+        res = self.poll()
+        alice = [c for c in res["cells"] if c["key"] == "worker:10"]
+        self.assertEqual(alice, [{"key": "worker:10", "col": "11 Jan", "hours": 5}])
+        # cells are written in sorted order: day rows first, then month, week
+        self.assertEqual(res["cursor"], CellChange.objects.filter(granularity="day").latest("id").pk)
+        self.assertEqual(
+            self.poll(granularity="week")["cursor"], changes.latest_cursor(),
+        )
+        # nothing new after the returned cursor
+        self.assertEqual(self.poll(after=res["cursor"])["cells"], [])
+
+    def test_week_feed_uses_week_labels(self):
+        self.assign(200)
+        cells = self.poll(granularity="week")["cells"]
+        self.assertIn({"key": "worker:10", "col": "w/c 06 Jan 2025", "hours": 3}, cells)
+
+    def test_keys_match_table_rows(self):
+        self.assign(200)
+        keys = {r["key"] for r in self.client.get("/api/table/", {"keys": 1}).json()}
+        self.assertTrue({c["key"] for c in self.poll()["cells"]} <= keys)
+        self.assertNotIn("key", self.client.get("/api/table/").json()[0])
+
+    def test_rolled_back_writes_are_not_published(self):
+        with self.captureOnCommitCallbacks(execute=False) as callbacks:
+            Assignment.objects.create(task_id=200, worker_id=10)
+        # callbacks were captured but never run – as on a rollback
+        self.assertTrue(callbacks)
+        self.assertEqual(self.poll()["cells"], [])
+
+    def test_bad_params(self):
+        self.assertEqual(self.client.get("/api/table/changes/", {"granularity": "year"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/table/changes/", {"after": "x"}).status_code, 400)
+
+    async def test_sse_stream(self):
+        resp = await self.async_client.get(
+            "/api/table/changes/", {"after": 0}, headers={"accept": "text/event-stream"},
+        )
+        self.assertEqual(resp["Content-Type"], "text/event-stream")
+        first = await anext(aiter(resp.streaming_content))
+        self.assertIn(b"event: ready", first)
+        self.assertIn(b"id: 0", first)
+
+    def test_wsgi_gets_single_sse_message(self):
+        self.assign(200)
+        resp = self.client.get(
+            "/api/table/changes/", {"after": self.cursor}, headers={"accept": "text/event-stream"},
+        )
+        body = resp.content.decode()
+        self.assertIn("retry: 1000", body)
+        self.assertIn("event: cells", body)
+        self.assertIn('"worker:10"', body)
+
+    def test_wait_must_be_finite(self):
+        for bad in ("nan", "inf", "-inf", "soon"):
+            self.assertEqual(self.client.get("/api/table/changes/", {"poll": 1, "wait": bad}).status_code, 400)
+        # negative is clamped to 0: answer straight away
+        res = self.client.get("/api/table/changes/", {"poll": 1, "wait": -5, "after": self.cursor})
+        self.assertEqual(res.status_code, 200)
+        self.assertEqual(res.json()["cells"], [])
+
+
+@skipUnless(connection.vendor == "postgresql", "Postgres only")
+class AppendOrderTest(TransactionTestCase):
+    def test_ids_follow_commit_order(self):
+        cell = ("day", date(2025, 1, 6), "unassigned", None)
+        small_done = threading.Event()
+
+        def small_append():
+            try:
+                changes.record([(cell, 1)])
+            finally:
+                small_done.set()
+                connection.close()
+
+        with transaction.atomic():
+            # a big burst, still inserting / not yet committed
+            changes.record([(cell, hours) for hours in range(2, 500)])
+            thread = threading.Thread(target=small_append)
+            thread.start()
+            self.assertFalse(small_done.wait(0.5))    # waits for the burst's commit
+        thread.join()
+
+        in_id_order = list(CellChange.objects.order_by("id").values_list("hours", flat=True))
+        self.assertEqual(in_id_order[-1], 1)          # the small one came last
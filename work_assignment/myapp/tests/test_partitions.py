@@ -0,0 +1,141 @@
+# test_partitions.py
+# ----------------------------------------------------------
+# Tests month partitioning of Task / Assignment:
+# - Assignment.date always mirrors its task's date
+# - On Postgres both tables are partitioned and rows are
+#   routed to the right month
+# - manage_partitions creates future months and archives
+#   old ones out of the live tables
+# - date-bounded aggregates over Assignment ⋈ Task read one
+#   Task month, not all of them
+# ----------------------------------------------------------
+
+import re
+from datetime import date
+from io import StringIO
+from unittest import skipUnless
+
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from myapp import batch, rollups, views
+from myapp.models import Assignment, Position, Task, Worker
+from myapp.partitions import (
+    ARCHIVE_SCHEMA,
+    add_months,
+    create_month_partition,
+    month_partitions,
+    month_start,
+)
+
+on_postgres = skipUnless(connection.vendor == "postgresql", "Postgres only")
+
+
+class AssignmentDateTest(TestCase):
+    fixtures = ["tiny.json"]
+
+    def test_fixture_rows_get_task_date(self):
+        a = Assignment.objects.get(pk=1)
+        self.assertEqual(a.date, a.task.date)
+
+    def test_date_follows_task(self):
+        task = Task.objects.get(pk=1)
+        task.date = date(2000, 2, 3)
+        task.save()
+        self.assertEqual(Assignment.objects.get(pk=1).date, date(2000, 2, 3))
+
+
+@on_postgres
+class PartitionLayoutTest(TestCase):
+    def setUp(self):
+        pos = Position.objects.create(name="Nurse")
+        self.worker = Worker.objects.create(name="Ann", position=pos)
+        self.pos = pos
+
+    def partition_of(self, model, pk):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"SELECT tableoid::regclass::text FROM {model._meta.db_table} "
+                "WHERE id = %s",
+                [pk],
+            )
+            return cursor.fetchone()[0]
+
+    def test_rows_land_in_their_month(self):
+        # the migration always creates the current month
+        today = date.today()
+        task = Task.objects.create(position=self.pos, date=today, duration=3)
+        a = Assignment.objects.create(task=task, worker=self.worker)
+        suffix = f"_p{today:%Y_%m}"
+        self.assertEqual(self.partition_of(Task, task.pk), f"myapp_task{suffix}")
+        self.assertEqual(self.partition_of(Assignment, a.pk), f"myapp_assignment{suffix}")
+
+    def test_command_creates_future_months(self):
+        call_command("manage_partitions", ahead=8, stdout=StringIO())
+        target = add_months(month_start(date.today()), 8)
+        with connection.cursor() as cursor:
+            self.assertIn(target, month_partitions(cursor, "myapp_task"))
+            self.assertIn(target, month_partitions(cursor, "myapp_assignment"))
+
+    def test_old_months_are_archived(self):
+        old = date(1999, 1, 1)
+        with connection.cursor() as cursor:
+            for table in ("myapp_task", "myapp_assignment"):
+                self.assertTrue(create_month_partition(cursor, table, old))
+
+        task = Task.objects.create(position=self.pos, date=date(1999, 1, 5), duration=2)
+        Assignment.objects.create(task=task, worker=self.worker)
+
+        call_command("manage_partitions", retain=12, stdout=StringIO())
+
+        # gone from the live tables…
+        self.assertFalse(Task.objects.filter(pk=task.pk).exists())
+        self.assertFalse(Assignment.objects.filter(task_id=task.pk).exists())
+        # …but kept in the archive schema, and the worker is still deletable
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'SELECT count(*) FROM "{ARCHIVE_SCHEMA}".myapp_task_p1999_01'
+            )
+            self.assertEqual(cursor.fetchone()[0], 1)
+        self.worker.delete()
+
+
+@on_postgres
+class TaskPruningTest(TestCase):
+    JAN, FEB = date(1999, 1, 5), date(1999, 2, 9)
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            for table in ("myapp_task", "myapp_assignment"):
+                for month in (date(1999, 1, 1), date(1999, 2, 1)):
+                    create_month_partition(cursor, table, month)
+        pos = Position.objects.create(name="Nurse")
+        self.worker = Worker.objects.create(name="Ann", position=pos)
+        self.tasks = [Task.objects.create(position=pos, date=d, duration=2) for d in (self.JAN, self.FEB)]
+        Assignment.objects.create(task=self.tasks[0], worker=self.worker)
+
+    def task_months_read(self, run):
+        """The Task partitions in the plans of the aggregates *run* makes."""
+        with CaptureQueriesContext(connection) as queries:
+            run()
+        read = set()
+        for query in queries:
+            if query["sql"].startswith("SELECT") and "SUM(" in query["sql"]:
+                with connection.cursor() as cursor:
+                    cursor.execute("EXPLAIN " + query["sql"])
+                    plan = "\n".join(row[0] for row in cursor.fetchall())
+                read |= set(re.findall(r"myapp_task_p\d{4}_\d{2}", plan))
+        return read
+
+    def test_aggregates_read_one_task_month(self):
+        jan = {"myapp_task_p1999_01"}
+        self.assertEqual(self.task_months_read(
+            lambda: views.totals_for_worker(self.worker, self.JAN, self.JAN)), jan)
+        self.assertEqual(self.task_months_read(
+            lambda: views.unassigned_task_totals(self.JAN, self.JAN)), jan)
+        self.assertEqual(self.task_months_read(lambda: rollups.refresh_days([self.JAN])), jan)
+        task = Task.objects.create(position=self.tasks[0].position, date=self.JAN, duration=1)
+        self.assertEqual(self.task_months_read(
+            lambda: batch.apply_batch([(task.pk, self.worker.pk)], [])), jan)
@@ -0,0 +1,178 @@
+# test_rollups.py
+# ----------------------------------------------------------
+# Tests the ?granularity=day|week|month option of the table
+# API and the pre-computed rollups behind it:
+# - week / month columns roll up the day numbers
+# - writes to Task / Assignment refresh the affected cells,
+#   also the ones an update moves hours away from
+# - a single save rewrites only its own cells, in the same
+#   number of queries however many workers share its date
+# - rebuild_rollups reproduces what the signals maintained
+# - a cell exists once: two refreshes of the same week wait
+#   for each other instead of both inserting it
+# - a cascade delete across months locks each month once, in
+#   order
+# ----------------------------------------------------------
+
+import re
+import threading
+from datetime import date
+from io import StringIO
+from unittest import mock, skipUnless
+
+from django.core.management import call_command
+from django.db import IntegrityError, connection, transaction
+from django.db.models import Sum
+from django.test import Client, TestCase, TransactionTestCase
+from django.test.utils import CaptureQueriesContext
+
+from myapp import rollups
+
+from myapp.models import Assignment, HoursRollup, Position, Task, Worker
+
+
+class RollupTableTest(TestCase):
+    # 11 + 12 Jan 2025 are a Sat / Sun, 13 Jan starts the next week
+    fixtures = ["unassigned_tasks.json"]
+
+    def setUp(self):
+        self.client = Client()
+
+    def rows(self, url="/api/table/", **params):
+        return {r["name"]: r for r in self.client.get(url, params).json()}
+
+    def test_week_columns(self):
+        rows = self.rows(granularity="week")
+        self.assertEqual(rows["Analyst"]["w/c 06 Jan 2025"], 12)   # 5 + 7
+        self.assertEqual(rows["Analyst"]["w/c 13 Jan 2025"], 1)
+        self.assertEqual(rows["Unassigned"]["w/c 06 Jan 2025"], 26)
+
+    def test_month_matches_sum_of_days(self):
+        days = self.rows()
+        month = self.rows(granularity="month")
+        for name, row in days.items():
+            day_total = sum(v for k, v in row.items() if k != "name")
+            self.assertEqual(month[name]["Jan 2025"], day_total)
+
+    def test_drf_endpoint_and_date_span(self):
+        rows = self.rows("/api/new_table/", granularity="day", start="2025-01-12")
+        self.assertNotIn("11 Jan", rows["Analyst"])
+        self.assertEqual(rows["Analyst"]["12 Jan"], 7)
+
+    def test_bad_granularity_is_rejected(self):
+        self.assertEqual(self.client.get("/api/table/", {"granularity": "year"}).status_code, 400)
+        self.assertEqual(self.client.get("/api/new_table/", {"start": "soon"}).status_code, 400)
+
+    def test_writes_refresh_rollups(self):
+        worker = Worker.objects.get(pk=10)
+        Assignment.objects.create(task=Task.objects.get(pk=200), worker=worker)
+        Task.objects.create(position_id=1, date=date(2025, 1, 14), duration=4)
+
+        rows = self.rows(granularity="week")
+        self.assertEqual(rows["Alice"]["w/c 06 Jan 2025"], 3)
+        self.assertEqual(rows["Analyst"]["w/c 13 Jan 2025"], 5)      # 1 + 4
+        self.assertEqual(rows["Unassigned"]["w/c 06 Jan 2025"], 23)  # 26 − 3
+
+        Task.objects.filter(pk=200).delete()
+        self.assertEqual(self.rows(granularity="week")["Alice"]["w/c 06 Jan 2025"], 0)
+
+    def assertMatchesRebuild(self):
+        incremental = set(HoursRollup.objects.values_list(
+            "granularity", "period", "kind", "ref_id", "hours"))
+        call_command("rebuild_rollups", stdout=StringIO())
+        rebuilt = set(HoursRollup.objects.values_list(
+            "granularity", "period", "kind", "ref_id", "hours"))
+        self.assertEqual(incremental, rebuilt)
+
+    def test_rebuild_matches_incremental(self):
+        self.assertMatchesRebuild()
+
+    def test_updates_refresh_the_old_cells_too(self):
+        assignment = Assignment.objects.create(task=Task.objects.get(pk=200), worker_id=10)
+        assignment.worker_id = 11
+        assignment.save()
+
+        task = Task.objects.get(pk=200)
+        task.position_id, task.duration, task.date = None, 9, date(2025, 2, 3)
+        task.save()
+        self.assertMatchesRebuild()
+
+    def test_save_cost_does_not_grow_with_workers(self):
+        position = Position.objects.create(name="Porter")
+        day = date(2025, 3, 4)
+
+        def create_cost():
+            task = Task.objects.create(position=position, date=day, duration=1)
+            worker = Worker.objects.create(name="Pat", position=position)
+            written = mock.patch.object(HoursRollup.objects, "bulk_create",
+                                        wraps=HoursRollup.objects.bulk_create)
+            with CaptureQueriesContext(connection) as queries, written as bulk_create:
+                Assignment.objects.create(task=task, worker=worker)
+            return len(queries), sum(len(call.args[0]) for call in bulk_create.call_args_list)
+
+        few = create_cost()
+        with rollups.deferred():
+            for _ in range(40):
+                create_cost()
+        self.assertEqual(create_cost(), few)
+        self.assertEqual(few[1], 3)       # the worker's day, week and month
+
+    def test_cell_is_unique(self):
+        cell = HoursRollup.objects.filter(kind=HoursRollup.UNASSIGNED).first()
+        cell.pk = None
+        with self.assertRaises(IntegrityError), transaction.atomic():
+            cell.save()
+
+
+class ConcurrentRefreshTest(TransactionTestCase):
+    @skipUnless(connection.vendor == "postgresql", "Postgres only")
+    def test_same_week_refreshes_are_serialised(self):
+        position = Position.objects.create(name="Analyst")
+        monday, tuesday = date(2025, 1, 6), date(2025, 1, 7)
+        done = threading.Event()
+
+        def other_writer():
+            try:
+                Task.objects.create(position=position, date=tuesday, duration=4)
+            finally:
+                done.set()
+                connection.close()
+
+        with transaction.atomic():
+            # refreshes Mon, w/c 06 Jan and Jan 2025 – and keeps them locked
+            Task.objects.create(position=position, date=monday, duration=3)
+            thread = threading.Thread(target=other_writer)
+            thread.start()
+            self.assertFalse(done.wait(0.5))      # Tuesday waits for Monday's commit
+        thread.join()
+
+        cells = list(HoursRollup.objects.values_list("granularity", "period", "kind", "ref_id"))
+        self.assertEqual(len(cells), len(set(cells)))
+        week = HoursRollup.objects.get(granularity="week", kind="position", ref_id=position.pk)
+        self.assertEqual(week.hours, 7)
+        self.assertEqual(
+            HoursRollup.objects.filter(granularity="day").aggregate(h=Sum("hours"))["h"], 2 * 7,
+        )
+
+
+@skipUnless(connection.vendor == "postgresql", "Postgres only")
+class LockOrderTest(TestCase):
+    def test_cascade_locks_each_month_once_in_order(self):
+        position = Position.objects.create(name="Porter")
+        worker = Worker.objects.create(name="Pat", position=position)
+        # the cascade deletes these newest first
+        for day in (date(2025, 1, 6), date(2025, 2, 3), date(2025, 3, 3)):
+            Assignment.objects.create(
+                task=Task.objects.create(position=position, date=day, duration=2), worker=worker,
+            )
+
+        with CaptureQueriesContext(connection) as queries:
+            position.delete()
+        months = [
+            int(m) for q in queries
+            for m in re.findall(r"pg_advisory_xact_lock\(%d, (\d+)\)" % rollups.LOCK_NAMESPACE, q["sql"])
+        ]
+        first_seen = list(dict.fromkeys(months))
+        self.assertEqual(first_seen, sorted(first_seen))
+        self.assertEqual(len(first_seen), 3)
+        self.assertFalse(HoursRollup.objects.exclude(kind=HoursRollup.UNASSIGNED).exists())
@@ -0,0 +1,163 @@
+# test_scenarios.py
+# ----------------------------------------------------------
+# Tests what-if scenarios (myapp/scenarios.py):
+# - "baseline" gives the KPIs auto_assign_tasks would produce
+# - hiring, a lower cap and task changes move the KPIs the
+#   right way; untouched shards are shared, not copied
+# - the process pool gives the same answers as one process
+# - nothing is written, via the command or the API
+# - the API wants the run_scenarios permission and a bounded
+#   date span, checks the scenario shapes and never forks
+# ----------------------------------------------------------
+
+import json
+import sys
+from datetime import date
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import Permission, User
+from django.core.management import call_command
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from myapp.models import Assignment, Position, Task, Worker
+from myapp.scenarios import Scenario, compare, current_kpis, load_base
+
+URL = "/api/scenarios/compare/"
+DAY = date(2025, 4, 7)
+
+
+class ScenarioTest(TestCase):
+    def setUp(self):
+        self.nurse = Position.objects.create(name="Nurse")
+        self.cook = Position.objects.create(name="Cook")
+        Worker.objects.create(name="Nora", position=self.nurse)
+        Worker.objects.create(name="Carl", position=self.cook)
+        # four 4 h nursing tasks for one nurse: two fit, two don't
+        self.tasks = [Task.objects.create(position=self.nurse, date=DAY, duration=4) for _ in range(4)]
+        Task.objects.create(position=self.cook, date=DAY, duration=3)
+
+    def kpis(self, *scenarios, processes=1):
+        return {k.name: k for k in compare(scenarios, processes=processes)}
+
+    def test_baseline_matches_allocator(self):
+        baseline = self.kpis()["baseline"]
+        self.assertEqual((baseline.placed, baseline.unplaced), (3, 2))
+
+        call_command("auto_assign_tasks", verbosity=0, stdout=StringIO())
+        current = current_kpis()
+        self.assertEqual(
+            (current.placed, current.unplaced, current.utilisation, current.fairness),
+            (baseline.placed, baseline.unplaced, baseline.utilisation, baseline.fairness),
+        )
+
+    def test_overlays(self):
+        k = self.kpis(
+            Scenario("hire", hire={self.nurse.pk: 1}),
+            Scenario("cap 7h", capacity=7),
+            Scenario("fewer tasks", remove_tasks={self.tasks[0].pk, self.tasks[1].pk}),
+            Scenario("more tasks", add_tasks=[(DAY, self.cook.pk, 5), (date(2025, 4, 8), self.cook.pk, 2)]),
+        )
+        self.assertEqual((k["hire"].placed, k["hire"].unplaced), (5, 0))
+        self.assertEqual((k["cap 7h"].placed, k["cap 7h"].unplaced), (2, 3))
+        self.assertEqual((k["fewer tasks"].placed, k["fewer tasks"].unplaced), (3, 0))
+        self.assertEqual((k["more tasks"].placed, k["more tasks"].unplaced), (5, 2))
+        # Nora 8 h and Carl 3 h → hiring evens it out a little
+        self.assertGreater(k["hire"].fairness, k["baseline"].fairness)
+
+    def test_untouched_shards_are_shared(self):
+        base = load_base()
+        shards = list(Scenario("hire", hire={self.nurse.pk: 2}).shards(base))
+        by_position = {s.position_id: s for s in shards}
+        original = {s.position_id: s for s in base.shards}
+        self.assertIs(by_position[self.cook.pk], original[self.cook.pk])
+        self.assertIsNot(by_position[self.nurse.pk], original[self.nurse.pk])
+        self.assertEqual(original[self.nurse.pk].workers, [Worker.objects.get(name="Nora").pk])
+
+    def test_pool_matches_single_process(self):
+        scenarios = [Scenario("hire", hire={self.nurse.pk: 1}), Scenario("cap 6h", capacity=6)]
+        self.assertEqual(compare(scenarios, processes=3), compare(scenarios, processes=1))
+
+    def test_command_writes_nothing(self):
+        Assignment.objects.create(task=self.tasks[0], worker=Worker.objects.get(name="Nora"))
+        spec = json.dumps({"scenarios": [{"name": "hire", "hire": {str(self.nurse.pk): 1}}]})
+        out = StringIO()
+        with CaptureQueriesContext(connection) as ctx:
+            self.run_with_stdin(spec, out, "--json")
+        writes = [q["sql"] for q in ctx.captured_queries
+                  if q["sql"].split()[0].upper() in ("INSERT", "UPDATE", "DELETE")]
+        self.assertEqual(writes, [])
+
+        rows = json.loads(out.getvalue())
+        self.assertEqual([r["name"] for r in rows], ["current", "baseline", "hire"])
+        self.assertEqual(rows[0]["placed"], 1)
+        self.assertEqual(Assignment.objects.count(), 1)
+
+    def run_with_stdin(self, text, out, *args):
+        stdin, sys.stdin = sys.stdin, StringIO(text)
+        try:
+            call_command("what_if", "-", *args, stdout=out)
+        finally:
+            sys.stdin = stdin
+
+    def test_command_table(self):
+        out = StringIO()
+        self.run_with_stdin('[{"name": "cap 7h", "capacity": 7}]', out)
+        lines = out.getvalue().splitlines()
+        self.assertEqual(lines[0].split(), ["current", "baseline", "cap", "7h"])
+        self.assertEqual(lines[2].split(), ["Unplaced", "5", "2", "3"])
+
+    def planner(self):
+        client = APIClient()
+        user = User.objects.create_user("planner")
+        user.user_permissions.add(Permission.objects.get(codename="run_scenarios"))
+        client.force_authenticate(user)
+        return client
+
+    def test_api(self):
+        body = {"start": "2025-04-01", "end": "2025-04-30",
+                "scenarios": [{"name": "hire", "hire": {str(self.nurse.pk): 1}}]}
+        anonymous, viewer = APIClient(), APIClient()
+        viewer.force_authenticate(User.objects.create_user("viewer"))
+        self.assertEqual(anonymous.post(URL, body, format="json").status_code, 403)
+        self.assertEqual(viewer.post(URL, body, format="json").status_code, 403)
+
+        planner = self.planner()
+        # solved in the web worker itself – no process pool
+        with mock.patch("myapp.scenarios.ProcessPoolExecutor", side_effect=AssertionError("forked")):
+            resp = planner.post(URL, body, format="json")
+        self.assertEqual(resp.status_code, 200)
+        self.assertEqual(
+            [(s["name"], s["unplaced"]) for s in resp.json()["scenarios"]],
+            [("current", 5), ("baseline", 2), ("hire", 0)],
+        )
+
+        bad = planner.post(URL, {**body, "scenarios": [{"name": "baseline"}, {"name": "x", "capacity": 0}]},
+                           format="json")
+        self.assertEqual(bad.status_code, 400)
+        self.assertIn("scenarios", bad.json())
+
+    def test_api_needs_a_bounded_span(self):
+        client = self.planner()
+        scenarios = [{"name": "cap 7h", "capacity": 7}]
+        for span in ({}, {"start": "2025-04-01"}, {"start": "2025-01-01", "end": "2025-12-31"},
+                     {"start": "2025-04-30", "end": "2025-04-01"}):
+            resp = client.post(URL, {**span, "scenarios": scenarios}, format="json")
+            self.assertEqual(resp.status_code, 400, span)
+
+        outside = [{"name": "x", "add_tasks": [{"date": "2025-05-02", "position": self.nurse.pk,
+                                                "duration": 2}]}]
+        resp = client.post(URL, {"start": "2025-04-01", "end": "2025-04-30", "scenarios": outside},
+                           format="json")
+        self.assertEqual(resp.status_code, 400)
+
+        # only the span is loaded and counted
+        resp = client.post(URL, {"start": "2025-04-08", "end": "2025-04-30", "scenarios": scenarios},
+                           format="json")
+        self.assertEqual(
+            [(s["name"], s["placed"], s["unplaced"]) for s in resp.json()["scenarios"]],
+            [("current", 0, 0), ("baseline", 0, 0), ("cap 7h", 0, 0)],
+        )
@@ -0,0 +1,74 @@
+# test_shard_cache.py
+# ----------------------------------------------------------
+# Tests the shard result cache of auto_assign_tasks:
+# - a rerun on unchanged data reuses every shard and gives
+#   the same assignments as solving from scratch
+# - changing one task only re-solves its (date, position)
+# - hit / miss counts are printed with the KPIs
+# - the cache is trimmed to its size, least recently used
+#   first
+# ----------------------------------------------------------
+
+from datetime import datetime, timezone
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from myapp.allocation import SOLVER_VERSION, load_shards, make_plan
+from myapp.models import MAX_HOURS_PER_DAY, Assignment, ShardSolution, Task
+from myapp.shard_cache import ShardCache
+
+
+class ShardCacheTest(TestCase):
+    fixtures = ["kpi_fixture.json"]
+
+    def run_allocator(self, *args):
+        out = StringIO()
+        call_command("auto_assign_tasks", *args, stdout=out)
+        return out.getvalue()
+
+    def assigned(self):
+        return set(Assignment.objects.values_list("task_id", "worker_id", "date"))
+
+    def test_rerun_hits_every_shard(self):
+        shards = len(list(load_shards()))
+        first = self.run_allocator()
+        self.assertIn(f"Shard cache:      0 hits / {shards} misses", first)
+        result = self.assigned()
+
+        second = self.run_allocator()
+        self.assertIn(f"Shard cache:      {shards} hits / 0 misses (100.0% reused)", second)
+        self.assertEqual(self.assigned(), result)
+
+        self.run_allocator("--no-cache")
+        self.assertEqual(self.assigned(), result)
+
+    def test_only_changed_shards_are_solved(self):
+        self.run_allocator()
+        task = Task.objects.filter(position__isnull=False).first()
+        Task.objects.filter(pk=task.pk).update(duration=task.duration + 1)
+
+        out = self.run_allocator()
+        shards = len(list(load_shards()))
+        self.assertIn(f"Shard cache:      {shards - 1} hits / 1 misses", out)
+
+        cached = self.assigned()
+        self.run_allocator("--no-cache")
+        self.assertEqual(self.assigned(), cached)
+
+    def test_no_cache_leaves_cache_alone(self):
+        out = self.run_allocator("--no-cache")
+        self.assertNotIn("Shard cache", out)
+        self.assertFalse(ShardSolution.objects.exists())
+
+    def test_lru_eviction(self):
+        s0, s1, s2 = list(load_shards())[:3]
+        make_plan([s0, s1], cache=ShardCache())
+        ShardSolution.objects.update(used_at=datetime(2000, 1, 1, tzinfo=timezone.utc))
+        make_plan([s0], cache=ShardCache())                   # s0 used again, s1 not
+        make_plan([s2], cache=ShardCache(max_entries=2))      # full: s1 goes
+
+        key = lambda s: ShardCache.fingerprint(s, MAX_HOURS_PER_DAY, SOLVER_VERSION)
+        self.assertEqual(
+            set(ShardSolution.objects.values_list("fingerprint", flat=True)), {key(s0), key(s2)})
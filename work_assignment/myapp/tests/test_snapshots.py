@@ -0,0 +1,80 @@
+# test_snapshots.py
+# ----------------------------------------------------------
+# Tests roster snapshots (export_snapshot + Snapshot):
+# - the arrays are memory-mapped, not loaded
+# - table() from a snapshot matches the live table for day /
+#   week / month and date spans, without touching the DB
+# - a snapshot is frozen: later writes don't show up
+# - an existing directory is only replaced with --overwrite
+# (skipped when NumPy isn't installed)
+# - without NumPy the command stops with a clear error
+# ----------------------------------------------------------
+
+import tempfile
+from datetime import date
+from io import StringIO
+from pathlib import Path
+from unittest import mock, skipIf
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from myapp import snapshots
+from myapp.models import Assignment, Task, Worker
+from myapp.views import table_data
+
+
+@skipIf(snapshots.np is None, "NumPy not installed")
+class SnapshotTest(TestCase):
+    fixtures = ["unassigned_tasks.json", "empty_position.json"]
+
+    def setUp(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        self.path = Path(tmp.name) / "snap"
+        out = StringIO()
+        call_command("export_snapshot", str(self.path), stdout=out)
+        self.output = out.getvalue()
+        self.snap = snapshots.Snapshot.open(self.path)
+
+    def test_files_and_mmap(self):
+        self.assertIn("Snapshot written", self.output)
+        self.assertTrue((self.path / "header.json").exists())
+        self.assertIsInstance(self.snap.worker_hours, snapshots.np.memmap)
+        self.assertEqual(len(self.snap.tasks), Task.objects.count())
+        self.assertEqual(self.snap.assignments["task"].tolist(),
+                         list(Assignment.objects.order_by("id").values_list("task_id", flat=True)))
+
+    def test_table_matches_live(self):
+        for params in (
+            {},
+            {"keys": True},
+            {"granularity": "week"},
+            {"granularity": "month"},
+            {"start": date(2025, 1, 12)},
+            {"granularity": "week", "start": date(2025, 1, 12), "end": date(2025, 1, 13)},
+        ):
+            with self.subTest(**params), self.assertNumQueries(0):
+                snap = self.snap.table(**params)
+            self.assertEqual(snap, table_data(**params))
+
+    def test_snapshot_is_frozen(self):
+        before = self.snap.table()
+        Assignment.objects.create(task=Task.objects.get(pk=200), worker=Worker.objects.get(pk=10))
+        self.assertEqual(self.snap.table(), before)
+        self.assertNotEqual(table_data(), before)
+
+    def test_overwrite(self):
+        with self.assertRaises(CommandError):
+            call_command("export_snapshot", str(self.path), stdout=StringIO())
+        Task.objects.filter(pk=200).delete()
+        call_command("export_snapshot", str(self.path), overwrite=True, stdout=StringIO())
+        self.assertEqual(len(snapshots.Snapshot.open(self.path).tasks), Task.objects.count())
+
+
+class WithoutNumpyTest(TestCase):
+    def test_command_says_what_is_missing(self):
+        with tempfile.TemporaryDirectory() as tmp, mock.patch.object(snapshots, "np", None):
+            with self.assertRaisesMessage(CommandError, "need NumPy"):
+                call_command("export_snapshot", str(Path(tmp) / "snap"), stdout=StringIO())
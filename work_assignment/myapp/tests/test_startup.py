@@ -0,0 +1,78 @@
+# test_startup.py
+# ----------------------------------------------------------
+# Tests the start-up path stays lean:
+# - cron commands and the URLconf don't import DRF or the
+#   views; they load on the first request that needs them
+# - every cron command runs only the model checks (CronCommand)
+# - lazily loaded views still behave (CSRF exemption of the
+#   DRF views, async change feed)
+# - startup_benchmark measures and records against a budget
+# ----------------------------------------------------------
+
+import json
+import subprocess
+import sys
+import tempfile
+from io import StringIO
+from pathlib import Path
+
+from django.conf import settings
+from django.core.checks import Tags
+from django.core.management import call_command, load_command_class
+from django.test import TestCase
+from django.urls import resolve
+
+from myapp.management.base import CronCommand
+
+
+def modules_after(code):
+    """sys.modules of a fresh interpreter after running *code*."""
+    done = subprocess.run(
+        [sys.executable, "-c", f"{code}\nimport json, sys; print(json.dumps(sorted(sys.modules)))"],
+        capture_output=True, text=True, cwd=settings.BASE_DIR, check=True,
+    )
+    return set(json.loads(done.stdout.splitlines()[-1]))
+
+
+class StartupTest(TestCase):
+    def test_cron_command_path_skips_drf_and_views(self):
+        loaded = modules_after(
+            "from django.core.management import execute_from_command_line\n"
+            "execute_from_command_line(['manage.py', 'check', '--tag', 'models'])"
+        )
+        self.assertIn("myapp.models", loaded)
+        for heavy in ("rest_framework.views", "myapp.api", "myapp.views", "myapp.urls"):
+            self.assertNotIn(heavy, loaded)
+
+    def test_cron_commands_run_only_model_checks(self):
+        for name in ("auto_assign_tasks", "rebuild_rollups", "manage_partitions",
+                     "export_snapshot", "what_if"):
+            command = load_command_class("myapp", name)
+            self.assertIsInstance(command, CronCommand, name)
+            self.assertEqual(command.requires_system_checks, [Tags.models])
+
+    def test_urlconf_loads_no_views(self):
+        loaded = modules_after(
+            "import django; django.setup()\n"
+            "from django.urls import get_resolver; get_resolver().url_patterns"
+        )
+        self.assertIn("myapp.urls", loaded)
+        self.assertNotIn("rest_framework.views", loaded)
+        self.assertNotIn("myapp.views", loaded)
+
+    def test_lazy_views_keep_their_flags(self):
+        self.assertTrue(resolve("/api/assignments/batch/").func.csrf_exempt)
+        self.assertFalse(resolve("/api/table/").func.csrf_exempt)
+        # the change feed is still served as an async view
+        self.assertEqual(self.client.get("/api/table/changes/", {"poll": 1, "wait": 0}).status_code, 200)
+
+    def test_benchmark_reports_and_records(self):
+        out = StringIO()
+        with tempfile.TemporaryDirectory() as tmp:
+            record = Path(tmp) / "bench.jsonl"
+            call_command("startup_benchmark", repeat=1, url="/admin/login/",
+                         record=str(record), stdout=out)
+            line = json.loads(record.read_text())
+        self.assertEqual(set(line["median_ms"]), {"command", "check", "first hit"})
+        self.assertIn("django", line["imports_ms"])
+        self.assertIn("Import time by package", out.getvalue())
@@ -1,11 +1,44 @@
 # myapp/urls.py
+from functools import cache
+from importlib import import_module
+
 from django.urls import path
-from .views import table_api, table_page
 from django.views.generic import TemplateView
-from .views import TableAPI
+
+# Views are imported on their first request, not when the URLconf loads:
+# system checks of every management command load the URLconf, and a
+# fresh worker shouldn't import DRF before a request actually needs it.
+# Whatever Django inspects *before* calling the view (CSRF exemption,
+# sync vs async) has to be declared here.
+
+
+@cache
+def _load(dotted):
+    module, name = dotted.rsplit(".", 1)
+    view = getattr(import_module(module), name)
+    return view.as_view() if hasattr(view, "as_view") else view
+
+
+def lazy_view(dotted, *, csrf_exempt=False, is_async=False):
+    if is_async:
+        async def view(request, *args, **kwargs):
+            return await _load(dotted)(request, *args, **kwargs)
+    else:
+        def view(request, *args, **kwargs):
+            return _load(dotted)(request, *args, **kwargs)
+    view.csrf_exempt = csrf_exempt      # DRF views do their own CSRF check
+    view.__name__ = dotted
+    return view
+
+
+def drf_view(dotted):
+    return lazy_view(f"myapp.api.{dotted}", csrf_exempt=True)
+
+
+table_page = lazy_view("myapp.views.table_page")
 
 urlpatterns = [
-    path("api/new_table/", TableAPI.as_view()),
+    path("api/new_table/", drf_view("TableAPI")),
     # Main landing page – shows the table in HTML
     path("", table_page, name="home"),
 
@@ -17,5 +50,23 @@ urlpatterns = [
     path("table/", table_page, name="table_page"),
 
     # API endpoint that returns the table data as JSON (used by frontend or tests)
-    path("api/table/", table_api, name="table_api"),
+    path("api/table/", lazy_view("myapp.views.table_api"), name="table_api"),
+
+    # Live updates for open table pages (SSE, or ?poll=1 long-poll)
+    path("api/table/changes/", lazy_view("myapp.views.table_changes", is_async=True),
+         name="table_changes"),
+
+    # Drill-down: the rows behind one worker / position of the table
+    path("api/workers/<int:pk>/assignments/", drf_view("WorkerAssignmentsAPI"),
+         name="worker_assignments"),
+    path("api/positions/<int:pk>/tasks/", drf_view("PositionTasksAPI"),
+         name="position_tasks"),
+
+    # Bulk create / delete of assignments (all or nothing, 8 h cap checked)
+    path("api/assignments/batch/", drf_view("AssignmentBatchAPI"),
+         name="assignment_batch"),
+
+    # What-if allocation scenarios, compared side by side (read-only)
+    path("api/scenarios/compare/", drf_view("ScenarioCompareAPI"),
+         name="scenario_compare"),
 ]
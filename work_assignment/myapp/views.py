@@ -10,144 +10,256 @@ WHAT THIS FILE DOES
 3. Exposes the data in two flavours:
       • /api/table/   → JSON (for tests / export)
       • /table/       → HTML  (for humans)
+   (/api/new_table/ serves the same JSON through DRF – see myapp/api.py;
+   nothing here imports rest_framework, so processes that never serve
+   those endpoints never load it.)
+4. Every flavour takes the same optional query string:
+      ?granularity=day|week|month   (default day)
+      ?start=YYYY-MM-DD&end=YYYY-MM-DD
+   Day columns are aggregated live from Task / Assignment; week and month
+   columns are read from the pre-computed rollups (myapp/rollups.py).
+   ?keys=1 adds a stable "key" to each row (e.g. "worker:7").
+5. Streams changed cells to open pages:
+      • /api/table/changes/ → SSE (or JSON long-poll) of cell deltas
 """
 
-from collections import OrderedDict
+import asyncio
+import json
+import math
+import time
+from collections import OrderedDict, defaultdict
 from datetime import date
-from typing import List, Dict
+from typing import Callable, List, Dict, Optional, Tuple
 
-from django.db.models import Sum
-from django.http import JsonResponse
+from asgiref.sync import sync_to_async
+from django.core.handlers.asgi import ASGIRequest
+from django.db.models import Exists, OuterRef, Sum
+from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
 from django.shortcuts import render
 from django.views.decorators.http import require_GET
 
-from .models import Assignment, Position, Task, Worker
+from . import changes
+from .models import Assignment, HoursRollup, Position, Task, Worker
+from .rollups import DAY, GRANULARITIES, MONTH, POSITION, UNASSIGNED, WEEK, WORKER, period_start
 
-from rest_framework.views import APIView          
-from rest_framework.response import Response
+# (kind, Position / Worker / None) → {column label: hours}
+Totals = Callable[[str, object], Dict[str, int]]
 
-class TableAPI(APIView):
-    authentication_classes = []
-    permission_classes = []
+# [(Position or None, [Worker, …]), …] – the row groups of the table
+Roster = List[Tuple[Optional[object], List[object]]]
 
-    def get(self, request):
-        cols = date_columns()
-        data = build_rows(cols)
-        return Response(data)
 
 # ── Helpers ──────────────────────────────────────────────────────────────
 
 
-def fmt(d: date) -> str:
-    """Convert 2000‑01‑11 → '11 Jan' (short & human‑friendly)."""
+def fmt(d: date, granularity: str = DAY) -> str:
+    """Column label: day '11 Jan', week 'w/c 06 Jan 2025', month 'Jan 2000'."""
+    if granularity == WEEK:
+        return d.strftime("w/c %d %b %Y")
+    if granularity == MONTH:
+        return d.strftime("%b %Y")
     return d.strftime("%d %b")
 
 
-def date_columns() -> List[str]:
+def in_span(qs, field: str, start: Optional[date] = None, end: Optional[date] = None):
+    """Limit *qs* to start ≤ field ≤ end (either bound may be None)."""
+    if start:
+        qs = qs.filter(**{f"{field}__gte": start})
+    if end:
+        qs = qs.filter(**{f"{field}__lte": end})
+    return qs
+
+
+def table_params(request) -> Dict[str, object]:
+    """Read ?granularity=&start=&end=&keys= – raises ValueError on bad input."""
+    granularity = request.GET.get("granularity", DAY)
+    if granularity not in GRANULARITIES:
+        raise ValueError(f"granularity must be one of {', '.join(GRANULARITIES)}")
+
+    bounds = []
+    for key in ("start", "end"):
+        raw = request.GET.get(key)
+        try:
+            bounds.append(date.fromisoformat(raw) if raw else None)
+        except ValueError:
+            raise ValueError(f"{key} must be a YYYY-MM-DD date")
+    start, end = bounds
+    keys = request.GET.get("keys") in ("1", "true")
+    return {"granularity": granularity, "start": start, "end": end, "keys": keys}
+
+
+def row_key(kind: str, ref_id: Optional[int]) -> str:
+    """Stable row id: 'position:3', 'worker:7', 'position:' (no position), 'unassigned:'."""
+    return f"{kind}:{'' if ref_id is None else ref_id}"
+
+
+def date_columns(start: Optional[date] = None, end: Optional[date] = None) -> List[str]:
     """Return all distinct task dates (oldest → newest) already formatted."""
     qs = (
-        Task.objects.order_by("date")
+        in_span(Task.objects, "date", start, end)
+        .order_by("date")
         .values_list("date", flat=True)
         .distinct()
     )
     return [fmt(d) for d in qs]
 
 
-def totals_for_position(pos: Position) -> Dict[str, int]:
-    """Sum duration of tasks belonging to *one* position, grouped by date."""
+def totals_for_position(pos: Optional[Position], start=None, end=None) -> Dict[str, int]:
+    """Sum duration of tasks belonging to *one* position (None = no position), grouped by date."""
     return {
         fmt(r["date"]): r["total"]
         for r in (
-            Task.objects.filter(position=pos)
+            in_span(Task.objects.filter(position=pos), "date", start, end)
             .values("date")
             .annotate(total=Sum("duration"))
         )
     }
 
 
-def totals_for_worker(w: Worker) -> Dict[str, int]:
+def totals_for_worker(w: Worker, start=None, end=None) -> Dict[str, int]:
     """Sum duration of tasks assigned to *one* worker, grouped by date."""
+    # group on Assignment.date (the partition key) rather than task__date;
+    # the same bounds on task__date let Postgres prune Task partitions too
+    qs = in_span(Assignment.objects.filter(worker=w), "date", start, end)
     return {
-        fmt(r["task__date"]): r["total"]
+        fmt(r["date"]): r["total"]
         for r in (
-            Assignment.objects.filter(worker=w)
-            .values("task__date")
+            in_span(qs, "task__date", start, end)
+            .values("date")
             .annotate(total=Sum("task__duration"))
         )
     }
 
 
-def unassigned_task_totals() -> Dict[str, int]:
+def unassigned_task_totals(start=None, end=None) -> Dict[str, int]:
     """Sum duration of tasks that have NO assignment."""
     return {
         fmt(r["date"]): r["total"]
         for r in (
-            Task.objects.exclude(
-                id__in=Assignment.objects.values("task_id")
-            )
+            in_span(Task.objects, "date", start, end)
+            .exclude(assigned())
             .values("date")
             .annotate(total=Sum("duration"))
         )
     }
 
 
+def assigned():
+    """
+    "Task has an assignment", for Task.objects.filter() / .exclude(). Matched
+    on (task_id, date) – the composite FK – so each probe reads one
+    Assignment month partition.
+    """
+    return Exists(Assignment.objects.filter(task_id=OuterRef("pk"), date=OuterRef("date")))
+
+
+def live_totals(start: Optional[date] = None, end: Optional[date] = None) -> Totals:
+    """Cell source for build_rows that aggregates raw tasks (day columns)."""
+    def totals(kind, obj):
+        if kind == POSITION:
+            return totals_for_position(obj, start, end)
+        if kind == WORKER:
+            return totals_for_worker(obj, start, end)
+        return unassigned_task_totals(start, end)
+    return totals
+
+
+def rollup_totals(granularity: str, start=None, end=None) -> Tuple[List[str], Totals]:
+    """
+    Column labels + cell source for build_rows, read from HoursRollup.
+
+    One query loads every cell in range; periods that merely overlap
+    start / end are included whole.
+    """
+    qs = HoursRollup.objects.filter(granularity=granularity)
+    qs = in_span(qs, "period", start and period_start(start, granularity), end)
+
+    cells = defaultdict(dict)   # (kind, ref_id) → {label: hours}
+    periods = set()
+    for kind, ref_id, period, hours in qs.values_list("kind", "ref_id", "period", "hours"):
+        cells[(kind, ref_id)][fmt(period, granularity)] = hours
+        periods.add(period)
+
+    def totals(kind, obj):
+        return cells.get((kind, obj.pk if obj else None), {})
+
+    return [fmt(p, granularity) for p in sorted(periods)], totals
+
+
+def table_data(granularity: str = DAY, start=None, end=None,
+               keys: bool = False) -> Tuple[List[str], List[OrderedDict]]:
+    """(column labels, rows) for the requested granularity and date span."""
+    if granularity == DAY:
+        cols = date_columns(start, end)
+        return cols, build_rows(cols, live_totals(start, end), keys)
+    cols, totals = rollup_totals(granularity, start, end)
+    return cols, build_rows(cols, totals, keys)
+
+
 # ── Core aggregation ─────────────────────────────────────────────────────
 
 
-def build_rows(cols: List[str]) -> List[OrderedDict]:
-    """Return one OrderedDict per table row (positions first, then workers)."""
+def db_roster() -> Roster:
+    """
+    The table's row groups, in display order: (position, its workers) for
+    every position that has workers, then (None, workers without a
+    position) when there are any.
+    """
+    groups: Roster = [
+        (pos, list(pos.workers.order_by("id")))
+        for pos in Position.objects.filter(workers__isnull=False).distinct().order_by("id")
+    ]
+    no_pos_workers = list(Worker.objects.filter(position__isnull=True).order_by("id"))
+    if no_pos_workers:
+        groups.append((None, no_pos_workers))
+    return groups
+
+
+def build_rows(cols: List[str], totals: Optional[Totals] = None,
+               keys: bool = False, roster: Optional[Roster] = None) -> List[OrderedDict]:
+    """
+    Return one OrderedDict per table row (positions first, then workers).
+
+    *totals* supplies the cells – live day aggregates by default, or a
+    rollup reader from rollup_totals(). *keys* adds each row's row_key().
+    *roster* replaces db_roster() – anything with .id / .pk / .name will
+    do, e.g. the rows of a roster snapshot (myapp/snapshots.py).
+    """
+    totals = totals or live_totals()
     rows: List[OrderedDict] = []
 
-    # 1. regular positions (those that actually have workers)
-    for pos in (
-        Position.objects.filter(workers__isnull=False)
-        .distinct()
-        .order_by("id")
-    ):
+    def new_row(name: str, kind: str, ref_id: Optional[int]) -> OrderedDict:
+        row = OrderedDict(name=name)
+        if keys:
+            row["key"] = row_key(kind, ref_id)
+        return row
+
+    # 1. regular positions (those that actually have workers), then
+    # 2. workers WITHOUT a position  → "(No Position)" pseudo‑group
+    for pos, workers in (db_roster() if roster is None else roster):
         # --- position row ------------------------------------------------
-        p_row = OrderedDict(name=pos.name)
-        p_totals = totals_for_position(pos)
+        if pos is None:
+            # group row (tasks whose position is NULL)
+            p_row = new_row("(No Position)", POSITION, None)
+        else:
+            p_row = new_row(pos.name, POSITION, pos.id)
+        p_totals = totals(POSITION, pos)
         for d in cols:
             p_row[d] = p_totals.get(d, 0)
         rows.append(p_row)
 
         # --- worker rows -------------------------------------------------
-        for w in pos.workers.order_by("id"):
-            w_row = OrderedDict(name=w.name)
-            w_totals = totals_for_worker(w)
-            for d in cols:
-                w_row[d] = w_totals.get(d, 0)
-            rows.append(w_row)
-
-    # 2. workers WITHOUT a position  → "(No Position)" pseudo‑group
-    no_pos_workers = Worker.objects.filter(position__isnull=True).order_by("id")
-    if no_pos_workers.exists():
-        # group row (tasks whose position is NULL)
-        group_row = OrderedDict(name="(No Position)")
-        group_totals = {
-            fmt(r["date"]): r["total"]
-            for r in (
-                Task.objects.filter(position__isnull=True)
-                .values("date")
-                .annotate(total=Sum("duration"))
-            )
-        }
-        for d in cols:
-            group_row[d] = group_totals.get(d, 0)
-        rows.append(group_row)
-
-        # individual worker rows
-        for w in no_pos_workers:
-            w_row = OrderedDict(name=w.name)
-            w_totals = totals_for_worker(w)
+        for w in workers:
+            w_row = new_row(w.name, WORKER, w.id)
+            w_totals = totals(WORKER, w)
             for d in cols:
                 w_row[d] = w_totals.get(d, 0)
             rows.append(w_row)
 
     # 3. tasks WITHOUT an assignment  → "Unassigned" summary row
-    un_totals = unassigned_task_totals()
+    un_totals = totals(UNASSIGNED, None)
     if un_totals:  # only include if such tasks exist
-        u_row = OrderedDict(name="Unassigned")
+        u_row = new_row("Unassigned", UNASSIGNED, None)
         for d in cols:
             u_row[d] = un_totals.get(d, 0)
         rows.append(u_row)
@@ -161,16 +273,22 @@ def build_rows(cols: List[str]) -> List[OrderedDict]:
 @require_GET
 def table_api(request):
     """/api/table/ → JSON list of dicts (easy for tests / exports)."""
-    cols = date_columns()
-    data = build_rows(cols)
+    try:
+        params = table_params(request)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    cols, data = table_data(**params)
     return JsonResponse(data, safe=False)
 
 
 @require_GET
 def table_page(request):
     """/table/ → HTML table for quick human inspection."""
-    cols = date_columns()
-    data = build_rows(cols)
+    try:
+        params = table_params(request)
+    except ValueError as exc:
+        return JsonResponse({"error": str(exc)}, status=400)
+    cols, data = table_data(**params)
     return render(
         request,
         "table.html",
@@ -179,3 +297,104 @@ def table_page(request):
             "date_cols": cols,
         },
     )
+
+
+# ── Live updates ─────────────────────────────────────────────────────────
+#
+# Browsers keep one connection open and receive only the cells that moved:
+#
+#   event: cells
+#   id: 1234                      ← cursor; EventSource resends it on reconnect
+#   data: [{"key": "worker:7", "col": "11 Jan", "hours": 6}, …]
+#
+# Under ASGI each stream is a cheap coroutine that checks the change log
+# once per window. Under WSGI (runserver, gunicorn sync workers) a stream
+# would pin a worker, so the reply is a single short SSE message with a 1 s
+# `retry:` – EventSource then reconnects with its cursor, i.e. polls.
+# Clients without EventSource use ?poll=1: a plain JSON long-poll.
+
+STREAM_LIFETIME = 300      # s – the browser reconnects (with its cursor) after this
+HEARTBEAT = 15             # s – comment line that keeps proxies from timing out
+LONG_POLL_WAIT = 25        # s – max time a long-poll request is held open
+
+
+def cell_deltas(cells, granularity: str) -> List[Dict[str, object]]:
+    """changes.read() tuples → the JSON the front-end patches with."""
+    return [
+        {"key": row_key(kind, ref_id), "col": fmt(period, granularity), "hours": hours}
+        for kind, ref_id, period, hours in cells
+    ]
+
+
+def sse_event(event: str, data, event_id: Optional[int] = None) -> str:
+    head = f"id: {event_id}\n" if event_id is not None else ""
+    return f"{head}event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def sse_stream(cursor: int, granularity: str):
+    read = sync_to_async(changes.read)
+    window = changes.WINDOW.total_seconds()
+
+    # tell the page where the feed starts, *then* it loads the table – any
+    # overlap is harmless because deltas carry absolute values
+    yield "retry: 3000\n" + sse_event("ready", {"cursor": cursor}, cursor)
+
+    started = quiet_since = time.monotonic()
+    while time.monotonic() - started < STREAM_LIFETIME:
+        await asyncio.sleep(window)
+        cursor, cells = await read(cursor, granularity)
+        if cells:
+            yield sse_event("cells", cell_deltas(cells, granularity), cursor)
+            quiet_since = time.monotonic()
+        elif time.monotonic() - quiet_since > HEARTBEAT:
+            yield ": ping\n\n"
+            quiet_since = time.monotonic()
+
+
+@require_GET
+async def table_changes(request):
+    """
+    /api/table/changes/ → changed cells since a cursor.
+
+    ?granularity=day|week|month   which table the page shows (default day)
+    ?after=<cursor>               resume point (or Last-Event-ID header);
+                                  omitted = only changes from now on
+    ?poll=1&wait=<s>              JSON long-poll instead of SSE
+    """
+    granularity = request.GET.get("granularity", DAY)
+    if granularity not in GRANULARITIES:
+        return JsonResponse({"error": f"granularity must be one of {', '.join(GRANULARITIES)}"}, status=400)
+
+    raw = request.headers.get("Last-Event-ID") or request.GET.get("after")
+    try:
+        cursor = int(raw) if raw else await sync_to_async(changes.latest_cursor)()
+        wait = float(request.GET.get("wait", LONG_POLL_WAIT))
+        if not math.isfinite(wait):          # nan would never reach the deadline
+            raise ValueError(wait)
+    except ValueError:
+        return JsonResponse({"error": "after and wait must be finite numbers"}, status=400)
+    wait = min(max(wait, 0), LONG_POLL_WAIT)
+
+    wants_stream = "text/event-stream" in request.headers.get("Accept", "")
+    if wants_stream and not request.GET.get("poll"):
+        headers = {"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+        if isinstance(request, ASGIRequest):
+            return StreamingHttpResponse(
+                sse_stream(cursor, granularity),
+                content_type="text/event-stream",
+                headers=headers,
+            )
+        body = "retry: 1000\n" + sse_event("ready", {"cursor": cursor}, cursor)
+        cursor, cells = await sync_to_async(changes.read)(cursor, granularity)
+        if cells:
+            body += sse_event("cells", cell_deltas(cells, granularity), cursor)
+        return HttpResponse(body, content_type="text/event-stream", headers=headers)
+
+    # long-poll: hold the request until something changes or *wait* runs out
+    deadline = time.monotonic() + wait
+    while True:
+        cursor, cells = await sync_to_async(changes.read)(cursor, granularity)
+        if cells or time.monotonic() >= deadline:
+            break
+        await asyncio.sleep(changes.WINDOW.total_seconds())
+    return JsonResponse({"cursor": cursor, "cells": cell_deltas(cells, granularity)})